@@ -10,9 +10,12 @@ from PyQt6.QtWidgets import (QApplication, QHBoxLayout, QMainWindow,
 
 from src.config.config import Config
 from src.core.browser import BrowserThread
+from src.core.http_client import get_http_client
 from src.core.pages.home import HomePage
 from src.core.pages.setting import SettingsPage
 from src.core.pages.tools import ToolsPage
+from src.core.processor.workflow import configure_workflow_client, get_workflow_client
+from src.core.selector_registry import get_selector_registry
 from src.logger.logger import Logger
 
 # 设置日志文件路径
@@ -24,6 +27,7 @@ class XiaohongshuUI(QMainWindow):
         super().__init__()
 
         self.config = Config()
+        configure_workflow_client(self.config.get_workflow_config())
 
         # 设置应用图标
         icon_path = os.path.join(os.path.dirname(
@@ -167,7 +171,7 @@ class XiaohongshuUI(QMainWindow):
         self.stack.addWidget(self.settings_page)
 
         # 创建浏览器线程
-        self.browser_thread = BrowserThread()
+        self.browser_thread = BrowserThread(self.config)
         # 连接信号
         self.browser_thread.login_status_changed.connect(
             self.update_login_button)
@@ -181,6 +185,16 @@ class XiaohongshuUI(QMainWindow):
             self.home_page.handle_preview_result)
         self.browser_thread.preview_error.connect(
             self.home_page.handle_preview_error)
+        self.browser_thread.publish_page_status.connect(
+            self.home_page.handle_publish_page_status)
+        self.browser_thread.job_state_changed.connect(
+            self.handle_job_state_changed)
+        self.browser_thread.timing_summary.connect(
+            self.home_page.handle_timing_summary)
+        self.browser_thread.batch_finished.connect(
+            self.handle_batch_finished)
+        self.browser_thread.browser_recovered.connect(
+            self.handle_browser_recovered)
         self.browser_thread.start()
         
         # 启动下载器线程
@@ -212,6 +226,23 @@ class XiaohongshuUI(QMainWindow):
             preview_btn.setText(text)
             preview_btn.setEnabled(enabled)
 
+    def handle_job_state_changed(self, job_id, job_type, state):
+        """记录浏览器任务状态变化"""
+        self.logger.info(f"浏览器任务 {job_id}({job_type}): {state}")
+
+    def handle_batch_finished(self, report):
+        """记录批量发布结果"""
+        if report.get('error'):
+            self.logger.error(f"批量发布失败: {report['error']}")
+        else:
+            self.logger.info(
+                f"批量发布完成: 成功 {report['succeeded']}/{report['count']} 篇，"
+                f"只填写未发布 {report['filled']} 篇，{report['posts_per_minute']:.1f} 篇/分钟")
+
+    def handle_browser_recovered(self, reason):
+        """记录浏览器自动恢复"""
+        self.logger.warning(f"浏览器已自动恢复: {reason}")
+
     def switch_page(self, index):
         # 切换页面
         self.stack.setCurrentIndex(index)
@@ -229,7 +260,7 @@ class XiaohongshuUI(QMainWindow):
             # 停止所有线程
             if hasattr(self, 'browser_thread'):
                 self.browser_thread.stop()
-                self.browser_thread.wait(1000)  # 等待最多1秒
+                self.browser_thread.wait(5000)  # 等待保存账号状态并关闭浏览器，最多5秒
                 if self.browser_thread.isRunning():
                     self.browser_thread.terminate()  # 强制终止
                     self.browser_thread.wait()  # 等待终止完成
@@ -238,16 +269,37 @@ class XiaohongshuUI(QMainWindow):
                 self.generator_thread.terminate()
                 self.generator_thread.wait()
 
+            if hasattr(self, 'batch_generator_thread') and self.batch_generator_thread.isRunning():
+                # 停止提交新主题，已完成的草稿都已写入文件
+                self.batch_generator_thread.stop()
+                if not self.batch_generator_thread.wait(3000):
+                    self.batch_generator_thread.terminate()
+                    self.batch_generator_thread.wait()
+
             if hasattr(self, 'image_processor') and self.image_processor.isRunning():
                 self.image_processor.terminate()
                 self.image_processor.wait()
 
+            # 记录连接复用情况
+            http_stats = get_http_client().stats()
+            self.logger.info(
+                f"HTTP请求 {http_stats['requests']} 次，新建连接 {http_stats['connections_opened']} 个，"
+                f"复用 {http_stats['connections_reused']} 次")
+            get_http_client().close()
+
+            # 写入定时保存后新增的选择器命中计数
+            get_selector_registry().save()
+
+            # 记录工作流请求被缓存和合并省下的次数
+            workflow_stats = get_workflow_client().stats()
+            self.logger.info(
+                f"工作流请求 {workflow_stats['calls']} 次，合并相同请求省下 "
+                f"{workflow_stats['saved_by_coalescing']} 次，缓存命中率 "
+                f"{workflow_stats['cache']['hit_rate']:.0%}")
+
             # 关闭浏览器
-            if hasattr(self, 'browser_thread') and self.browser_thread.poster:
-                try:
-                    self.browser_thread.poster.close(force=True)
-                except:
-                    pass  # 忽略关闭浏览器时的错误
+            if hasattr(self, 'browser_thread'):
+                self.browser_thread.close_poster()
 
             # 清理资源
             self.images = []
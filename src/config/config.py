@@ -23,6 +23,33 @@ class Config:
                 "title": "测试标题",
             },
             "phone": "18888888888",
+            "browser": {
+                "max_contexts": 8,  # 同一个浏览器内最多保持的账号上下文数
+                # sync: 同步Playwright; async: asyncio并发驱动多个账号，
+                # async 不支持请求拦截、静态资源缓存、trace 录制、发布页预热和批量发布
+                "engine": "sync",
+                "concurrency": 4,   # async引擎同时执行的登录/发布流程数
+                "network_profile": "light",  # 请求拦截: off/light/aggressive
+                "network_rules": {},         # 覆盖拦截规则，如 {"throttle": {"download_kbps": 2048}}
+                "asset_cache": True,         # 在本地缓存创作者中心的JS/CSS
+                "asset_cache_mb": 200,       # 静态资源缓存上限(MB)
+                "headless": False,   # 无界面运行浏览器，需要人工确认的步骤无法在窗口中操作
+                "endpoint": "",      # 连接已启动的浏览器: auto 或 ws:// / http:// 地址，为空时直接启动
+                "optimize_images": True,  # 上传前缩小图片并重新编码
+                "image_quality": 85,      # 重新编码的JPEG质量
+                "trace": False,                 # 录制 Playwright trace，只保留失败或较慢的任务
+                "trace_threshold_seconds": 60,  # 超过这个耗时的任务保留 trace
+                "trace_keep": 20,               # 最多保留的 trace 文件数
+                "health_check_interval": 30,  # 空闲时探测浏览器是否存活的间隔(秒)
+            },
+            "workflow": {
+                "url": "",          # 工作流地址，为空时使用默认地址，可指向 test/mock_workflow_server.py
+                "workflow_id": "",  # 为空时使用默认的工作流
+                "read_timeout": 180,  # 等待生成结果的超时(秒)
+                "retries": 3,       # 连接失败和 429/5xx 的重试次数
+                "concurrency": 4,  # 批量生成时同时进行的工作流请求数
+                "stream": True,    # 流式生成，标题和正文边生成边显示
+            },
         }
         self.load_config()
 
@@ -50,12 +77,13 @@ class Config:
                 self.config[key] = value
         
         # 检查并添加缺失的嵌套配置项
-        if 'title_edit' in self.config:
-            for key, value in self.default_config['title_edit'].items():
-                if key not in self.config['title_edit']:
-                    self.config['title_edit'][key] = value
-        else:
-            self.config['title_edit'] = self.default_config['title_edit']
+        for section in ('title_edit', 'browser', 'workflow'):
+            if isinstance(self.config.get(section), dict):
+                for key, value in self.default_config[section].items():
+                    if key not in self.config[section]:
+                        self.config[section][key] = value
+            else:
+                self.config[section] = self.default_config[section]
         
         # 保存更新后的配置
         self.save_config()
@@ -103,3 +131,25 @@ class Config:
             self.config['title_edit'] = {}
         self.config['title_edit']['author'] = author
         self.save_config()
+
+    def get_browser_config(self):
+        """获取浏览器配置"""
+        return self.config.get('browser', self.default_config['browser'])
+
+    def update_browser_config(self, browser):
+        """更新浏览器配置"""
+        if 'browser' not in self.config:
+            self.config['browser'] = {}
+        self.config['browser'].update(browser)
+        self.save_config()
+
+    def get_workflow_config(self):
+        """获取内容生成工作流配置"""
+        return self.config.get('workflow', self.default_config['workflow'])
+
+    def update_workflow_config(self, workflow):
+        """更新内容生成工作流配置"""
+        if 'workflow' not in self.config:
+            self.config['workflow'] = {}
+        self.config['workflow'].update(workflow)
+        self.save_config()
@@ -0,0 +1,210 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+# 只缓存这些域名下的静态资源
+CACHEABLE_HOSTS = ('xhscdn.com', 'xiaohongshu.com')
+CACHEABLE_TYPES = ('script', 'stylesheet', 'font')
+
+# 文件名中带内容哈希的资源可以视为不可变，如 index.3f9a1c2b.js
+HASHED_NAME = re.compile(r'[.\-_][0-9a-f]{6,}\.(js|css|woff2?|ttf)$', re.IGNORECASE)
+
+# 没有内容哈希、也没有 immutable 的资源，max-age 至少这么长才缓存，过期后重新请求
+MIN_MAX_AGE = 7 * 24 * 3600
+
+# 随资源一起保存并回放的响应头
+KEPT_HEADERS = ('content-type', 'cache-control', 'access-control-allow-origin', 'timing-allow-origin')
+
+# 新增资源后最多间隔多久写一次索引(秒)，避免进程异常退出时丢失整份索引
+SAVE_INTERVAL = 5
+
+
+class StaticAssetCache:
+    """创作者中心静态资源的磁盘缓存
+
+    拦截 JS/CSS/字体请求，以URL为键、内容哈希为文件名保存在
+    ~/.xhs_system/asset_cache 下，应用重启后直接从本地返回不可变资源。
+    只靠较长 max-age 缓存的资源记录过期时间，过期后按未命中重新请求。
+    总大小超过上限时按最近最少使用淘汰。
+    """
+
+    def __init__(self, max_bytes=200 * 1024 * 1024, cache_dir=None):
+        home_dir = os.path.expanduser('~')
+        self.cache_dir = cache_dir or os.path.join(home_dir, '.xhs_system', 'asset_cache')
+        self.blob_dir = os.path.join(self.cache_dir, 'blobs')
+        if not os.path.exists(self.blob_dir):
+            os.makedirs(self.blob_dir)
+        self.index_file = os.path.join(self.cache_dir, 'index.json')
+        self.max_bytes = max_bytes
+        self.dirty = False
+        self.index = self._load_index()  # URL -> {hash, size, headers, last_access, expires_at}
+        # 旧索引没有记录过期时间，不能确定仍然有效的条目直接丢弃
+        for url, entry in list(self.index.items()):
+            if 'expires_at' not in entry and not self._is_immutable(url, entry['headers']):
+                self._remove(url)
+        self.last_saved = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.bytes_served = 0
+
+    def _load_index(self):
+        if os.path.exists(self.index_file):
+            try:
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                logging.debug(f"读取静态资源缓存索引失败: {str(e)}")
+        return {}
+
+    def save_index(self):
+        """原子写入缓存索引"""
+        if not self.dirty:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='.index-', suffix='.json')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f)
+            os.replace(tmp_path, self.index_file)
+            self.dirty = False
+            self.last_saved = time.monotonic()
+        except Exception as e:
+            logging.debug(f"保存静态资源缓存索引失败: {str(e)}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _blob_path(self, digest):
+        return os.path.join(self.blob_dir, digest)
+
+    def handles(self, request):
+        """是否由缓存处理该请求"""
+        if request.method != 'GET' or request.resource_type not in CACHEABLE_TYPES:
+            return False
+        host = urlsplit(request.url).hostname or ''
+        return any(host == h or host.endswith('.' + h) for h in CACHEABLE_HOSTS)
+
+    def _is_immutable(self, url, headers):
+        if HASHED_NAME.search(urlsplit(url).path):
+            return True
+        return 'immutable' in headers.get('cache-control', '')
+
+    def _expires_at(self, url, headers):
+        """返回 (是否缓存, 过期时间)，不可变资源的过期时间为 None"""
+        if self._is_immutable(url, headers):
+            return True, None
+        match = re.search(r'max-age=(\d+)', headers.get('cache-control', ''))
+        if match and int(match.group(1)) >= MIN_MAX_AGE:
+            return True, time.time() + int(match.group(1))
+        return False, None
+
+    def lookup(self, url):
+        """命中时返回 (headers, body)"""
+        entry = self.index.get(url)
+        if entry is None:
+            return None
+        if entry.get('expires_at') is not None and time.time() >= entry['expires_at']:
+            self._remove(url)
+            return None
+        path = self._blob_path(entry['hash'])
+        try:
+            with open(path, 'rb') as f:
+                body = f.read()
+        except OSError:
+            self.index.pop(url, None)
+            self.dirty = True
+            return None
+        entry['last_access'] = time.time()
+        self.dirty = True
+        return entry['headers'], body
+
+    def store(self, url, headers, body, expires_at=None):
+        """保存资源，相同内容只保存一份；expires_at 为空表示不会过期"""
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            fd, tmp_path = tempfile.mkstemp(dir=self.blob_dir)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        self.index[url] = {
+            'hash': digest,
+            'size': len(body),
+            'headers': {k: v for k, v in headers.items() if k in KEPT_HEADERS},
+            'last_access': time.time(),
+            'expires_at': expires_at,
+        }
+        self.dirty = True
+        self.stores += 1
+        self._evict()
+        if time.monotonic() - self.last_saved >= SAVE_INTERVAL:
+            self.save_index()
+
+    def _evict(self):
+        total = sum(entry['size'] for entry in self.index.values())
+        if total <= self.max_bytes:
+            return
+        for url, entry in sorted(self.index.items(), key=lambda item: item[1]['last_access']):
+            if total <= self.max_bytes:
+                break
+            self._remove(url)
+            total -= entry['size']
+            self.evictions += 1
+
+    def _remove(self, url):
+        entry = self.index.pop(url)
+        self.dirty = True
+        # 其他URL没有引用同一内容时删除文件
+        if not any(e['hash'] == entry['hash'] for e in self.index.values()):
+            path = self._blob_path(entry['hash'])
+            if os.path.exists(path):
+                os.remove(path)
+
+    def handle(self, route):
+        """处理一个被拦截的请求"""
+        request = route.request
+        cached = self.lookup(request.url)
+        if cached is not None:
+            headers, body = cached
+            self.hits += 1
+            self.bytes_served += len(body)
+            route.fulfill(status=200, headers=headers, body=body)
+            return
+        self.misses += 1
+        try:
+            response = route.fetch()
+            body = response.body()
+        except Exception as e:
+            # 拉取失败时交还给浏览器自己请求，不能让页面一直等待
+            logging.debug(f"拉取静态资源失败: {request.url} {str(e)}")
+            try:
+                route.continue_()
+            except Exception:
+                route.abort()
+            return
+        cacheable, expires_at = self._expires_at(request.url, response.headers)
+        if response.status == 200 and cacheable:
+            try:
+                self.store(request.url, response.headers, body, expires_at)
+            except OSError as e:
+                logging.debug(f"保存静态资源失败: {request.url} {str(e)}")
+        route.fulfill(response=response, body=body)
+
+    def stats(self):
+        """返回缓存命中情况"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.index),
+            'size': sum(entry['size'] for entry in self.index.values()),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'stores': self.stores,
+            'evictions': self.evictions,
+            'bytes_served': self.bytes_served,
+        }
@@ -0,0 +1,326 @@
+# 基于 asyncio 的小红书自动发稿，一个事件循环并发驱动多个账号
+import asyncio
+import contextlib
+import logging
+import threading
+
+from playwright.async_api import async_playwright
+
+from src.core.browser_server import resolve_endpoint
+from src.core.processor.upload_image import UploadImageOptimizer
+from src.core.publish_page import PUBLISH_URL
+from src.core.session import INVALID, UNKNOWN, VALID, SessionValidator
+from src.core.session_store import SessionStore
+from src.core.site import LOGIN_PATH, creator_url
+from src.core.selector_registry import get_selector_registry
+from src.core.waiter import DEFAULT_STEP_TIMEOUTS, DEFAULT_TIMEOUT, PageWaiter, StepTimeoutError
+from src.core.write_xiaohongshu import (STEALTH_JS, VerificationCodeHandler,
+                                        get_launch_args)
+
+LOGIN_URL = creator_url(LOGIN_PATH)
+
+# 异步引擎只实现登录和填写发布页，以下同步引擎的功能不生效
+ASYNC_UNSUPPORTED = ("请求拦截(network_profile)", "静态资源缓存(asset_cache)",
+                     "trace 录制(trace)", "发布页预热", "批量发布")
+
+
+def _ask_verification_code():
+    """在线程池中弹出验证码对话框，不阻塞事件循环"""
+    # 在当前线程创建，保证 moveToThread 在对象所属线程中调用
+    return VerificationCodeHandler().get_verification_code()
+
+
+class AsyncXiaohongshuPoster:
+    """asyncio 版本的发稿器，与 XiaohongshuPoster 保持相同的 login/post_article/close 接口
+
+    登录态校验与同步版本共用 SessionValidator；ASYNC_UNSUPPORTED 中的功能只有同步引擎支持。
+    """
+
+    unsupported_features = ASYNC_UNSUPPORTED
+
+    def __init__(self, browser, account="default", timeouts=None, image_optimizer=None):
+        self.browser = browser
+        self.image_optimizer = image_optimizer or UploadImageOptimizer()
+        self.account = str(account)
+        self.timeouts = dict(DEFAULT_STEP_TIMEOUTS)
+        if timeouts:
+            self.timeouts.update(timeouts)
+        self.session_store = SessionStore(self.account)
+        self.session_validator = SessionValidator()
+        self.selectors = get_selector_registry()
+        self.context = None
+        self.page = None
+        self.lock = asyncio.Lock()  # 同一账号的流程依次执行
+        self.limiter = None  # 引擎的并发名额(asyncio.Semaphore)
+        self.waiter = PageWaiter(self.timeouts)  # 只用于记录各步骤耗时
+
+    @property
+    def timings(self):
+        return self.waiter.timings
+
+    async def initialize(self):
+        """创建本账号的浏览器上下文"""
+        if self.context is not None:
+            return
+        options = {'permissions': ['geolocation']}
+        state = self.session_store.load()
+        if state:
+            options['storage_state'] = state
+        self.context = await self.browser.new_context(**options)
+        await self.context.add_init_script(STEALTH_JS)
+        self.page = await self.context.new_page()
+
+    async def _wait(self, step, selector, state='visible'):
+        """等待元素状态并记录耗时"""
+        with self.waiter.step(step):
+            await self.page.wait_for_selector(
+                selector, state=state, timeout=self.timeouts.get(step, DEFAULT_TIMEOUT))
+
+    async def _save_state(self):
+        try:
+            self.session_store.save(await self.context.storage_state())
+        except Exception as e:
+            logging.debug(f"保存账号 {self.account} 存储状态失败: {str(e)}")
+
+    def _slot(self):
+        """占用引擎的一个并发名额，只包住浏览器操作；未交给引擎时不限制"""
+        return self.limiter if self.limiter is not None else contextlib.nullcontext()
+
+    async def login(self, phone, country_code="+86"):
+        """登录小红书"""
+        self.waiter.reset()
+        async with self._slot():
+            await self.initialize()
+
+            # 先在本地检查cookie，再用一个轻量请求校验登录态，不加载登录页
+            with self.waiter.step('session_check'):
+                session = await self.session_validator.check_async(self.context, self.account)
+                if session == UNKNOWN:
+                    session = await self._check_session_by_page()
+                    self.session_validator.mark(self.account, session)
+            if session == VALID:
+                print(f"账号 {self.account} 使用已保存的登录状态")
+                await self._save_state()
+                return
+            # 清理无效的cookies
+            await self.context.clear_cookies()
+
+            with self.waiter.step('goto_login'):
+                await self.page.goto(LOGIN_URL)
+
+            with self.waiter.step('login_form'):
+                phone_input = await self.selectors.resolve_async(
+                    self.page, 'login.phone_input', self.timeouts['login_form'])
+            with self.waiter.step('fill_phone'):
+                await phone_input.fill(str(phone))
+
+            # 同时探测发送验证码按钮的所有候选选择器
+            try:
+                with self.waiter.step('send_code'):
+                    send_button = await self.selectors.resolve_async(
+                        self.page, 'login.send_code', self.timeouts['send_code_ready'])
+                    await send_button.click()
+            except StepTimeoutError:
+                print("无法找到发送验证码按钮")
+
+        # 验证码对话框在线程池中等待用户输入，期间不占用并发名额，不阻塞其他账号
+        loop = asyncio.get_running_loop()
+        with self.waiter.step('verification_code'):
+            verification_code = await loop.run_in_executor(None, _ask_verification_code)
+
+        async with self._slot():
+            # 输入验证码并点击登录按钮
+            with self.waiter.step('submit_login'):
+                if verification_code:
+                    code_input = await self.selectors.resolve_async(self.page, 'login.code_input')
+                    await code_input.fill(verification_code)
+                submit_button = await self.selectors.resolve_async(self.page, 'login.submit')
+                await submit_button.click()
+
+            # 等待登录成功，页面跳转离开登录页
+            try:
+                with self.waiter.step('login_redirect'):
+                    await self.page.wait_for_url(
+                        lambda url: "login" not in url, timeout=self.timeouts['login_redirect'])
+            except Exception as e:
+                logging.debug(f"等待登录跳转失败: {str(e)}")
+            await self._save_state()
+            self.session_validator.mark(
+                self.account, VALID if "login" not in self.page.url else INVALID)
+
+    async def _check_session_by_page(self):
+        """接口无法确定登录态时，打开登录页看是否被跳转"""
+        await self.page.goto(LOGIN_URL, wait_until="domcontentloaded")
+        try:
+            with self.waiter.step('session_redirect'):
+                await self.page.wait_for_url(
+                    lambda url: "login" not in url, timeout=self.timeouts['session_redirect'])
+            return VALID
+        except Exception:
+            return INVALID
+
+    async def post_article(self, title, content, images=None):
+        """发布文章
+        Args:
+            title: 文章标题
+            content: 文章内容
+            images: 图片路径列表
+        """
+        self.waiter.reset()
+
+        # 在线程池中预处理图片，不阻塞事件循环，也不占用并发名额
+        loop = asyncio.get_running_loop()
+        with self.waiter.step('prepare_images'):
+            images = await loop.run_in_executor(None, self.image_optimizer.prepare, images)
+
+        async with self._slot():
+            await self.initialize()
+
+            # 直接打开发布页并切换到上传图文
+            with self.waiter.step('goto_publish'):
+                await self.page.goto(PUBLISH_URL, wait_until="domcontentloaded")
+            await self._wait('publish_entry', ".creator-tab")
+            tabs = await self.page.query_selector_all(".creator-tab")
+            if len(tabs) > 1:
+                await tabs[1].click()
+            await self._wait('upload_form', ".upload-input", state='attached')
+
+            # 上传图片
+            if images:
+                with self.waiter.step('upload'):
+                    async with self.page.expect_file_chooser() as fc_info:
+                        await self.page.click(".upload-input")
+                    file_chooser = await fc_info.value
+                    await file_chooser.set_files(images)
+
+            # 等待编辑器可用
+            await self._wait('editor_title', ".d-text")
+            await self._wait('editor_body', ".ql-editor", state='attached')
+
+            with self.waiter.step('fill_title'):
+                await self.page.fill(".d-text", title)
+            with self.waiter.step('fill_content'):
+                await self.page.fill(".ql-editor", content)
+
+            # 发布
+            # await self.page.click(".el-button.publishBtn")
+
+    async def close(self, force=False):
+        """关闭本账号的上下文"""
+        if self.context is None:
+            return
+        try:
+            await self._save_state()
+            await self.context.close()
+        except Exception as e:
+            logging.debug(f"关闭账号 {self.account} 上下文时出错: {str(e)}")
+        self.context = None
+        self.page = None
+
+
+class AsyncPosterEngine:
+    """在后台线程运行事件循环，并发执行多个账号的登录和发布
+
+    所有账号共享一个 Chromium，同一时间最多 concurrency 个流程在执行。
+    各方法返回 concurrent.futures.Future，可以在 Qt 线程中等待或添加回调。
+    """
+
+    def __init__(self, concurrency=4, headless=False, endpoint=None, image_optimizer=None):
+        self.concurrency = max(1, int(concurrency))
+        self.image_optimizer = image_optimizer or UploadImageOptimizer()
+        self.headless = headless
+        self.endpoint = endpoint
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run_loop, daemon=True)
+        self.thread.start()
+        self.semaphore = None
+        self.browser_lock = None
+        self.playwright = None
+        self.browser = None
+        self.posters = {}  # 账号 -> AsyncXiaohongshuPoster
+        self.running = 0
+        self.completed = 0
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro):
+        """把协程提交到引擎的事件循环"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    async def _ensure_browser(self):
+        # 在事件循环中创建，兼容 Python 3.8 的 asyncio 原语
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.concurrency)
+            self.browser_lock = asyncio.Lock()
+        async with self.browser_lock:
+            if self.browser is not None and self.browser.is_connected():
+                return
+            if self.playwright is None:
+                self.playwright = await async_playwright().start()
+            self.browser = await self._launch()
+            self.posters = {}
+
+    async def _launch(self):
+        """与 launch_browser 相同，优先连接已经启动的浏览器"""
+        endpoint = resolve_endpoint(self.endpoint)
+        if endpoint:
+            try:
+                if endpoint.startswith('ws'):
+                    return await self.playwright.chromium.connect(endpoint)
+                return await self.playwright.chromium.connect_over_cdp(endpoint)
+            except Exception as e:
+                logging.debug(f"连接浏览器 {endpoint} 失败，改为启动新浏览器: {str(e)}")
+        return await self.playwright.chromium.launch(**get_launch_args(self.headless))
+
+    async def get_poster(self, account):
+        """取得账号对应的异步poster"""
+        await self._ensure_browser()
+        poster = self.posters.get(account)
+        if poster is None:
+            poster = AsyncXiaohongshuPoster(self.browser, account, image_optimizer=self.image_optimizer)
+            poster.limiter = self.semaphore
+            self.posters[account] = poster
+        return poster
+
+    async def _run_limited(self, account, method, *args):
+        poster = await self.get_poster(account)
+        # 并发名额由 poster 在浏览器操作期间占用，等待验证码时释放
+        async with poster.lock:
+            self.running += 1
+            try:
+                await getattr(poster, method)(*args)
+            finally:
+                self.running -= 1
+                self.completed += 1
+        return poster
+
+    def login(self, phone):
+        """提交登录任务，返回 Future，结果为对应的poster"""
+        return self.submit(self._run_limited(str(phone), 'login', phone))
+
+    def post_article(self, account, title, content, images=None):
+        """提交发布任务，返回 Future"""
+        return self.submit(self._run_limited(
+            str(account), 'post_article', title, content, images))
+
+    async def _shutdown(self):
+        for poster in list(self.posters.values()):
+            await poster.close()
+        self.posters = {}
+        if self.browser:
+            await self.browser.close()
+        if self.playwright:
+            await self.playwright.stop()
+        self.browser = None
+        self.playwright = None
+
+    def close(self, timeout=10):
+        """关闭所有账号和浏览器，并停止事件循环"""
+        try:
+            self.submit(self._shutdown()).result(timeout)
+        except Exception as e:
+            logging.debug(f"关闭异步引擎时出错: {str(e)}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout)
@@ -0,0 +1,85 @@
+import json
+import logging
+import time
+
+
+def load_drafts(path):
+    """逐行读取 JSONL 草稿文件，每行 {"title", "content", "images"}"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                draft = json.loads(line)
+            except json.JSONDecodeError as e:
+                logging.debug(f"草稿文件第 {line_no} 行格式错误: {str(e)}")
+                yield {'error': f"第 {line_no} 行格式错误"}
+                continue
+            if not isinstance(draft, dict):
+                yield {'error': f"第 {line_no} 行不是草稿对象"}
+                continue
+            yield draft
+
+
+def iter_drafts(source):
+    """草稿来源可以是 JSONL 文件路径，也可以是草稿字典的可迭代对象"""
+    if isinstance(source, str):
+        return load_drafts(source)
+    # 非字典的草稿记为失败，不中断整批
+    return (draft if isinstance(draft, dict) else {'error': "草稿不是对象"} for draft in source)
+
+
+class BatchReport:
+    """批量发布的逐篇耗时和总体吞吐量"""
+
+    def __init__(self):
+        self.posts = []
+        self.started_at = time.monotonic()
+        self.finished_at = None
+
+    def add(self, index, title, images, prepare_seconds, post_seconds, error=None, spans=None,
+            published=True):
+        """记录一篇的结果，published 为 False 表示只填写了内容没有发布"""
+        entry = {
+            'index': index,
+            'title': title,
+            'images': images,
+            'prepare_seconds': prepare_seconds,
+            'post_seconds': post_seconds,
+            'error': error,
+            'published': published,
+            'spans': spans or [],
+        }
+        self.posts.append(entry)
+        return entry
+
+    def finish(self):
+        self.finished_at = time.monotonic()
+
+    def summary(self):
+        """返回报告字典"""
+        total_seconds = (self.finished_at or time.monotonic()) - self.started_at
+        done = [post for post in self.posts if post['error'] is None]
+        succeeded = [post for post in done if post['published']]
+        post_seconds = [post['post_seconds'] for post in done]
+        return {
+            'count': len(self.posts),
+            'succeeded': len(succeeded),
+            'filled': len(done) - len(succeeded),
+            'failed': len(self.posts) - len(done),
+            'total_seconds': total_seconds,
+            'posts_per_minute': len(succeeded) * 60 / total_seconds if total_seconds else 0.0,
+            'avg_post_seconds': sum(post_seconds) / len(post_seconds) if post_seconds else 0.0,
+            'images': sum(post['images'] for post in done),
+            'posts': list(self.posts),
+        }
+
+    def text(self):
+        """返回摘要文本"""
+        summary = self.summary()
+        filled = f"只填写未发布 {summary['filled']} 篇，" if summary['filled'] else ""
+        return (f"共 {summary['count']} 篇，成功 {summary['succeeded']} 篇，{filled}"
+                f"失败 {summary['failed']} 篇，用时 {summary['total_seconds']:.1f}秒，"
+                f"平均每篇 {summary['avg_post_seconds']:.1f}秒，"
+                f"{summary['posts_per_minute']:.1f} 篇/分钟")
@@ -1,7 +1,17 @@
-from PyQt6.QtCore import QThread, pyqtSignal
+import json
+import logging
 
+from PyQt6.QtCore import QThread, pyqtSignal
+from playwright.sync_api import sync_playwright
 
-from src.core.write_xiaohongshu import XiaohongshuPoster
+from src.config.config import Config
+from src.core.asset_cache import StaticAssetCache
+from src.core.job_queue import CANCELLED, EXPIRED, Job, JobQueue
+from src.core.processor.upload_image import UploadImageOptimizer
+from src.core.tracing import TraceRecorder
+from src.core.waiter import TimingStats
+from src.core.write_xiaohongshu import (XiaohongshuPoster, create_context_pool,
+                                        launch_browser)
 
 
 class BrowserThread(QThread):
@@ -12,37 +22,367 @@ class BrowserThread(QThread):
     login_error = pyqtSignal(str)  # 用于传递错误信息
     preview_success = pyqtSignal()  # 用于通知预览成功
     preview_error = pyqtSignal(str)  # 用于传递预览错误信息
+    publish_page_status = pyqtSignal(dict)  # 用于传递预热发布页的状态
+    job_state_changed = pyqtSignal(str, str, str)  # 任务ID、任务类型、任务状态
+    batch_progress = pyqtSignal(dict)  # 批量发布中每篇完成时的统计
+    batch_finished = pyqtSignal(dict)  # 批量发布报告，失败时包含 error
+    step_timings = pyqtSignal(str, list)  # 流程名、各步骤耗时
+    timing_summary = pyqtSignal(dict)  # 各步骤最近耗时的 p50/p95
+    browser_recovered = pyqtSignal(str)  # 浏览器或页面失效后已自动恢复，传递原因
 
-    def __init__(self):
+    def __init__(self, config=None):
         super().__init__()
+        self.config = config or Config()
         self.poster = None
-        self.action_queue = []
+        self.posters = {}  # 账号 -> XiaohongshuPoster，共享同一个浏览器
+        self.playwright = None
+        self.browser = None
+        self.context_pool = None
+        self.async_engine = None
+        self.image_optimizer = None
+        self.tracer = None
+        self.timing_stats = TimingStats()
+        self.action_queue = JobQueue(on_state_changed=self._on_job_state_changed)
+        self.restarts = 0
         self.is_running = True
 
-    def run(self):
-        while self.is_running:
-            if self.action_queue:
-                action = self.action_queue.pop(0)
+    def submit(self, job_type, priority=None, timeout=None, **payload):
+        """提交任务到浏览器线程
+
+        相同账号的登录、以及预览发布，在排队或执行中时不会重复加入，
+        重复提交会返回已有的任务。
+        """
+        if job_type == 'login':
+            key = f"login:{payload.get('phone')}"
+        elif job_type in ('preview', 'batch'):
+            key = job_type
+        else:
+            key = None
+        job = Job(job_type, payload, priority=priority, timeout=timeout, key=key)
+        return self.action_queue.put(job)
+
+    def cancel(self, job_id):
+        """取消排队中的任务"""
+        return self.action_queue.cancel(job_id)
+
+    def _on_job_state_changed(self, job):
+        self.job_state_changed.emit(job.id, job.type, job.state)
+        # 未执行就结束的任务，恢复对应按钮状态
+        if job.state in (CANCELLED, EXPIRED):
+            message = "任务已取消" if job.state == CANCELLED else "任务排队超时"
+            if job.type == 'login':
+                self.login_error.emit(message)
+            elif job.type == 'preview':
+                self.preview_error.emit(message)
+            elif job.type == 'batch':
+                self.batch_finished.emit({'error': message})
+
+    def ensure_browser(self):
+        """启动所有账号共享的浏览器和上下文池"""
+        if self.browser is not None and self.browser.is_connected():
+            return
+        if self.playwright is None:
+            self.playwright = sync_playwright().start()
+        browser_config = self.config.get_browser_config()
+        self.browser = launch_browser(
+            self.playwright,
+            headless=browser_config.get('headless', False),
+            endpoint=browser_config.get('endpoint'),
+        )
+        asset_cache = None
+        if browser_config.get('asset_cache', True):
+            asset_cache = StaticAssetCache(
+                max_bytes=browser_config.get('asset_cache_mb', 200) * 1024 * 1024)
+        self.context_pool = create_context_pool(
+            self.browser,
+            browser_config.get('max_contexts', 8),
+            network_profile=browser_config.get('network_profile', 'light'),
+            network_rules=browser_config.get('network_rules'),
+            asset_cache=asset_cache,
+        )
+        self.posters = {}
+
+    def get_poster(self, account):
+        """取得账号对应的poster，不会重复启动浏览器"""
+        self.ensure_browser()
+        poster = self.posters.get(account)
+        if poster is None:
+            poster = XiaohongshuPoster(account=account, pool=self.context_pool,
+                                       image_optimizer=self.get_image_optimizer(),
+                                       tracer=self.get_tracer())
+            self.posters[account] = poster
+        return poster
+
+    def get_image_optimizer(self):
+        """所有账号共享的上传图片预处理"""
+        if self.image_optimizer is None:
+            browser_config = self.config.get_browser_config()
+            self.image_optimizer = UploadImageOptimizer(
+                quality=browser_config.get('image_quality', 85),
+                enabled=browser_config.get('optimize_images', True),
+            )
+        return self.image_optimizer
+
+    def get_tracer(self):
+        """所有账号共享的 trace 录制设置"""
+        if self.tracer is None:
+            browser_config = self.config.get_browser_config()
+            self.tracer = TraceRecorder(
+                enabled=browser_config.get('trace', False),
+                threshold_seconds=browser_config.get('trace_threshold_seconds', 60),
+                max_traces=browser_config.get('trace_keep', 20),
+            )
+        return self.tracer
+
+    def use_async_engine(self):
+        """是否使用asyncio引擎并发执行各账号的流程"""
+        return self.config.get_browser_config().get('engine') == 'async'
+
+    def dispatch_async(self, job):
+        """把任务交给asyncio引擎，结果通过回调发出信号，不阻塞本线程和GUI"""
+        if self.async_engine is None:
+            from src.core.async_poster import ASYNC_UNSUPPORTED, AsyncPosterEngine
+            browser_config = self.config.get_browser_config()
+            logging.warning(f"使用异步引擎，以下功能不生效: {'、'.join(ASYNC_UNSUPPORTED)}")
+            self.async_engine = AsyncPosterEngine(
+                browser_config.get('concurrency', 4),
+                headless=browser_config.get('headless', False),
+                endpoint=browser_config.get('endpoint'),
+                image_optimizer=self.get_image_optimizer(),
+            )
+
+        action = job.payload
+        if job.type == 'login':
+            def on_login_done(future):
+                try:
+                    self.poster = future.result()
+                    self.action_queue.finish(job)
+                    self.report_timings('login', self.poster.timings)
+                    self.login_success.emit(self.poster)
+                except Exception as e:
+                    self.action_queue.finish(job, str(e))
+                    self.login_error.emit(str(e))
+            self.async_engine.login(action['phone']).add_done_callback(on_login_done)
+        elif job.type == 'preview' and self.poster:
+            def on_preview_done(future):
                 try:
-                    if action['type'] == 'login':
-                        self.poster = XiaohongshuPoster()
-                        self.poster.login(action['phone'])
-                        self.login_success.emit(self.poster)
-                    elif action['type'] == 'preview' and self.poster:
-                        self.poster.post_article(
-                            action['title'],
-                            action['content'],
-                            action['images']
-                        )
-                        self.preview_success.emit()
+                    poster = future.result()
+                    self.action_queue.finish(job)
+                    self.report_timings('preview', poster.timings)
+                    self.preview_success.emit()
                 except Exception as e:
-                    if action['type'] == 'login':
-                        self.login_error.emit(str(e))
-                    elif action['type'] == 'preview':
-                        self.preview_error.emit(str(e))
-            self.msleep(100)  # 避免CPU占用过高
+                    self.action_queue.finish(job, str(e))
+                    self.preview_error.emit(str(e))
+            self.async_engine.post_article(
+                self.poster.account,
+                action['title'],
+                action['content'],
+                action['images']
+            ).add_done_callback(on_preview_done)
+        elif job.type == 'batch':
+            self.action_queue.finish(job, "异步引擎不支持批量发布")
+            self.batch_finished.emit({'error': "异步引擎不支持批量发布"})
+        else:
+            self.action_queue.finish(job, "未登录")
+
+    def run(self):
+        interval = self.config.get_browser_config().get('health_check_interval', 30)
+        while self.is_running:
+            # 阻塞等待任务，加入任务时立即唤醒；空闲时定期探测浏览器
+            job = self.action_queue.get(timeout=interval)
+            if job is None:
+                if self.is_running and not self.use_async_engine():
+                    self.check_health()
+                continue
+            try:
+                if self.use_async_engine():
+                    self.dispatch_async(job)
+                else:
+                    self.execute(job)
+            except Exception as e:
+                # 任何异常都不能让线程退出，否则之后的任务不再执行，界面一直停在执行中
+                logging.error(f"执行任务 {job.type} 失败: {str(e)}")
+                self.fail_job(job, e)
+        self.shutdown()
+
+    def check_health(self):
+        """探测浏览器和各账号页面，失效时自动恢复，恢复失败时不抛出异常
+
+        Returns:
+            探测时是否一切正常
+        """
+        if self.browser is None:
+            return True
+        try:
+            if not self.browser.is_connected():
+                self.try_restart_browser("浏览器已断开")
+                return False
+            healthy = True
+            for account, poster in list(self.posters.items()):
+                if not poster.is_healthy():
+                    healthy = False
+                    poster.recover()
+                    self.restarts += 1
+                    self.browser_recovered.emit(f"账号 {account} 的页面已失效，已重新创建")
+            return healthy
+        except Exception as e:
+            logging.debug(f"浏览器恢复失败: {str(e)}")
+            self.try_restart_browser(f"恢复页面失败: {str(e)}")
+            return False
+
+    def try_restart_browser(self, reason):
+        """重启浏览器，失败时记录日志，下一个任务会重新尝试启动"""
+        try:
+            self.restart_browser(reason)
+            return True
+        except Exception as e:
+            print(f"重启浏览器失败: {str(e)}")
+            logging.error(f"重启浏览器失败({reason}): {str(e)}")
+            return False
+
+    def restart_browser(self, reason):
+        """重启共享浏览器，账号上下文从保存的会话重新创建"""
+        print(f"{reason}，正在重启浏览器...")
+        account = self.poster.account if self.poster else None
+        try:
+            if self.context_pool:
+                self.context_pool.close()
+            if self.browser:
+                self.browser.close()
+        except Exception as e:
+            logging.debug(f"关闭失效的浏览器时出错: {str(e)}")
+        self.context_pool = None
+        self.browser = None
+        self.posters = {}
+        self.poster = None
+        try:
+            self.ensure_browser()
+        except Exception as e:
+            # Playwright 驱动也已退出时重新启动
+            logging.debug(f"重启浏览器失败，重新启动Playwright: {str(e)}")
+            try:
+                self.playwright.stop()
+            except Exception:
+                pass
+            self.playwright = None
+            self.ensure_browser()
+        if account:
+            self.poster = self.get_poster(account)
+        self.restarts += 1
+        self.browser_recovered.emit(reason)
+
+    def execute(self, job):
+        """在本线程中执行任务，浏览器失效导致失败时恢复后重放一次"""
+        self.check_health()
+        error = None
+        while True:
+            job.attempts += 1
+            try:
+                self._execute(job)
+                return
+            except Exception as e:
+                error = e
+            # 只有浏览器或页面失效时才重放，避免重复提交普通错误
+            if job.attempts > 1 or self.check_health():
+                break
+            print(f"浏览器已恢复，重新执行任务 {job.type}")
+        if self.poster:
+            self.report_timings(job.type, self.poster.waiter.timings)
+            if self.poster.tracer.last_trace:
+                error = f"{error}\n已保存 trace: {self.poster.tracer.last_trace}"
+        self.fail_job(job, error)
+
+    def fail_job(self, job, error):
+        """结束失败的任务，通知界面恢复按钮状态"""
+        self.action_queue.finish(job, str(error))
+        if job.type == 'login':
+            self.login_error.emit(str(error))
+        elif job.type == 'preview':
+            self.preview_error.emit(str(error))
+        elif job.type == 'batch':
+            self.batch_finished.emit({'error': str(error)})
+
+    def _execute(self, job):
+        action = job.payload
+        if job.type == 'login':
+            self.poster = self.get_poster(action['phone'])
+            self.poster.login(action['phone'])
+            self.action_queue.finish(job)
+            self.report_timings('login', self.poster.waiter.timings)
+            self.login_success.emit(self.poster)
+            # 登录后预热发布页
+            self.publish_page_status.emit(
+                self.poster.prefetch_publish_page())
+        elif job.type == 'preview' and self.poster:
+            self.poster.post_article(
+                action['title'],
+                action['content'],
+                action['images']
+            )
+            self.action_queue.finish(job)
+            self.report_timings('preview', self.poster.waiter.timings)
+            self.preview_success.emit()
+            # 用户检查当前文章时预先打开下一个发布页
+            self.publish_page_status.emit(
+                self.poster.prefetch_publish_page())
+        elif job.type == 'batch' and self.poster:
+            # drafts 为 JSONL 文件路径或草稿列表；未明确要求发布时只填写，且只能有一篇草稿
+            report = self.poster.post_batch(
+                action['drafts'],
+                publish=action.get('publish', False),
+                on_progress=self._on_batch_progress
+            )
+            self.action_queue.finish(job)
+            self.batch_finished.emit(report)
+        else:
+            self.action_queue.finish(job, "未登录")
+
+    def _on_batch_progress(self, entry):
+        self.report_timings('batch', entry['spans'])
+        self.batch_progress.emit(entry)
+
+    def report_timings(self, flow, spans):
+        """记录一次流程的各步骤耗时，更新滚动统计并通知界面"""
+        if not spans:
+            return
+        spans = list(spans)
+        self.timing_stats.add_spans(spans)
+        logging.info(f"{flow} 步骤耗时: {json.dumps(spans, ensure_ascii=False)}")
+        self.step_timings.emit(flow, spans)
+        self.timing_summary.emit(self.timing_stats.summary())
+
+    def close_poster(self):
+        """关闭当前账号的浏览器；异步引擎的 poster 由引擎在它的事件循环中关闭"""
+        try:
+            if self.async_engine:
+                self.async_engine.close()
+                self.async_engine = None
+            elif self.poster:
+                self.poster.close(force=True)
+        except Exception as e:
+            logging.debug(f"关闭浏览器时出错: {str(e)}")
+
+    def shutdown(self):
+        """保存所有账号状态并关闭共享浏览器"""
+        try:
+            if self.async_engine:
+                self.async_engine.close()
+            if self.context_pool:
+                self.context_pool.close()
+            if self.browser:
+                self.browser.close()
+            if self.playwright:
+                self.playwright.stop()
+        except Exception as e:
+            logging.debug(f"关闭浏览器时出错: {str(e)}")
+        self.async_engine = None
+        self.context_pool = None
+        self.browser = None
+        self.playwright = None
+        self.posters = {}
+        self.poster = None
 
     def stop(self):
         self.is_running = False
-        if self.poster:
-            self.poster.close(force=True)
+        # 唤醒阻塞在队列上的线程
+        self.action_queue.close()
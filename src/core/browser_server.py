@@ -0,0 +1,115 @@
+# 常驻的本地浏览器，应用和 XiaohongshuPoster 通过 CDP 连接，不必每次冷启动 Chromium
+#
+# 用法: python -m src.core.browser_server [--port 9222] [--headless]
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+from playwright.sync_api import sync_playwright
+
+# 浏览器服务的地址写在这个文件里，配置 endpoint 为 auto 时读取
+ENDPOINT_FILE = os.path.join(os.path.expanduser('~'), '.xhs_system', 'browser_endpoint.json')
+
+
+def is_cdp_alive(endpoint, timeout=0.5):
+    """检查 CDP 地址是否可以连接"""
+    try:
+        with urllib.request.urlopen(endpoint.rstrip('/') + '/json/version', timeout=timeout) as response:
+            return response.status == 200
+    except Exception:
+        return False
+
+
+def resolve_endpoint(endpoint):
+    """解析浏览器地址
+
+    Args:
+        endpoint: 为空时不连接；auto 时读取本地浏览器服务写入的地址；
+                  也可以直接填写 ws:// (Playwright 浏览器服务) 或 http:// (CDP) 地址
+    Returns:
+        可以连接的地址，没有时返回 None
+    """
+    if not endpoint:
+        return None
+    if endpoint != 'auto':
+        return endpoint
+    if not os.path.exists(ENDPOINT_FILE):
+        return None
+    try:
+        with open(ENDPOINT_FILE, 'r', encoding='utf-8') as f:
+            endpoint = json.load(f).get('endpoint')
+    except Exception as e:
+        logging.debug(f"读取浏览器地址失败: {str(e)}")
+        return None
+    if endpoint and is_cdp_alive(endpoint):
+        return endpoint
+    return None
+
+
+def get_chromium_executable():
+    """获取 Chromium 路径，打包后使用内置的浏览器"""
+    from src.core.write_xiaohongshu import get_launch_args
+    executable_path = get_launch_args().get('executable_path')
+    if executable_path:
+        return executable_path
+    with sync_playwright() as playwright:
+        return playwright.chromium.executable_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动常驻的本地浏览器")
+    parser.add_argument('--port', type=int, default=9222, help="CDP 端口")
+    parser.add_argument('--headless', action='store_true', help="无界面模式")
+    args = parser.parse_args()
+
+    endpoint = f"http://127.0.0.1:{args.port}"
+    if is_cdp_alive(endpoint):
+        print(f"浏览器已在运行: {endpoint}")
+        return
+
+    profile_dir = os.path.join(os.path.dirname(ENDPOINT_FILE), 'browser_server_profile')
+    if not os.path.exists(profile_dir):
+        os.makedirs(profile_dir)
+    command = [
+        get_chromium_executable(),
+        f'--remote-debugging-port={args.port}',
+        f'--user-data-dir={profile_dir}',
+        '--no-first-run',
+        '--no-default-browser-check',
+        '--disable-dev-shm-usage',
+        '--disable-extensions',
+        '--disable-infobars',
+    ]
+    if args.headless:
+        command.append('--headless=new')
+    process = subprocess.Popen(command)
+
+    # 等待 CDP 端口可用
+    deadline = time.monotonic() + 30
+    while not is_cdp_alive(endpoint):
+        if process.poll() is not None or time.monotonic() > deadline:
+            print("浏览器启动失败")
+            process.kill()
+            sys.exit(1)
+        time.sleep(0.2)
+
+    with open(ENDPOINT_FILE, 'w', encoding='utf-8') as f:
+        json.dump({'endpoint': endpoint, 'pid': process.pid}, f)
+    print(f"浏览器已启动: {endpoint}")
+
+    try:
+        process.wait()
+    except KeyboardInterrupt:
+        process.terminate()
+    finally:
+        if os.path.exists(ENDPOINT_FILE):
+            os.remove(ENDPOINT_FILE)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import logging
+from collections import OrderedDict
+
+from src.core.network import RequestRouter
+from src.core.session_store import SessionStore, get_account_dir
+
+
+class BrowserContextPool:
+    """多账号浏览器上下文池
+
+    一个 Chromium 进程内为每个账号维护一个独立的 BrowserContext，
+    上下文直接从账号的 SessionStore 创建，淘汰和关闭时写回。
+    超过上限时按最近最少使用(LRU)淘汰空闲账号，淘汰前先保存存储状态。
+    """
+
+    def __init__(self, browser, max_contexts=8, context_options=None, init_scripts=None,
+                 network_profile=None, asset_cache=None):
+        self.browser = browser
+        self.max_contexts = max(1, int(max_contexts))
+        self.context_options = context_options or {}
+        self.init_scripts = list(init_scripts or [])
+        self.network_profile = network_profile or {}
+        self.asset_cache = asset_cache  # 所有账号共享的静态资源缓存
+        self.contexts = OrderedDict()  # 账号 -> BrowserContext，末尾为最近使用
+        self.busy = {}                 # 账号 -> 正在使用的次数
+        self.stores = {}               # 账号 -> SessionStore
+        self.routers = {}              # 账号 -> RequestRouter
+        self.created = 0
+        self.evictions = 0
+
+    def account_dir(self, account):
+        """账号数据目录"""
+        return get_account_dir(account)
+
+    def session_store(self, account):
+        """账号的会话存储"""
+        store = self.stores.get(account)
+        if store is None:
+            store = SessionStore(account)
+            self.stores[account] = store
+        return store
+
+    def acquire(self, account):
+        """取得账号的上下文，不存在时创建，并标记为使用中"""
+        context = self.contexts.get(account)
+        if context is None:
+            context = self._create(account)
+            self.contexts[account] = context
+        self.contexts.move_to_end(account)
+        self.busy[account] = self.busy.get(account, 0) + 1
+        self._evict_idle()
+        return context
+
+    def release(self, account):
+        """标记账号空闲，空闲账号可以被淘汰"""
+        if self.busy.get(account, 0) > 1:
+            self.busy[account] -= 1
+        else:
+            self.busy.pop(account, None)
+        self._evict_idle()
+
+    def _create(self, account):
+        options = dict(self.context_options)
+        state = self.session_store(account).load()
+        if state:
+            options['storage_state'] = state
+        context = self.browser.new_context(**options)
+        for script in self.init_scripts:
+            context.add_init_script(script)
+        router = RequestRouter(self.network_profile, self.asset_cache)
+        router.attach(context)
+        self.routers[account] = router
+        self.created += 1
+        logging.debug(f"为账号 {account} 创建浏览器上下文")
+        return context
+
+    def save_state(self, account):
+        """保存账号的存储状态(cookies 和 localStorage)，没有变化时不写盘"""
+        context = self.contexts.get(account)
+        if context is None:
+            return False
+        return self.session_store(account).save_context(context)
+
+    def evict(self, account):
+        """保存状态后关闭账号的上下文"""
+        context = self.contexts.get(account)
+        if context is None:
+            return
+        self.save_state(account)
+        del self.contexts[account]
+        self.busy.pop(account, None)
+        router = self.routers.pop(account, None)
+        if router is not None and router.enabled:
+            logging.debug(f"账号 {account} 网络拦截: {router.summary()}")
+        if self.asset_cache:
+            self.asset_cache.save_index()
+        try:
+            context.close()
+        except Exception as e:
+            logging.debug(f"关闭账号 {account} 上下文失败: {str(e)}")
+        self.evictions += 1
+        logging.debug(f"淘汰空闲账号 {account} 的浏览器上下文")
+
+    def _evict_idle(self):
+        while len(self.contexts) > self.max_contexts:
+            idle = [account for account in self.contexts if account not in self.busy]
+            if not idle:
+                break
+            # OrderedDict 头部是最久未使用的账号
+            self.evict(idle[0])
+
+    def is_alive(self, account):
+        """账号上下文是否仍在池中"""
+        return account in self.contexts
+
+    def stats(self):
+        """返回池的状态"""
+        return {
+            'size': len(self.contexts),
+            'max_contexts': self.max_contexts,
+            'accounts': list(self.contexts.keys()),
+            'busy': list(self.busy.keys()),
+            'created': self.created,
+            'evictions': self.evictions,
+            'network': {account: router.stats() for account, router in self.routers.items()},
+            'asset_cache': self.asset_cache.stats() if self.asset_cache else {},
+        }
+
+    def close(self):
+        """保存所有账号状态并关闭上下文"""
+        for account in list(self.contexts.keys()):
+            self.evict(account)
+        if self.asset_cache:
+            logging.debug(f"静态资源缓存: {self.asset_cache.stats()}")
+            self.asset_cache.save_index()
@@ -0,0 +1,157 @@
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+# 所有请求默认带上的请求头
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+}
+
+# 下载小红书图片、视频时需要的请求头
+XHS_HEADERS = {
+    'Referer': 'https://www.xiaohongshu.com/',
+}
+
+# 默认超时(秒): (连接, 读取)
+DEFAULT_TIMEOUT = (5, 30)
+
+
+class HttpClient:
+    """所有网络请求共享的HTTP客户端
+
+    基于 requests.Session，按主机保持 keep-alive 连接池，每个主机最多
+    max_per_host 个并发连接(超出时等待空闲连接)。默认带超时，
+    连接失败和 429/5xx 的幂等请求按指数退避重试。
+    统计新建连接数和复用连接数。
+    """
+
+    def __init__(self, max_hosts=10, max_per_host=6, retries=3, backoff=0.5, timeout=DEFAULT_TIMEOUT):
+        self.timeout = timeout
+        self.max_hosts = max_hosts
+        self.max_per_host = max_per_host
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self.by_host = {}  # 主机 -> {'requests', 'connections', 'reused'}
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET', 'HEAD', 'OPTIONS']),
+            raise_on_status=False,
+        )
+        adapter = _CountingAdapter(self, pool_connections=max_hosts, pool_maxsize=max_per_host,
+                                   pool_block=True, max_retries=retry)
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def disable_retries(self, prefix, max_per_host=None):
+        """以 prefix 开头的地址不在连接层重试，由调用方自己控制重试，避免两层重试叠加
+
+        Args:
+            max_per_host: 该地址的并发连接上限，默认与其他主机相同
+        """
+        adapter = _CountingAdapter(self, pool_connections=self.max_hosts,
+                                   pool_maxsize=max_per_host or self.max_per_host,
+                                   pool_block=True, max_retries=0)
+        self.session.mount(prefix, adapter)
+
+    def _host_stats(self, host):
+        return self.by_host.setdefault(host, {'requests': 0, 'connections': 0, 'reused': 0})
+
+    def _on_checkout(self, host, conn):
+        # 取出的连接已有socket时直接复用；新建的、或已断开被关闭的连接发送请求前要重新连接
+        reused = getattr(conn, 'sock', None) is not None
+        with self.lock:
+            if reused:
+                self.connections_reused += 1
+                self._host_stats(host)['reused'] += 1
+            else:
+                self.connections_opened += 1
+                self._host_stats(host)['connections'] += 1
+
+    def request(self, method, url, **kwargs):
+        """发送请求，参数与 requests.request 相同，未指定 timeout 时使用默认超时"""
+        kwargs.setdefault('timeout', self.timeout)
+        host = requests.utils.urlparse(url).hostname or ''
+        with self.lock:
+            self.requests += 1
+            self._host_stats(host)['requests'] += 1
+        try:
+            return self.session.request(method, url, **kwargs)
+        except requests.RequestException as e:
+            with self.lock:
+                self.errors += 1
+            logging.debug(f"请求失败 {method} {url}: {str(e)}")
+            raise
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def stats(self):
+        """返回请求数、新建和复用的连接数"""
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'errors': self.errors,
+                'connections_opened': self.connections_opened,
+                'connections_reused': self.connections_reused,
+                'by_host': {host: dict(stats) for host, stats in self.by_host.items()},
+            }
+
+    def close(self):
+        self.session.close()
+
+
+class _CountingAdapter(HTTPAdapter):
+    """从连接池取出连接时通知 HttpClient 统计新建和复用的连接"""
+
+    def __init__(self, client, **kwargs):
+        self.client = client
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        client = self.client
+
+        class CountingHTTPConnectionPool(HTTPConnectionPool):
+            def _get_conn(self, timeout=None):
+                conn = super()._get_conn(timeout)
+                client._on_checkout(self.host, conn)
+                return conn
+
+        class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+            def _get_conn(self, timeout=None):
+                conn = super()._get_conn(timeout)
+                client._on_checkout(self.host, conn)
+                return conn
+
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': CountingHTTPConnectionPool,
+            'https': CountingHTTPSConnectionPool,
+        }
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_http_client():
+    """所有模块共享的HTTP客户端"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
@@ -0,0 +1,181 @@
+import heapq
+import itertools
+import threading
+import time
+import uuid
+
+# 任务状态
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+EXPIRED = 'expired'
+
+# 任务优先级，数值越小越先执行
+PRIORITIES = {
+    'login': 0,
+    'preview': 10,
+    'batch': 20,
+}
+DEFAULT_PRIORITY = 50
+
+
+class Job:
+    """浏览器线程中执行的一个任务"""
+
+    def __init__(self, job_type, payload=None, priority=None, timeout=None, key=None):
+        """
+        Args:
+            job_type: 任务类型，如 login/preview
+            payload: 任务参数
+            priority: 优先级，为空时按任务类型取默认值
+            timeout: 排队超时(秒)，超过后任务不再执行
+            key: 去重键，相同键的任务在排队或执行时不会重复加入
+        """
+        self.id = uuid.uuid4().hex[:8]
+        self.type = job_type
+        self.payload = payload or {}
+        self.priority = PRIORITIES.get(job_type, DEFAULT_PRIORITY) if priority is None else priority
+        self.timeout = timeout
+        self.key = key
+        self.state = PENDING
+        self.error = None
+        self.attempts = 0  # 执行次数，浏览器恢复后重放时增加
+        self.created_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+
+    def is_expired(self, now=None):
+        if self.timeout is None:
+            return False
+        return (now or time.monotonic()) - self.created_at > self.timeout
+
+    def __repr__(self):
+        return f"Job({self.id}, {self.type}, {self.state})"
+
+
+class JobQueue:
+    """线程安全的优先级任务队列
+
+    get() 阻塞等待，有任务加入时立即唤醒，不需要轮询。
+    支持按键去重、排队超时和取消，状态变化通过 on_state_changed(job) 回调通知。
+    """
+
+    def __init__(self, on_state_changed=None):
+        self.on_state_changed = on_state_changed
+        self._heap = []
+        self._counter = itertools.count()  # 同优先级按加入顺序执行
+        self._cond = threading.Condition()
+        self._jobs = {}  # 任务ID -> 排队或执行中的任务
+        self._keys = {}  # 去重键 -> 任务ID
+        self._closed = False
+
+    def _notify(self, jobs):
+        # 在锁外回调，避免回调中再操作队列导致死锁
+        if self.on_state_changed:
+            for job in jobs:
+                self.on_state_changed(job)
+
+    def _set_state(self, job, state, changed):
+        job.state = state
+        if state in (DONE, FAILED, CANCELLED, EXPIRED):
+            job.finished_at = time.monotonic()
+            self._jobs.pop(job.id, None)
+            if job.key is not None and self._keys.get(job.key) == job.id:
+                del self._keys[job.key]
+        changed.append(job)
+
+    def put(self, job):
+        """加入任务，存在相同去重键的任务时返回已有任务"""
+        changed = []
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("任务队列已关闭")
+            if job.key is not None and job.key in self._keys:
+                return self._jobs[self._keys[job.key]]
+            self._jobs[job.id] = job
+            if job.key is not None:
+                self._keys[job.key] = job.id
+            heapq.heappush(self._heap, (job.priority, next(self._counter), job))
+            changed.append(job)
+            self._cond.notify()
+        self._notify(changed)
+        return job
+
+    def get(self, timeout=None):
+        """取出优先级最高的任务，队列为空时阻塞
+
+        Args:
+            timeout: 最长等待秒数，为空时一直等待
+        Returns:
+            任务；超时或队列关闭时返回 None
+        """
+        changed = []
+        job = None
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not self._closed:
+                now = time.monotonic()
+                while self._heap:
+                    _, _, candidate = heapq.heappop(self._heap)
+                    if candidate.state != PENDING:
+                        continue  # 已取消的任务
+                    if candidate.is_expired(now):
+                        self._set_state(candidate, EXPIRED, changed)
+                        continue
+                    job = candidate
+                    break
+                if job is not None:
+                    job.started_at = now
+                    self._set_state(job, RUNNING, changed)
+                    break
+                if deadline is None:
+                    self._cond.wait()
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+        self._notify(changed)
+        return job
+
+    def finish(self, job, error=None):
+        """标记任务完成或失败"""
+        changed = []
+        with self._cond:
+            job.error = error
+            self._set_state(job, FAILED if error else DONE, changed)
+        self._notify(changed)
+
+    def cancel(self, job_id):
+        """取消排队中的任务，执行中的任务无法取消"""
+        changed = []
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.state != PENDING:
+                return False
+            self._set_state(job, CANCELLED, changed)
+        self._notify(changed)
+        return True
+
+    def cancel_type(self, job_type):
+        """取消某一类型的所有排队任务"""
+        with self._cond:
+            job_ids = [job.id for job in self._jobs.values()
+                       if job.type == job_type and job.state == PENDING]
+        return sum(1 for job_id in job_ids if self.cancel(job_id))
+
+    def pending(self):
+        """返回排队中的任务，按执行顺序排列"""
+        with self._cond:
+            return [job for _, _, job in sorted(self._heap) if job.state == PENDING]
+
+    def __len__(self):
+        return len(self.pending())
+
+    def close(self):
+        """关闭队列，唤醒所有等待的线程"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
@@ -0,0 +1,161 @@
+import logging
+import re
+
+# 埋点、监控等发文不需要的请求，返回空响应避免页面报错
+ANALYTICS_PATTERNS = [
+    r'//apm-fe\.xiaohongshu\.com/',
+    r'//apm-track\.xiaohongshu\.com/',
+    r'//t2\.xiaohongshu\.com/',
+    r'//lng\.xiaohongshu\.com/',
+    r'//spltest\.xiaohongshu\.com/',
+    r'//hm\.baidu\.com/',
+    r'google-analytics\.com/',
+]
+
+# 拦截配置
+#   block_resource_types: 直接中断的资源类型
+#   block_url_patterns: 直接中断的URL(正则)
+#   stub_url_patterns: 返回 204 空响应的URL(正则)
+#   throttle: 限速 {'download_kbps', 'upload_kbps', 'latency_ms'}，为空不限速
+NETWORK_PROFILES = {
+    'off': {},
+    'light': {
+        'block_resource_types': ['media', 'font'],
+        'stub_url_patterns': ANALYTICS_PATTERNS,
+    },
+    'aggressive': {
+        'block_resource_types': ['media', 'font', 'image'],
+        'stub_url_patterns': ANALYTICS_PATTERNS,
+    },
+}
+
+# 被拦截请求的典型大小(字节)，用于估算节省的流量
+TYPICAL_SIZES = {
+    'image': 60 * 1024,
+    'media': 512 * 1024,
+    'font': 80 * 1024,
+    'script': 20 * 1024,
+    'stylesheet': 10 * 1024,
+    'xhr': 1024,
+    'fetch': 1024,
+    'ping': 512,
+}
+DEFAULT_SIZE = 2 * 1024
+
+
+def build_profile(name='light', rules=None):
+    """按名称取拦截配置，rules 中的字段覆盖或补充默认值"""
+    profile = dict(NETWORK_PROFILES.get(name, NETWORK_PROFILES['light']))
+    if rules:
+        profile.update(rules)
+    return profile
+
+
+class RequestRouter:
+    """浏览器上下文的请求路由
+
+    按配置拦截或替换发文不需要的资源，并统计本次会话节省的请求数和流量；
+    放行的静态资源交给 asset_cache 从本地缓存返回。
+    每个上下文使用一个独立的实例，asset_cache 可以在多个上下文间共享。
+    """
+
+    def __init__(self, profile=None, asset_cache=None):
+        profile = profile or {}
+        self.asset_cache = asset_cache
+        self.block_types = set(profile.get('block_resource_types', []))
+        self.block_patterns = [re.compile(p) for p in profile.get('block_url_patterns', [])]
+        self.stub_patterns = [re.compile(p) for p in profile.get('stub_url_patterns', [])]
+        self.throttle = profile.get('throttle') or None
+        self.enabled = bool(self.block_types or self.block_patterns or self.stub_patterns
+                            or self.asset_cache)
+        self.context = None
+        self.blocked = 0
+        self.stubbed = 0
+        self.passed = 0
+        self.bytes_saved = 0
+        self.by_type = {}  # 资源类型 -> 节省的请求数
+
+    def attach(self, context):
+        """挂载到浏览器上下文"""
+        self.context = context
+        if self.enabled:
+            context.route("**/*", self._handle)
+        if self.throttle:
+            for page in context.pages:
+                self._apply_throttle(page)
+            context.on('page', self._apply_throttle)
+
+    def _match(self, patterns, url):
+        return any(pattern.search(url) for pattern in patterns)
+
+    def _record(self, request):
+        resource_type = request.resource_type
+        self.bytes_saved += TYPICAL_SIZES.get(resource_type, DEFAULT_SIZE)
+        self.by_type[resource_type] = self.by_type.get(resource_type, 0) + 1
+
+    def decide(self, request):
+        """返回请求的处理方式: stub / block / cache / continue"""
+        url = request.url
+        if self._match(self.stub_patterns, url):
+            return 'stub'
+        if request.resource_type in self.block_types or self._match(self.block_patterns, url):
+            return 'block'
+        if self.asset_cache is not None and self.asset_cache.handles(request):
+            return 'cache'
+        return 'continue'
+
+    def _handle(self, route):
+        request = route.request
+        action = self.decide(request)
+        try:
+            if action == 'stub':
+                self.stubbed += 1
+                self._record(request)
+                route.fulfill(status=204, body='')
+            elif action == 'block':
+                self.blocked += 1
+                self._record(request)
+                route.abort('blockedbyclient')
+            elif action == 'cache':
+                self.asset_cache.handle(route)
+            else:
+                self.passed += 1
+                route.continue_()
+        except Exception as e:
+            # 页面关闭时路由可能已失效
+            logging.debug(f"处理请求路由失败: {str(e)}")
+
+    def _throughput(self, key):
+        # CDP 使用字节/秒，-1 表示不限速
+        kbps = self.throttle.get(key)
+        return kbps * 1024 / 8 if kbps else -1
+
+    def _apply_throttle(self, page):
+        """通过 CDP 给页面限速"""
+        try:
+            cdp = self.context.new_cdp_session(page)
+            cdp.send('Network.enable')
+            cdp.send('Network.emulateNetworkConditions', {
+                'offline': False,
+                'latency': self.throttle.get('latency_ms', 0),
+                'downloadThroughput': self._throughput('download_kbps'),
+                'uploadThroughput': self._throughput('upload_kbps'),
+            })
+        except Exception as e:
+            logging.debug(f"设置页面限速失败: {str(e)}")
+
+    def stats(self):
+        """返回本次会话的拦截统计"""
+        return {
+            'blocked': self.blocked,
+            'stubbed': self.stubbed,
+            'passed': self.passed,
+            'saved_requests': self.blocked + self.stubbed,
+            'saved_bytes': self.bytes_saved,
+            'by_type': dict(self.by_type),
+        }
+
+    def summary(self):
+        """返回统计摘要文本"""
+        return (f"拦截 {self.blocked} 个请求，替换 {self.stubbed} 个埋点请求，"
+                f"约节省 {self.bytes_saved / 1024:.0f}KB")
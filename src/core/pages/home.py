@@ -1,13 +1,17 @@
+import logging
 import sys
 
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QColor, QPixmap
-from PyQt6.QtWidgets import (QFrame, QHBoxLayout, QLabel, QLineEdit,
-                             QPushButton, QTextEdit, QVBoxLayout, QWidget)
+from PyQt6.QtWidgets import (QFileDialog, QFrame, QHBoxLayout, QLabel,
+                             QLineEdit, QPushButton, QTextEdit, QVBoxLayout,
+                             QWidget)
 
 from src.core.alert import TipWindow
+from src.core.processor.batch_content import BatchContentThread, load_topics
 from src.core.processor.content import ContentGeneratorThread
-from src.core.processor.img import ImageProcessorThread
+from src.core.processor.img import ImagePrefetcher, ImageProcessorThread
+from src.core.processor.workflow import CLOSED, HALF_OPEN, get_workflow_client
 
 class HomePage(QWidget):
     """主页类"""
@@ -20,6 +24,8 @@ class HomePage(QWidget):
         self.images = []
         self.image_list = []
         self.current_image_index = 0
+        self.streamed_fields = set()  # 本次流式生成已收到的字段
+        self.generation_timings = []
         # 创建占位图
         self.placeholder_photo = QPixmap(200, 200)
         self.placeholder_photo.fill(QColor('#f8f9fa'))
@@ -270,10 +276,32 @@ class HomePage(QWidget):
 
         # 将生成按钮保存为类属性
         self.generate_btn = QPushButton("✨ 生成内容")
-        self.generate_btn.clicked.connect(self.generate_content)
+        self.generate_btn.clicked.connect(lambda: self.generate_content())
         button_layout.addWidget(self.generate_btn)
 
+        # 相同输入默认返回缓存的结果，重新生成时跳过缓存
+        self.regenerate_btn = QPushButton("🔄 重新生成")
+        self.regenerate_btn.clicked.connect(lambda: self.generate_content(force_refresh=True))
+        button_layout.addWidget(self.regenerate_btn)
+
+        # 从主题文件批量生成草稿
+        self.batch_generate_btn = QPushButton("📚 批量生成")
+        self.batch_generate_btn.clicked.connect(self.batch_generate)
+        button_layout.addWidget(self.batch_generate_btn)
+
         input_container_layout.addLayout(button_layout)
+
+        self.batch_label = QLabel("")
+        self.batch_label.setStyleSheet("color: #666; font-size: 12px;")
+        input_container_layout.addWidget(self.batch_label)
+
+        # 工作流服务状态和耗时，定时刷新
+        self.workflow_label = QLabel("")
+        self.workflow_label.setStyleSheet("color: #666; font-size: 12px;")
+        input_container_layout.addWidget(self.workflow_label)
+        self.workflow_timer = QTimer(self)
+        self.workflow_timer.timeout.connect(self.update_workflow_status)
+        self.workflow_timer.start(2000)
         input_layout.addWidget(input_container)
 
         # 添加到主布局
@@ -406,6 +434,15 @@ class HomePage(QWidget):
         preview_layout.addWidget(
             preview_btn, alignment=Qt.AlignmentFlag.AlignCenter)
 
+        # 登录和发布各步骤的耗时统计
+        self.timing_label = QLabel("")
+        self.timing_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.timing_label.setStyleSheet("""
+            color: #7f8c8d;
+            font-size: 9pt;
+        """)
+        preview_layout.addWidget(self.timing_label)
+
         # 初始化时禁用按钮
         self.prev_btn.setEnabled(False)
         self.next_btn.setEnabled(False)
@@ -424,10 +461,7 @@ class HomePage(QWidget):
             self.parent.update_login_button("⏳ 登录中...", False)
 
             # 添加登录任务到浏览器线程
-            self.parent.browser_thread.action_queue.append({
-                'type': 'login',
-                'phone': phone
-            })
+            self.parent.browser_thread.submit('login', phone=phone)
 
         except Exception as e:
             TipWindow(self.parent, f"❌ 登录失败: {str(e)}").show()
@@ -442,50 +476,180 @@ class HomePage(QWidget):
         self.parent.poster = poster
         # 更新登录按钮状态
         self.parent.update_login_button("✅ 已登录", False)
+        # 异步引擎只支持部分功能，在登录按钮提示中说明
+        unsupported = getattr(poster, 'unsupported_features', ())
+        login_btn = self.parent.findChild(QPushButton, "login_btn")
+        if unsupported and login_btn:
+            login_btn.setToolTip(f"异步引擎，以下功能不生效: {'、'.join(unsupported)}")
         TipWindow(self.parent, "✅ 登录成功").show()
 
-    def generate_content(self):
+    def generate_content(self, force_refresh=False):
         try:
             input_text = self.input_text.toPlainText().strip()
             if not input_text:
                 TipWindow(self.parent, "❌ 请输入内容").show()
                 return
 
-            # 创建并启动生成线程
+            # 上一次生成还没结束时不再启动新的线程，避免替换仍在运行的线程
+            thread = getattr(self.parent, 'generator_thread', None)
+            if thread is not None and thread.isRunning():
+                return
+
+            # 创建并启动生成线程，图片地址出现后立即开始下载
+            self.streamed_fields = set()
             self.parent.generator_thread = ContentGeneratorThread(
                 input_text,
                 self.header_input.text(),
                 self.author_input.text(),
-                self.generate_btn  # 传递按钮引用
+                self.generate_btn,  # 传递按钮引用
+                force_refresh=force_refresh,
+                stream=self.parent.config.get_workflow_config()['stream'],
+                prefetcher=ImagePrefetcher()  # 每个生成线程使用自己的预取器
             )
+            self.parent.generator_thread.delta.connect(
+                self.handle_generation_delta)
             self.parent.generator_thread.finished.connect(
                 self.handle_generation_result)
             self.parent.generator_thread.error.connect(
                 self.handle_generation_error)
+            self.regenerate_btn.setEnabled(False)
             self.parent.generator_thread.start()
 
         except Exception as e:
             self.generate_btn.setText("✨ 生成内容")  # 恢复按钮文字
             self.generate_btn.setEnabled(True)  # 恢复按钮可点击状态
+            self.regenerate_btn.setEnabled(True)
             TipWindow(self.parent, f"❌ 生成内容失败: {str(e)}").show()
 
+    def batch_generate(self):
+        """选择主题文件(每行一个主题)批量生成，再次点击停止"""
+        thread = getattr(self.parent, 'batch_generator_thread', None)
+        if thread and thread.isRunning():
+            thread.stop()
+            self.batch_generate_btn.setText("⏳ 正在停止...")
+            self.batch_generate_btn.setEnabled(False)
+            return
+        try:
+            path, _ = QFileDialog.getOpenFileName(
+                self, "选择主题文件", "", "文本文件 (*.txt);;所有文件 (*)")
+            if not path:
+                return
+            topics = list(load_topics(path))
+            if not topics:
+                TipWindow(self.parent, "❌ 主题文件为空").show()
+                return
+
+            self.batch_total = len(topics)
+            self.batch_done = 0
+            self.batch_failed = 0
+            concurrency = self.parent.config.get_workflow_config()['concurrency']
+            self.parent.batch_generator_thread = BatchContentThread(
+                topics,
+                self.header_input.text(),
+                self.author_input.text(),
+                concurrency=concurrency
+            )
+            self.parent.batch_generator_thread.progress.connect(
+                self.handle_batch_generate_progress)
+            self.parent.batch_generator_thread.finished.connect(
+                self.handle_batch_generate_finished)
+            self.parent.batch_generator_thread.error.connect(
+                self.handle_batch_generate_error)
+            self.parent.batch_generator_thread.start()
+            self.batch_generate_btn.setText("⏹ 停止批量")
+            self.batch_label.setText(f"批量生成 0/{self.batch_total}")
+        except Exception as e:
+            TipWindow(self.parent, f"❌ 批量生成失败: {str(e)}").show()
+
+    def handle_batch_generate_progress(self, entry):
+        self.batch_done += 1
+        if entry['error']:
+            self.batch_failed += 1
+        text = f"批量生成 {self.batch_done}/{self.batch_total}"
+        if self.batch_failed:
+            text += f"，失败 {self.batch_failed}"
+        if entry['draft']:
+            text += f" | 最新: {entry['draft']['title']}"
+        self.batch_label.setText(text)
+
+    def handle_batch_generate_finished(self, summary):
+        self.batch_generate_btn.setText("📚 批量生成")
+        self.batch_generate_btn.setEnabled(True)
+        self.batch_label.setText(
+            f"批量生成{'中止' if summary['unavailable'] else '完成'}: 成功 {summary['succeeded']} 篇，"
+            f"失败 {len(summary['failed'])} 篇，{summary['per_minute']:.1f} 篇/分钟" +
+            (f"，{len(summary['image_failed'])} 篇图片下载失败" if summary['image_failed'] else ""))
+        self.batch_label.setToolTip(f"草稿文件: {summary['output_path']}")
+        TipWindow(self.parent, f"✅ 草稿已保存到 {summary['output_path']}").show()
+
+    def handle_batch_generate_error(self, error_msg):
+        self.batch_generate_btn.setText("📚 批量生成")
+        self.batch_generate_btn.setEnabled(True)
+        TipWindow(self.parent, f"❌ 批量生成失败: {error_msg}").show()
+
+    def update_workflow_status(self):
+        """显示工作流熔断器状态和最近的 p50/p95 耗时，耗时分布放在提示中"""
+        stats = get_workflow_client().stats()
+        breaker = stats['breaker']
+        latency = stats['latency']
+        if breaker['state'] == CLOSED:
+            text = "工作流: 正常"
+        elif breaker['state'] == HALF_OPEN:
+            text = "工作流: 探测恢复中"
+        else:
+            text = f"工作流: 不可用，{breaker['retry_in']:.0f}秒后重试"
+        if latency['count']:
+            text += f" | p50 {latency['p50']:.1f}s / p95 {latency['p95']:.1f}s"
+        self.workflow_label.setText(text)
+        self.workflow_label.setToolTip("\n".join(
+            [f"请求 {stats['calls']} 次，重试 {stats['retried']} 次，合并省下 {stats['saved_by_coalescing']} 次，"
+             f"缓存命中率 {stats['cache']['hit_rate']:.0%}",
+             f"连续失败 {breaker['failures']} 次，熔断拒绝 {breaker['rejected']} 次",
+             "耗时分布:"] +
+            [f"  {label}: {count}" for label, count in latency['buckets'] if count]))
+
+    def handle_generation_delta(self, field, text):
+        """流式生成时把增量文本追加到标题和正文，每个字段第一次收到时先清空"""
+        if field == 'title':
+            if field not in self.streamed_fields:
+                self.title_input.clear()
+            self.title_input.setText(self.title_input.text() + text)
+        elif field == 'content':
+            if field not in self.streamed_fields:
+                self.subtitle_input.clear()
+            cursor = self.subtitle_input.textCursor()
+            cursor.movePosition(cursor.MoveOperation.End)
+            cursor.insertText(text)
+        self.streamed_fields.add(field)
+
     def handle_generation_result(self, result):
+        self.regenerate_btn.setEnabled(True)
+        self.generation_timings = result.get('timings', [])
         self.update_ui_after_generate(
             result['title'],
             result['content'],
             result['cover_image'],
             result['content_images'],
-            result['input_text']
+            result['input_text'],
+            prefetcher=self.sender().prefetcher
         )
 
     def handle_generation_error(self, error_msg):
+        self.regenerate_btn.setEnabled(True)
+        # 只关闭发出错误的线程自己的预取器
+        prefetcher = self.sender().prefetcher
+        if prefetcher:
+            prefetcher.shutdown()
         TipWindow(self.parent, f"❌ 生成内容失败: {error_msg}").show()
 
-    def update_ui_after_generate(self, title, content, cover_image_url, content_image_urls, input_text):
+    def update_ui_after_generate(self, title, content, cover_image_url, content_image_urls, input_text,
+                                 prefetcher=None):
         try:
-            # 创建并启动图片处理线程
+            # 创建并启动图片处理线程，接着使用生成过程中已开始下载的预取器
             self.parent.image_processor = ImageProcessorThread(
-                cover_image_url, content_image_urls)
+                cover_image_url, content_image_urls, prefetcher=prefetcher)
+            self.parent.image_processor.timings.connect(
+                self.handle_pipeline_timings)
             self.parent.image_processor.finished.connect(
                 self.handle_image_processing_result)
             self.parent.image_processor.error.connect(
@@ -517,6 +681,29 @@ class HomePage(QWidget):
             print(f"更新UI时出错: {str(e)}")
             TipWindow(self.parent, f"❌ 更新内容失败: {str(e)}").show()
 
+    def handle_pipeline_timings(self, image_spans):
+        """汇总生成和图片处理各阶段的耗时(从点击生成开始计时)"""
+        stages = []
+        for span in self.generation_timings:
+            if span['step'] == 'first_delta':
+                stages.append(("首字", span['seconds']))
+            elif span['step'] == 'generate':
+                stages.append(("文字完成", span['seconds']))
+        thumbnails = [span['start'] + span['seconds'] for span in image_spans
+                      if span['step'].startswith('thumbnail') and span['ok']]
+        if thumbnails:
+            stages.append(("首张图片", min(thumbnails)))
+        for span in image_spans:
+            if span['step'] == 'images_ready':
+                stages.append(("图片就绪", span['start'] + span['seconds']))
+        text = " | ".join(f"{name} {seconds:.1f}s" for name, seconds in stages)
+        print(f"生成耗时: {text}")
+        logging.info(f"生成耗时: {text}")
+        self.generate_btn.setToolTip("生成耗时(从点击开始):\n" + "\n".join(
+            [f"{name}: {seconds:.2f}s" for name, seconds in stages] +
+            [f"{span['step']}: {span['start']:.2f}s 开始，用时 {span['seconds']:.2f}s"
+             for span in image_spans if span['step'] != 'images_ready']))
+
     def handle_image_processing_result(self, images, image_list):
         try:
             self.images = images
@@ -599,13 +786,13 @@ class HomePage(QWidget):
             # 更新预览按钮状态
             self.parent.update_preview_button("⏳ 发布中...", False)
 
-            # 添加预览任务到浏览器线程
-            self.parent.browser_thread.action_queue.append({
-                'type': 'preview',
-                'title': title,
-                'content': content,
-                'images': self.images
-            })
+            # 添加预览任务到浏览器线程，重复点击不会重复加入
+            self.parent.browser_thread.submit(
+                'preview',
+                title=title,
+                content=content,
+                images=self.images
+            )
 
         except Exception as e:
             TipWindow(self.parent, f"❌ 预览发布失败: {str(e)}").show()
@@ -620,6 +807,32 @@ class HomePage(QWidget):
         self.parent.update_preview_button("🎯 预览发布", True)
         TipWindow(self.parent, f"❌ 预览发布失败: {error_msg}").show()
 
+    def handle_publish_page_status(self, status):
+        """在预览按钮提示中显示预热发布页的状态"""
+        preview_btn = self.parent.findChild(QPushButton, "preview_btn")
+        if not preview_btn or not status:
+            return
+        state = "就绪" if status['ready'] or status['next_ready'] else "未就绪"
+        tip = f"发布页: {state}"
+        if status['last_reset_seconds'] is not None:
+            tip += f" | 重置耗时 {status['last_reset_seconds']:.2f}秒"
+        if status['last_prefetch_seconds'] is not None:
+            tip += f" | 预热耗时 {status['last_prefetch_seconds']:.2f}秒"
+        if status['last_error']:
+            tip += f" | 最近错误: {status['last_error']}"
+        preview_btn.setToolTip(tip)
+
+    def handle_timing_summary(self, summary):
+        """显示最慢的几个步骤的 p50/p95 耗时，完整统计放在提示中"""
+        if not summary:
+            return
+        rows = sorted(summary.items(), key=lambda item: item[1]['p95'], reverse=True)
+        self.timing_label.setText(" | ".join(
+            f"{step} {stats['p50']:.1f}s/{stats['p95']:.1f}s" for step, stats in rows[:3]))
+        self.timing_label.setToolTip("步骤耗时 p50/p95:\n" + "\n".join(
+            f"{step}: {stats['p50']:.2f}s / {stats['p95']:.2f}s ({stats['count']}次)"
+            for step, stats in rows))
+
     def update_title_config(self):
         """更新标题配置"""
         try:
@@ -4,7 +4,6 @@ import os
 import asyncio
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
-import requests
 from PyQt6.QtWidgets import (QFrame, QHBoxLayout, QLabel, QPushButton,
                              QScrollArea, QTextEdit, QVBoxLayout, QWidget,
                              QScrollArea, QGridLayout, QFileDialog)
@@ -12,6 +11,7 @@ from PyQt6.QtCore import Qt, QByteArray, QThread, pyqtSignal
 from PyQt6.QtGui import QPixmap
 
 from src.core.alert import TipWindow
+from src.core.http_client import XHS_HEADERS, get_http_client
 
 
 class VideoProcessThread(QThread):
@@ -42,7 +42,8 @@ class VideoProcessThread(QThread):
 
             # 发送请求并处理结果
             self.progress.emit("正在获取视频信息...")
-            response = requests.post(server, json=data)
+            # 解析服务需要下载视频，读取超时放宽
+            response = get_http_client().post(server, json=data, timeout=(5, 300))
             result = response.json()
 
             if 'data' in result:
@@ -71,10 +72,7 @@ class DownloadThread(QThread):
 
     def run(self):
         try:
-            response = requests.get(self.url, headers={
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Referer': 'https://www.xiaohongshu.com/'
-            })
+            response = get_http_client().get(self.url, headers=XHS_HEADERS)
             if response.status_code == 200:
                 with open(self.save_path, 'wb') as f:
                     f.write(response.content)
@@ -101,10 +99,7 @@ class BatchDownloadThread(QThread):
                 filename = f"图片_{i}.jpg"
                 file_path = os.path.join(self.save_dir, filename)
                 
-                response = requests.get(url, headers={
-                    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                    'Referer': 'https://www.xiaohongshu.com/'
-                })
+                response = get_http_client().get(url, headers=XHS_HEADERS)
                 if response.status_code == 200:
                     with open(file_path, 'wb') as f:
                         f.write(response.content)
@@ -488,10 +483,7 @@ class ToolsPage(QWidget):
                         card_layout.setSpacing(0)
 
                         # 加载图片
-                        response = requests.get(url, headers={
-                            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                            'Referer': 'https://www.xiaohongshu.com/'
-                        })
+                        response = get_http_client().get(url, headers=XHS_HEADERS)
                         image_data = response.content
 
                         # 创建QPixmap并设置图片
@@ -856,11 +848,7 @@ class ToolsPage(QWidget):
     def load_image(self, url):
         """加载单个图片"""
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Referer': 'https://www.xiaohongshu.com/'
-            }
-            response = requests.get(url, headers=headers)
+            response = get_http_client().get(url, headers=XHS_HEADERS)
             response.raise_for_status()
             content_type = response.headers.get('content-type', 'image/jpeg')
             image_data = base64.b64encode(response.content).decode('utf-8')
@@ -0,0 +1,188 @@
+# 批量生成内容，结果逐篇写入 JSONL 草稿文件，可直接交给 post_batch 发布
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from src.core.http_client import XHS_HEADERS, get_http_client
+from src.core.processor.workflow import CircuitOpenError, get_workflow_client
+
+
+def load_topics(source):
+    """主题来源可以是文本文件路径(每行一个，# 开头为注释)，也可以是字符串列表"""
+    if isinstance(source, str):
+        with open(source, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    yield line
+    else:
+        for topic in source:
+            topic = (topic or '').strip()
+            if topic:
+                yield topic
+
+
+def download_images(urls, directory, prefix):
+    """下载生成的图片，返回本地路径列表"""
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+    paths = []
+    for i, url in enumerate(urls):
+        response = get_http_client().get(url, headers=XHS_HEADERS)
+        if response.status_code != 200:
+            raise Exception(f"图片下载失败({response.status_code}): {url}")
+        path = os.path.join(directory, f"{prefix}_{i}.jpg")
+        with open(path, 'wb') as f:
+            f.write(response.content)
+        paths.append(path)
+    return paths
+
+
+class BatchContentGenerator:
+    """并发批量生成内容
+
+    同时最多 concurrency 个工作流请求，主题按需从来源读取，
+    正在进行的请求满了就等待其中一个完成再提交下一个，
+    不会一次把几百个主题全部排进线程池。每篇完成后立即写入草稿文件并回调。
+
+    Args:
+        concurrency: 同时进行的工作流请求数
+        output_path: JSONL 草稿文件，默认 ~/.xhs_system/drafts/<时间>.jsonl
+        download_images: 是否把图片下载到本地，发布时需要本地图片
+    """
+
+    def __init__(self, client=None, concurrency=4, output_path=None, download_images=True):
+        self.client = client or get_workflow_client()
+        self.concurrency = max(1, concurrency)
+        home_dir = os.path.expanduser('~')
+        drafts_dir = os.path.join(home_dir, '.xhs_system', 'drafts')
+        self.output_path = output_path or os.path.join(
+            drafts_dir, f"{time.strftime('%Y%m%d-%H%M%S')}.jsonl")
+        self.image_dir = os.path.splitext(self.output_path)[0] + '_images'
+        self.download_images = download_images
+        self.stop_event = threading.Event()
+
+    def stop(self):
+        """不再提交新的主题，已经开始的请求会继续完成"""
+        self.stop_event.set()
+
+    def _generate(self, index, topic, header_title, author):
+        result = self.client.generate(topic, header_title, author)
+        draft = {
+            'topic': topic,
+            'title': result['title'],
+            'content': result['content'],
+            'image_urls': [result['cover_image']] + list(result['content_images']),
+        }
+        if self.download_images:
+            try:
+                draft['images'] = download_images(draft['image_urls'], self.image_dir, f"{index + 1:04d}")
+            except Exception as e:
+                # 文字已经生成，图片下载失败时仍保存草稿，之后可以按 image_urls 重新下载
+                logging.debug(f"主题 {topic} 图片下载失败: {str(e)}")
+                draft['images'] = []
+                draft['image_error'] = str(e)
+        else:
+            draft['images'] = draft['image_urls']
+        return draft
+
+    def run(self, topics, header_title, author, on_result=None):
+        """生成所有主题，返回统计摘要
+
+        Args:
+            topics: 主题文件路径或主题列表
+            on_result: 每篇完成后回调，参数为 {'index', 'topic', 'seconds', 'draft', 'error'}，
+                图片下载失败的草稿仍算成功，draft 中带 image_error
+        """
+        output_dir = os.path.dirname(self.output_path)
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        topics = enumerate(load_topics(topics))
+        started_at = time.monotonic()
+        succeeded, failed, image_failed = 0, [], []
+        unavailable = None
+
+        with open(self.output_path, 'a', encoding='utf-8') as output, \
+                ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            pending = {}  # future -> (序号, 主题, 开始时间)
+
+            def submit_next():
+                if self.stop_event.is_set():
+                    return False
+                item = next(topics, None)
+                if item is None:
+                    return False
+                index, topic = item
+                future = executor.submit(self._generate, index, topic, header_title, author)
+                pending[future] = (index, topic, time.monotonic())
+                return True
+
+            while len(pending) < self.concurrency and submit_next():
+                pass
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, topic, start = pending.pop(future)
+                    entry = {'index': index, 'topic': topic,
+                             'seconds': time.monotonic() - start, 'draft': None, 'error': None}
+                    try:
+                        entry['draft'] = future.result()
+                        output.write(json.dumps(entry['draft'], ensure_ascii=False) + '\n')
+                        output.flush()
+                        succeeded += 1
+                        if 'image_error' in entry['draft']:
+                            image_failed.append({'index': index, 'topic': topic,
+                                                 'error': entry['draft']['image_error']})
+                    except Exception as e:
+                        entry['error'] = str(e)
+                        failed.append({'index': index, 'topic': topic, 'error': str(e)})
+                        logging.debug(f"主题 {topic} 生成失败: {str(e)}")
+                        if isinstance(e, CircuitOpenError):
+                            # 服务不可用时不再提交剩下的主题，避免请求堆积
+                            unavailable = str(e)
+                            self.stop_event.set()
+                    if on_result:
+                        on_result(entry)
+                    submit_next()
+
+        total_seconds = time.monotonic() - started_at
+        return {
+            'output_path': self.output_path,
+            'succeeded': succeeded,
+            'failed': failed,
+            'image_failed': image_failed,
+            'stopped': self.stop_event.is_set(),
+            'unavailable': unavailable,
+            'total_seconds': total_seconds,
+            'per_minute': succeeded * 60 / total_seconds if total_seconds else 0.0,
+            'workflow': self.client.stats(),
+        }
+
+
+class BatchContentThread(QThread):
+    progress = pyqtSignal(dict)  # 每篇完成时的结果
+    finished = pyqtSignal(dict)  # 统计摘要
+    error = pyqtSignal(str)
+
+    def __init__(self, topics, header_title, author, concurrency=4, output_path=None):
+        super().__init__()
+        self.topics = topics
+        self.header_title = header_title
+        self.author = author
+        self.generator = BatchContentGenerator(concurrency=concurrency, output_path=output_path)
+
+    def stop(self):
+        self.generator.stop()
+
+    def run(self):
+        try:
+            summary = self.generator.run(
+                self.topics, self.header_title, self.author, on_result=self.progress.emit)
+            self.finished.emit(summary)
+        except Exception as e:
+            self.error.emit(str(e))
@@ -1,18 +1,42 @@
-import json
+import time
+
 from PyQt6.QtCore import QThread, pyqtSignal
 
-import requests
+from src.core.processor.workflow import get_workflow_client
 
 class ContentGeneratorThread(QThread):
     finished = pyqtSignal(dict)
     error = pyqtSignal(str)
+    delta = pyqtSignal(str, str)  # 流式生成的增量文本: 字段(title/content), 文本
 
-    def __init__(self, input_text, header_title, author, generate_btn):
+    def __init__(self, input_text, header_title, author, generate_btn, force_refresh=False, stream=False,
+                 prefetcher=None):
         super().__init__()
         self.input_text = input_text
         self.header_title = header_title
         self.author = author
         self.generate_btn = generate_btn
+        # 跳过缓存重新调用工作流
+        self.force_refresh = force_refresh
+        # 边生成边显示标题和正文
+        self.stream = stream
+        # 图片地址一出现就交给 ImagePrefetcher 下载
+        self.prefetcher = prefetcher
+        self.started_at = prefetcher.started_at if prefetcher else time.monotonic()
+        self.timings = []
+
+    def _on_delta(self, field, text):
+        if not self.timings:
+            self._record('first_delta')
+        self.delta.emit(field, text)
+
+    def _on_image(self, field, url):
+        if self.prefetcher:
+            self.prefetcher.add(field, url)
+
+    def _record(self, step, ok=True):
+        self.timings.append({'step': step, 'start': 0.0,
+                             'seconds': time.monotonic() - self.started_at, 'ok': ok})
 
     def run(self):
         try:
@@ -20,40 +44,32 @@ class ContentGeneratorThread(QThread):
             self.generate_btn.setText("⏳ 生成中...")
             self.generate_btn.setEnabled(False)
 
-            workflow_id = "7431484143153070132"
-            parameters = {
-                "BOT_USER_INPUT": self.input_text,
-                "HEADER_TITLE": self.header_title,
-                "AUTHOR": self.author
-            }
-
-            response = requests.post(
-                "http://8.137.103.115:8081/workflow/run",
-                json={
-                    "workflow_id": workflow_id,
-                    "parameters": parameters
-                }
-            )
-
-            if response.status_code != 200:
-                raise Exception("API调用失败")
-
-            res = response.json()
-            output_data = json.loads(res['data'])
-            title = json.loads(output_data['output'])['title']
-
-            result = {
-                'title': title,
-                'content': output_data['content'],
-                'cover_image': json.loads(res['data'])['image'],
-                'content_images': json.loads(res['data'])['image_content'],
-                'input_text': self.input_text
-            }
-
-            self.finished.emit(result)
+            if self.stream:
+                result = get_workflow_client().generate_stream(
+                    self.input_text,
+                    self.header_title,
+                    self.author,
+                    on_delta=self._on_delta,
+                    on_image=self._on_image,
+                    force_refresh=self.force_refresh
+                )
+            else:
+                result = get_workflow_client().generate(
+                    self.input_text,
+                    self.header_title,
+                    self.author,
+                    force_refresh=self.force_refresh
+                )
+            self._record('generate')
+            # 非流式时在界面更新文字之前开始下载图片
+            if self.prefetcher:
+                self.prefetcher.add_result(result)
+
+            self.finished.emit(dict(result, timings=list(self.timings)))
         except Exception as e:
+            self._record('generate', ok=False)
             self.error.emit(str(e))
         finally:
             # 恢复按钮状态
             self.generate_btn.setText("✨ 生成内容")
-            self.generate_btn.setEnabled(True)
\ No newline at end of file
+            self.generate_btn.setEnabled(True)
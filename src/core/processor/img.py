@@ -1,125 +1,169 @@
 import io
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from PyQt6.QtCore import QThread, pyqtSignal
 
 import os
-import requests
 
 from PyQt6.QtGui import QPixmap, QImage
 
 
 from PIL import Image
 
+from src.core.http_client import get_http_client
+
+
+def get_img_dir():
+    """生成图片的保存目录"""
+    img_dir = os.path.join(os.path.expanduser('~'), '.xhs_system')
+    if not os.path.exists(img_dir):
+        os.makedirs(img_dir)
+    return os.path.join(img_dir, 'imgs')
+
+
+def make_preview(content, title):
+    """把图片缩放到预览尺寸，居中放在白色背景上"""
+    image = Image.open(io.BytesIO(content))
+
+    # 计算缩放比例，保持宽高比
+    width, height = image.size
+    max_size = 360  # 调整预览图片的最大尺寸
+    scale = min(max_size/width, max_size/height)
+    new_width = int(width * scale)
+    new_height = int(height * scale)
+
+    # 缩放图片
+    image = image.resize((new_width, new_height), Image.LANCZOS)
+
+    # 创建白色背景
+    background = Image.new('RGB', (max_size, max_size), 'white')
+    # 将图片粘贴到中心位置
+    offset = ((max_size - new_width) // 2,
+              (max_size - new_height) // 2)
+    background.paste(image, offset)
+
+    # 转换为QPixmap
+    img_bytes = io.BytesIO()
+    background.save(img_bytes, format='PNG')
+    img_data = img_bytes.getvalue()
+
+    qimage = QImage.fromData(img_data)
+    pixmap = QPixmap.fromImage(qimage)
+
+    if pixmap.isNull():
+        raise Exception("无法创建有效的图片预览")
+
+    return {'pixmap': pixmap, 'title': title}
+
+
+class ImagePrefetcher:
+    """生成内容的同时下载图片并生成预览
+
+    工作流输出中一出现图片地址就开始下载和缩放，不必等全部文字生成完。
+    同一个地址只处理一次，每张图片记录下载和缩放的耗时，
+    时间以 started_at 为起点。
+    """
+
+    def __init__(self, started_at=None, max_workers=4, img_dir=None):
+        self.started_at = started_at or time.monotonic()
+        self.img_dir = img_dir or get_img_dir()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.futures = {}  # 图片地址 -> future
+        self.content_count = 0
+        self.spans = []
+        self.lock = threading.Lock()
+
+    def add(self, field, url):
+        """收到图片地址时调用，field 为 cover_image 或 content_images"""
+        with self.lock:
+            if not url or url in self.futures:
+                return
+            if field == 'cover_image':
+                title = "封面图"
+            else:
+                self.content_count += 1
+                title = f"内容图{self.content_count}"
+            self.futures[url] = self.executor.submit(self._process, url, title)
+
+    def add_result(self, result):
+        """按完整的生成结果补上还没开始处理的图片"""
+        self.add('cover_image', result['cover_image'])
+        for url in result['content_images']:
+            self.add('content_images', url)
+
+    def record_span(self, step, start, ok):
+        """记录一个阶段的耗时，格式与 PageWaiter.timings 相同"""
+        now = time.monotonic()
+        with self.lock:
+            self.spans.append({'step': step, 'start': start - self.started_at,
+                               'seconds': now - start, 'ok': ok})
+
+    def _process(self, url, title):
+        # 连接失败和 5xx 由共享的 HttpClient 在连接层退避重试
+        start = time.monotonic()
+        try:
+            response = get_http_client().get(url)
+            if response.status_code != 200:
+                raise Exception(f"下载图片失败: HTTP {response.status_code}")
+            # 保存图片
+            img_path = os.path.join(self.img_dir, f'{title}.jpg')
+            os.makedirs(os.path.dirname(img_path), exist_ok=True)
+
+            # 保存原始图片
+            with open(img_path, 'wb') as f:
+                f.write(response.content)
+            self.record_span(f"download {title}", start, True)
+
+            start = time.monotonic()
+            preview = make_preview(response.content, title)
+            self.record_span(f"thumbnail {title}", start, True)
+            return img_path, preview
+
+        except Exception as e:
+            self.record_span(f"download {title}", start, False)
+            print(f"处理图片失败: {str(e)}")
+            return None, None
+
+    def wait(self, cover_image_url, content_image_urls):
+        """等待图片处理完成，按封面图、内容图的顺序返回路径和预览"""
+        images = []
+        image_list = []
+        urls = ([cover_image_url] if cover_image_url else []) + list(content_image_urls)
+        for url in urls:
+            # 内容图的地址没有在生成过程中出现过时在这里补上
+            self.add('cover_image' if url == cover_image_url else 'content_images', url)
+            img_path, pixmap_info = self.futures[url].result()
+            if img_path and pixmap_info:
+                images.append(img_path)
+                image_list.append(pixmap_info)
+        return images, image_list
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
 
 class ImageProcessorThread(QThread):
     finished = pyqtSignal(list, list)  # 发送图片路径列表和图片信息列表
     error = pyqtSignal(str)
+    timings = pyqtSignal(list)  # 每张图片下载和缩放的耗时
 
-    def __init__(self, cover_image_url, content_image_urls):
+    def __init__(self, cover_image_url, content_image_urls, prefetcher=None):
         super().__init__()
         self.cover_image_url = cover_image_url
         self.content_image_urls = content_image_urls
-        # 获取用户主目录
-        img_dir = os.path.join(os.path.expanduser('~'), '.xhs_system')
-        if not os.path.exists(img_dir):
-            os.makedirs(img_dir)
-
-        # 配置文件路径
-        self.img_dir = os.path.join(img_dir, 'imgs')
+        # 生成过程中已经开始处理图片时复用
+        self.prefetcher = prefetcher
 
     def run(self):
+        prefetcher = self.prefetcher or ImagePrefetcher()
         try:
-            images = []
-            image_list = []
-
-            # 并发处理所有图片
-            from concurrent.futures import ThreadPoolExecutor
-
-            def process_image_with_title(args):
-                url, title = args
-                return self.process_image(url, title)
-
-            with ThreadPoolExecutor(max_workers=4) as executor:
-                # 创建有序的future列表
-                futures = []
-
-                # 添加封面图任务
-                if self.cover_image_url:
-                    future = executor.submit(process_image_with_title,
-                                             (self.cover_image_url, "封面图"))
-                    futures.append((-1, future))  # 用-1确保封面图排在最前
-
-                # 添加内容图任务
-                for i, url in enumerate(self.content_image_urls):
-                    future = executor.submit(process_image_with_title,
-                                             (url, f"内容图{i+1}"))
-                    futures.append((i, future))
-
-                # 按照原始顺序处理结果
-                for i, future in sorted(futures, key=lambda x: x[0]):
-                    img_path, pixmap_info = future.result()
-                    if img_path and pixmap_info:
-                        images.append(img_path)
-                        image_list.append(pixmap_info)
-
+            start = time.monotonic()
+            images, image_list = prefetcher.wait(self.cover_image_url, self.content_image_urls)
+            prefetcher.record_span('images_ready', start, bool(images))
+            self.timings.emit(list(prefetcher.spans))
             self.finished.emit(images, image_list)
         except Exception as e:
             self.error.emit(str(e))
-
-    def process_image(self, url, title):
-        retries = 3
-        while retries > 0:
-            try:
-                response = requests.get(url)
-                if response.status_code == 200:
-                    # 保存图片
-                    img_path = os.path.join(self.img_dir, f'{title}.jpg')
-                    os.makedirs(os.path.dirname(img_path), exist_ok=True)
-
-                    # 保存原始图片
-                    with open(img_path, 'wb') as f:
-                        f.write(response.content)
-
-                    # 处理图片预览
-                    image = Image.open(io.BytesIO(response.content))
-
-                    # 计算缩放比例，保持宽高比
-                    width, height = image.size
-                    max_size = 360  # 调整预览图片的最大尺寸
-                    scale = min(max_size/width, max_size/height)
-                    new_width = int(width * scale)
-                    new_height = int(height * scale)
-
-                    # 缩放图片
-                    image = image.resize((new_width, new_height), Image.LANCZOS)
-
-                    # 创建白色背景
-                    background = Image.new('RGB', (max_size, max_size), 'white')
-                    # 将图片粘贴到中心位置
-                    offset = ((max_size - new_width) // 2,
-                              (max_size - new_height) // 2)
-                    background.paste(image, offset)
-
-                    # 转换为QPixmap
-                    img_bytes = io.BytesIO()
-                    background.save(img_bytes, format='PNG')
-                    img_data = img_bytes.getvalue()
-
-                    qimage = QImage.fromData(img_data)
-                    pixmap = QPixmap.fromImage(qimage)
-
-                    if pixmap.isNull():
-                        raise Exception("无法创建有效的图片预览")
-
-                    return img_path, {'pixmap': pixmap, 'title': title}
-                else:
-                    raise Exception(f"下载图片失败: HTTP {response.status_code}")
-
-            except Exception as e:
-                retries -= 1
-                if retries > 0:
-                    print(f"处理图片失败,还剩{retries}次重试: {str(e)}")
-                    time.sleep(1)  # 重试前等待1秒
-                else:
-                    print(f"处理图片失败,重试次数已用完: {str(e)}")
-                    return None, None
+        finally:
+            prefetcher.shutdown()
@@ -0,0 +1,147 @@
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from PIL import Image, ImageOps
+
+# 平台展示图片的最大有效分辨率，超过的部分上传后也会被压缩掉
+MAX_LONG_SIDE = 2560
+MAX_SHORT_SIDE = 1440
+DEFAULT_QUALITY = 85
+
+
+class UploadImageOptimizer:
+    """上传前的图片预处理
+
+    按平台最大有效分辨率缩小、以目标质量重新编码为 JPEG 并去掉 EXIF 等元数据。
+    结果按原图内容哈希缓存在 ~/.xhs_system/upload_cache，同一张图片在多个账号、
+    多次发布之间只处理一次。
+    """
+
+    def __init__(self, quality=DEFAULT_QUALITY, max_long_side=MAX_LONG_SIDE,
+                 max_short_side=MAX_SHORT_SIDE, cache_dir=None, max_cache_bytes=500 * 1024 * 1024,
+                 enabled=True):
+        self.quality = quality
+        self.max_long_side = max_long_side
+        self.max_short_side = max_short_side
+        self.enabled = enabled
+        home_dir = os.path.expanduser('~')
+        self.cache_dir = cache_dir or os.path.join(home_dir, '.xhs_system', 'upload_cache')
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        self.max_cache_bytes = max_cache_bytes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds = 0.0
+
+    def _cache_key(self, data):
+        # 处理参数变化时重新生成
+        digest = hashlib.sha256(data)
+        digest.update(f"{self.quality}:{self.max_long_side}:{self.max_short_side}".encode())
+        return digest.hexdigest()
+
+    def _target_size(self, width, height):
+        long_side, short_side = max(width, height), min(width, height)
+        scale = min(1.0, self.max_long_side / long_side, self.max_short_side / short_side)
+        return max(1, round(width * scale)), max(1, round(height * scale))
+
+    def _encode(self, data, target_path):
+        with Image.open(io.BytesIO(data)) as image:
+            # 按 EXIF 方向旋转后再丢弃元数据，避免图片方向错误
+            image = ImageOps.exif_transpose(image)
+            if image.mode in ('RGBA', 'LA', 'P'):
+                image = image.convert('RGBA')
+                background = Image.new('RGB', image.size, 'white')
+                background.paste(image, mask=image.getchannel('A'))
+                image = background
+            elif image.mode != 'RGB':
+                image = image.convert('RGB')
+            size = self._target_size(*image.size)
+            if size != image.size:
+                image = image.resize(size, Image.LANCZOS)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='.tmp-', suffix='.jpg')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    image.save(f, format='JPEG', quality=self.quality, optimize=True, progressive=True)
+                os.replace(tmp_path, target_path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+    def optimize(self, path):
+        """处理单张图片，返回上传使用的文件路径"""
+        path = os.path.abspath(os.path.expanduser(path))
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"图片不存在: {path}")
+        if not self.enabled:
+            return path
+        start = time.monotonic()
+        with open(path, 'rb') as f:
+            data = f.read()
+        target_path = os.path.join(self.cache_dir, self._cache_key(data) + '.jpg')
+        hit = os.path.exists(target_path)
+        if hit:
+            os.utime(target_path)  # 更新最近使用时间
+        else:
+            try:
+                self._encode(data, target_path)
+            except Exception as e:
+                # 无法识别的图片按原文件上传
+                logging.debug(f"图片预处理失败，使用原图 {path}: {str(e)}")
+                return path
+        size = os.path.getsize(target_path)
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self.bytes_in += len(data)
+            self.bytes_out += size
+            self.seconds += time.monotonic() - start
+        if not hit:
+            self._evict()
+        return target_path
+
+    def prepare(self, images):
+        """处理一篇文章的所有图片，返回路径列表"""
+        return [self.optimize(image) for image in images or []]
+
+    def _evict(self):
+        """缓存超过上限时删除最久未使用的文件"""
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.startswith('.') or not name.endswith('.jpg') or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        for _, size, path in sorted(entries):
+            if total <= self.max_cache_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def stats(self):
+        """返回处理统计"""
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'bytes_in': self.bytes_in,
+                'bytes_out': self.bytes_out,
+                'saved_ratio': 1 - self.bytes_out / self.bytes_in if self.bytes_in else 0.0,
+                'seconds': self.seconds,
+            }
@@ -0,0 +1,589 @@
+# 内容生成工作流的调用和结果缓存
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+
+from src.core.http_client import get_http_client
+from src.core.waiter import TimingStats
+
+# 工作流地址，设置环境变量 XHS_WORKFLOW_URL 可以指向本地的替身服务(test/mock_workflow_server.py)，
+# 也可以在配置的 workflow.url / workflow.workflow_id 中修改
+WORKFLOW_URL = os.environ.get('XHS_WORKFLOW_URL', "http://8.137.103.115:8081/workflow/run")
+WORKFLOW_ID = os.environ.get('XHS_WORKFLOW_ID', "7431484143153070132")
+
+# 工作流生成较慢，读取超时放宽
+WORKFLOW_TIMEOUT = (5, 180)
+
+# 可以重试的响应状态码
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+# 熔断器状态
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# 耗时分布的分桶上限(秒)
+LATENCY_BUCKETS = (1, 2, 5, 10, 20, 30, 60, 120, 180)
+
+
+class CircuitOpenError(Exception):
+    """熔断器打开时直接失败，不再请求"""
+    pass
+
+
+class RetryableError(Exception):
+    """服务端暂时不可用(429/5xx)"""
+    pass
+
+
+def normalize_text(text):
+    """去掉首尾空白并合并连续空白，避免只差空格的输入重复生成"""
+    return re.sub(r'\s+', ' ', (text or '').strip())
+
+
+def make_cache_key(input_text, header_title, author, workflow_id=WORKFLOW_ID, url=WORKFLOW_URL):
+    """由规范化后的输入、workflow_id 和工作流地址生成缓存键，切换到替身服务时不会混用结果"""
+    raw = json.dumps([normalize_text(input_text), normalize_text(header_title),
+                      normalize_text(author), str(workflow_id), url], ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def parse_workflow_response(res, input_text):
+    """把工作流返回的 JSON 解析为界面使用的结果"""
+    output_data = json.loads(res['data'])
+    title = json.loads(output_data['output'])['title']
+    return {
+        'title': title,
+        'content': output_data['content'],
+        'cover_image': output_data['image'],
+        'content_images': output_data['image_content'],
+        'input_text': input_text
+    }
+
+
+def iter_sse_events(lines):
+    """把 SSE 响应的文本行解析为 (事件名, 数据) 序列"""
+    event, data = 'message', []
+    for line in lines:
+        if line is None:
+            continue
+        if line == '':
+            if data:
+                yield event, '\n'.join(data)
+            event, data = 'message', []
+        elif line.startswith(':'):
+            continue
+        elif line.startswith('event:'):
+            event = line[6:].strip()
+        elif line.startswith('data:'):
+            data.append(line[5:].lstrip())
+    if data:
+        yield event, '\n'.join(data)
+
+
+class ContentCache:
+    """内容生成结果的两级缓存
+
+    内存中按最近最少使用保留 max_memory 条，磁盘上每条一个 JSON 文件，
+    保存在 ~/.xhs_system/content_cache，超过 max_disk 条时删除最旧的。
+    超过 ttl 秒的结果视为过期。
+    """
+
+    def __init__(self, ttl=7 * 24 * 3600, max_memory=100, max_disk=1000, cache_dir=None):
+        self.ttl = ttl
+        self.max_memory = max_memory
+        self.max_disk = max_disk
+        home_dir = os.path.expanduser('~')
+        self.cache_dir = cache_dir or os.path.join(home_dir, '.xhs_system', 'content_cache')
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        self.memory = OrderedDict()  # 缓存键 -> (保存时间, 结果)
+        self.lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + '.json')
+
+    def _expired(self, saved_at):
+        return time.time() - saved_at > self.ttl
+
+    def get(self, key):
+        """返回缓存的结果，不存在或已过期时返回 None"""
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                if not self._expired(entry[0]):
+                    self.memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return entry[1]
+                del self.memory[key]
+        entry = self._load(key)
+        with self.lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, entry)
+        return entry[1]
+
+    def _load(self, key):
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logging.debug(f"读取内容缓存失败: {str(e)}")
+            return None
+        if self._expired(data['saved_at']):
+            self._remove(path)
+            return None
+        return data['saved_at'], data['result']
+
+    def _remember(self, key, entry):
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_memory:
+            self.memory.popitem(last=False)
+
+    def put(self, key, result):
+        """保存结果到内存和磁盘"""
+        saved_at = time.time()
+        with self.lock:
+            self._remember(key, (saved_at, result))
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='.tmp-', suffix='.json')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'saved_at': saved_at, 'result': result}, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(key))
+        except Exception as e:
+            logging.debug(f"保存内容缓存失败: {str(e)}")
+            self._remove(tmp_path)
+        self._evict()
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _evict(self):
+        files = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+                 if name.endswith('.json') and not name.startswith('.')]
+        if len(files) <= self.max_disk:
+            return
+        files.sort(key=os.path.getmtime)
+        for path in files[:len(files) - self.max_disk]:
+            self._remove(path)
+
+    def invalidate(self, key):
+        with self.lock:
+            self.memory.pop(key, None)
+        self._remove(self._path(key))
+
+    def stats(self):
+        with self.lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                'memory_entries': len(self.memory),
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """相同键的调用同时只执行一次
+
+    第一个调用者执行请求，执行期间到达的相同调用等待并共享它的结果或异常。
+    """
+
+    def __init__(self):
+        self.calls = {}  # 键 -> 正在执行的 _Call
+        self.lock = threading.Lock()
+        self.executed = 0
+        self.shared = 0  # 共享结果而省下的调用数
+
+    def do(self, key, fn):
+        """执行 fn 或等待正在执行的相同调用，返回 (结果, 是否共享)"""
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.shared += 1
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        try:
+            call.result = fn()
+            return call.result, False
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.event.set()
+
+    def stats(self):
+        with self.lock:
+            return {'executed': self.executed, 'shared': self.shared, 'in_flight': len(self.calls)}
+
+
+class CircuitBreaker:
+    """连续失败 failure_threshold 次后打开，reset_timeout 秒内的调用直接失败
+
+    之后进入半开状态，只放行一个探测请求: 成功则关闭，失败则重新打开。
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    def before_call(self):
+        """请求前检查，熔断时抛出 CircuitOpenError"""
+        with self.lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at >= self.reset_timeout:
+                    self.state = HALF_OPEN
+                    self.probing = False
+                else:
+                    self.rejected += 1
+                    raise CircuitOpenError(
+                        f"工作流服务不可用，{self.reset_timeout - (time.monotonic() - self.opened_at):.0f}秒后重试")
+            if self.state == HALF_OPEN:
+                if self.probing:
+                    self.rejected += 1
+                    raise CircuitOpenError("工作流服务不可用，正在探测恢复")
+                self.probing = True
+
+    def record_success(self):
+        with self.lock:
+            if self.state != CLOSED:
+                logging.info("工作流服务已恢复，熔断器关闭")
+            self.state = CLOSED
+            self.failures = 0
+            self.probing = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.probing = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    logging.warning(f"工作流连续失败 {self.failures} 次，熔断 {self.reset_timeout} 秒")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def is_open(self):
+        with self.lock:
+            return self.state == OPEN and time.monotonic() - self.opened_at < self.reset_timeout
+
+    def stats(self):
+        with self.lock:
+            state = self.state
+            if state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                state = HALF_OPEN  # 下一个请求将作为探测
+            return {
+                'state': state,
+                'failures': self.failures,
+                'rejected': self.rejected,
+                'retry_in': (max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+                             if state == OPEN else 0.0),
+            }
+
+
+class LatencyHistogram:
+    """工作流调用耗时的分桶计数和最近若干次的 p50/p95"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS, window=200):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 最后一个桶放超过上限的
+        self.recent = TimingStats(window)
+        self.lock = threading.Lock()
+
+    def add(self, seconds):
+        with self.lock:
+            index = next((i for i, limit in enumerate(self.buckets) if seconds <= limit), len(self.buckets))
+            self.counts[index] += 1
+        self.recent.add_spans([{'step': 'workflow', 'seconds': seconds}])
+
+    def stats(self):
+        """返回 {'count', 'p50', 'p95', 'buckets': [(上限文本, 次数)]}"""
+        with self.lock:
+            counts = list(self.counts)
+        labels = [f"≤{limit}s" for limit in self.buckets] + [f">{self.buckets[-1]}s"]
+        recent = self.recent.summary().get('workflow', {})
+        return {
+            'count': sum(counts),
+            'p50': recent.get('p50'),
+            'p95': recent.get('p95'),
+            'buckets': list(zip(labels, counts)),
+        }
+
+
+def _retryable(error):
+    """连接失败(含连接超时)和 429/5xx 可以重试；读取超时时服务端可能仍在生成，不重试"""
+    return isinstance(error, (RetryableError, requests.ConnectionError))
+
+
+def _unavailable(error):
+    """计入熔断器的失败: 可重试的错误和读取超时"""
+    return _retryable(error) or isinstance(error, requests.Timeout)
+
+
+class WorkflowClient:
+    """内容生成工作流客户端
+
+    相同输入优先返回缓存的结果；相同输入的请求正在进行时，
+    后到的调用等待并共享同一个结果，不再重复请求。
+    """
+
+    def __init__(self, url=WORKFLOW_URL, workflow_id=WORKFLOW_ID, cache=None, timeout=WORKFLOW_TIMEOUT,
+                 retries=3, backoff=1.0, max_backoff=30, breaker=None, max_connections=None):
+        self.url = url
+        self.workflow_id = workflow_id
+        self.cache = cache or ContentCache()
+        self.flight = SingleFlight()
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = LatencyHistogram()
+        self.retried = 0
+        # 重试由 _call 负责；连接数要不少于批量生成的并发数，否则请求在连接池排队
+        get_http_client().disable_retries(url, max_per_host=max_connections)
+
+    def _call(self, fn):
+        """执行一次工作流调用
+
+        请求前检查熔断器；连接失败和 429/5xx 按带抖动的指数退避重试。
+        流式调用收到响应头后把 state['retryable'] 置为 False，之后读取出错不再重试。
+        """
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            start = time.monotonic()
+            state = {'retryable': True}
+            try:
+                result = fn(state)
+            except Exception as e:
+                if not _unavailable(e):
+                    # 服务端有响应(如返回内容格式错误)，不算服务不可用
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                if attempt >= self.retries or not state['retryable'] or not _retryable(e) \
+                        or self.breaker.is_open():
+                    raise Exception(f"工作流请求失败: {str(e)}")
+                # 全抖动: 在 [0, 上限] 内随机等待，避免大量线程同时重试
+                delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+                attempt += 1
+                self.retried += 1
+                logging.debug(f"工作流请求失败，{delay:.1f}秒后第 {attempt} 次重试: {str(e)}")
+                time.sleep(delay)
+                continue
+            self.breaker.record_success()
+            self.latency.add(time.monotonic() - start)
+            return result
+
+    def _post(self, input_text, header_title, author, **kwargs):
+        parameters = {
+            "BOT_USER_INPUT": input_text,
+            "HEADER_TITLE": header_title,
+            "AUTHOR": author
+        }
+        response = get_http_client().post(
+            self.url,
+            json={
+                "workflow_id": self.workflow_id,
+                "parameters": parameters
+            },
+            timeout=self.timeout,
+            **kwargs
+        )
+        if response.status_code in RETRY_STATUS:
+            response.close()
+            raise RetryableError(f"HTTP {response.status_code}")
+        if response.status_code != 200:
+            response.close()
+            raise Exception(f"API调用失败: HTTP {response.status_code}")
+        return response
+
+    def run(self, input_text, header_title, author):
+        """调用工作流，返回解析后的结果"""
+        def call(state):
+            response = self._post(input_text, header_title, author)
+            return parse_workflow_response(response.json(), input_text)
+
+        return self._call(call)
+
+    def run_stream(self, input_text, header_title, author, on_delta=None, on_image=None):
+        """以流式方式调用工作流
+
+        请求带 Accept: text/event-stream，服务端按 SSE 推送:
+            event: delta  data: {"field": "title"|"content", "text": 增量文本}
+            event: image  data: {"field": "cover_image"|"content_images", "url": 图片地址}
+            event: done   data: 与非流式接口相同的完整响应 {"data": ...}
+            event: error  data: {"message": 错误信息}
+        服务端不支持流式、直接返回 JSON 时，按完整结果一次性回调。
+        """
+        def call(state):
+            response = self._post(input_text, header_title, author,
+                                  headers={'Accept': 'text/event-stream'}, stream=True)
+            # 服务端已经开始生成，之后读取超时或断开都不再重试，
+            # requests 会把 iter_lines 中的读取超时转换为 ConnectionError
+            state['retryable'] = False
+            with response:
+                if 'text/event-stream' not in response.headers.get('Content-Type', ''):
+                    result = parse_workflow_response(response.json(), input_text)
+                    _replay(result, on_delta, on_image)
+                    return result
+
+                response.encoding = 'utf-8'
+                for event, data in iter_sse_events(response.iter_lines(decode_unicode=True)):
+                    payload = json.loads(data)
+                    if event == 'delta':
+                        if on_delta:
+                            on_delta(payload['field'], payload['text'])
+                    elif event == 'image':
+                        if on_image:
+                            on_image(payload['field'], payload['url'])
+                    elif event == 'error':
+                        raise Exception(payload.get('message') or "工作流执行失败")
+                    elif event == 'done':
+                        return parse_workflow_response(payload, input_text)
+            raise Exception("工作流响应不完整")
+
+        return self._call(call)
+
+    def generate_stream(self, input_text, header_title, author, on_delta=None, on_image=None,
+                        force_refresh=False):
+        """流式生成内容，命中缓存时一次性回调完整结果"""
+        key = make_cache_key(input_text, header_title, author, self.workflow_id, self.url)
+        if not force_refresh:
+            cached = self.cache.get(key)
+            if cached is not None:
+                logging.debug("使用缓存的生成结果")
+                _replay(cached, on_delta, on_image)
+                return dict(cached, input_text=input_text, cached=True)
+
+        def fetch():
+            result = self.run_stream(input_text, header_title, author, on_delta, on_image)
+            self.cache.put(key, result)
+            return result
+
+        result, shared = self.flight.do(key, fetch)
+        if shared:
+            # 等待的是别人的请求，增量已经发给了对方，这里一次性回调完整结果
+            _replay(result, on_delta, on_image)
+            return dict(result, input_text=input_text, shared=True)
+        return result
+
+    def generate(self, input_text, header_title, author, force_refresh=False):
+        """生成内容
+
+        Args:
+            force_refresh: 跳过缓存重新生成，结果仍会写入缓存；
+                相同输入的请求正在进行时仍然共享它的结果
+        """
+        key = make_cache_key(input_text, header_title, author, self.workflow_id, self.url)
+        if not force_refresh:
+            cached = self.cache.get(key)
+            if cached is not None:
+                logging.debug("使用缓存的生成结果")
+                return dict(cached, input_text=input_text, cached=True)
+
+        def fetch():
+            result = self.run(input_text, header_title, author)
+            self.cache.put(key, result)
+            return result
+
+        result, shared = self.flight.do(key, fetch)
+        if shared:
+            return dict(result, input_text=input_text, shared=True)
+        return result
+
+    def stats(self):
+        """返回请求数、合并和缓存省下的请求数、重试次数、熔断器状态和耗时分布"""
+        flight = self.flight.stats()
+        return {
+            'calls': flight['executed'],
+            'saved_by_coalescing': flight['shared'],
+            'in_flight': flight['in_flight'],
+            'retried': self.retried,
+            'cache': self.cache.stats(),
+            'breaker': self.breaker.stats(),
+            'latency': self.latency.stats(),
+        }
+
+
+def _replay(result, on_delta=None, on_image=None):
+    """把完整结果按流式回调的形式发出"""
+    if on_delta:
+        on_delta('title', result['title'])
+        on_delta('content', result['content'])
+    if on_image:
+        on_image('cover_image', result['cover_image'])
+        for url in result['content_images']:
+            on_image('content_images', url)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_workflow_client():
+    """所有生成线程共享的工作流客户端"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = WorkflowClient()
+        return _client
+
+
+def configure_workflow_client(config):
+    """按配置的 workflow 部分重新创建共享的客户端，url、workflow_id 为空时使用默认值"""
+    global _client
+    with _client_lock:
+        _client = WorkflowClient(
+            url=config.get('url') or WORKFLOW_URL,
+            workflow_id=config.get('workflow_id') or WORKFLOW_ID,
+            timeout=(WORKFLOW_TIMEOUT[0], config.get('read_timeout') or WORKFLOW_TIMEOUT[1]),
+            retries=config.get('retries', 3),
+            # 交互生成和批量生成同时进行
+            max_connections=config.get('concurrency', 4) + 2
+        )
+        return _client
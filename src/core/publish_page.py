@@ -0,0 +1,146 @@
+import logging
+import time
+
+from src.core.site import PUBLISH_PATH, creator_url
+
+# 创作者中心发布页(图文)
+PUBLISH_URL = creator_url(PUBLISH_PATH)
+
+
+class WarmPublishPage:
+    """常驻的发布页
+
+    提前打开发布页并切换到"上传图文"，发文时直接复用；
+    用户检查当前文章时，后台预先打开下一个编辑器。
+    发布页都是自己打开的标签页，替换时关闭旧页面不会影响登录用的页面。
+
+    Args:
+        on_new_page: 每打开一个页面时回调，如注册崩溃监听
+    """
+
+    def __init__(self, context, waiter, url=PUBLISH_URL, on_new_page=None):
+        self.context = context
+        self.waiter = waiter
+        self.url = url
+        self.on_new_page = on_new_page
+        self.page = None        # 当前发布页
+        self.next_page = None   # 预先打开的下一个发布页
+        self.ready = False      # 当前发布页是否可直接使用
+        self.resets = 0
+        self.failures = 0
+        self.last_reset_seconds = None
+        self.last_prefetch_seconds = None
+        self.last_error = None
+
+    def _prepare(self, page):
+        """打开发布页并切换到上传图文"""
+        page.goto(self.url, wait_until="domcontentloaded")
+        self.waiter.wait_visible(page, 'publish_entry', ".creator-tab")
+        tabs = page.query_selector_all(".creator-tab")
+        if len(tabs) > 1:
+            tabs[1].click()
+        self.waiter.wait_attached(page, 'upload_form', ".upload-input")
+
+    def _new_page(self):
+        page = self.context.new_page()
+        if self.on_new_page:
+            self.on_new_page(page)
+        return page
+
+    def _is_healthy(self, page):
+        """检查页面仍然停留在可上传状态"""
+        try:
+            if page is None or page.is_closed():
+                return False
+            return page.evaluate("() => !!document.querySelector('.upload-input')")
+        except Exception:
+            return False
+
+    def reset(self):
+        """把当前页面重置为空白的上传图文表单"""
+        start = time.monotonic()
+        try:
+            if self.page is None or self.page.is_closed():
+                self.page = self._new_page()
+            self._prepare(self.page)
+            self.ready = True
+            self.last_error = None
+        except Exception as e:
+            self.ready = False
+            self.failures += 1
+            self.last_error = str(e)
+            raise
+        finally:
+            self.resets += 1
+            self.last_reset_seconds = time.monotonic() - start
+            logging.debug(f"发布页重置耗时 {self.last_reset_seconds:.2f}秒")
+        return self.page
+
+    def acquire(self):
+        """取得一个已就绪的发布页"""
+        if self.ready and self._is_healthy(self.page):
+            return self.page
+        if self.next_page is not None:
+            next_page, self.next_page = self.next_page, None
+            if self._is_healthy(next_page):
+                # 用预热好的页面替换已使用过的页面
+                if self.page is not None and not self.page.is_closed():
+                    self.page.close()
+                self.page = next_page
+                self.ready = True
+                return self.page
+            if not next_page.is_closed():
+                next_page.close()
+        return self.reset()
+
+    def release(self):
+        """当前页面已填好内容，交给用户检查，不再复用"""
+        self.ready = False
+
+    def prefetch_next(self):
+        """在用户检查当前文章时预先打开下一个发布页"""
+        if self.ready or self._is_healthy(self.next_page):
+            return
+        start = time.monotonic()
+        page = self._new_page()
+        try:
+            self._prepare(page)
+            self.next_page = page
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            logging.debug(f"预热发布页失败: {str(e)}")
+            page.close()
+        finally:
+            self.last_prefetch_seconds = time.monotonic() - start
+            self._show_current()
+
+    def _show_current(self):
+        """新开的标签页会切到前台，把用户正在检查的页面切回来"""
+        if self.page is None or self.page.is_closed():
+            return
+        try:
+            self.page.bring_to_front()
+        except Exception as e:
+            logging.debug(f"切换回发布页失败: {str(e)}")
+
+    def stats(self):
+        """返回发布页健康状态"""
+        return {
+            'ready': self.ready and self._is_healthy(self.page),
+            'next_ready': self._is_healthy(self.next_page),
+            'resets': self.resets,
+            'failures': self.failures,
+            'last_reset_seconds': self.last_reset_seconds,
+            'last_prefetch_seconds': self.last_prefetch_seconds,
+            'last_error': self.last_error,
+        }
+
+    def close(self):
+        """关闭发布页和预热的页面"""
+        for page in (self.page, self.next_page):
+            if page is not None and not page.is_closed():
+                page.close()
+        self.page = None
+        self.next_page = None
+        self.ready = False
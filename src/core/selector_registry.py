@@ -0,0 +1,239 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+from src.core.waiter import StepTimeoutError
+
+# 各页面元素的候选选择器，页面改版时在这里补充新的写法
+SELECTOR_GROUPS = {
+    'login.phone_input': [
+        "//input[@placeholder='手机号']",
+        "input[type='tel']",
+    ],
+    'login.send_code': [
+        ".css-uyobdj",
+        ".css-1vfl29",
+        "//button[text()='发送验证码']",
+        "text=发送验证码",
+    ],
+    'login.code_input': [
+        "//input[@placeholder='验证码']",
+        "input[maxlength='6']",
+    ],
+    'login.submit': [
+        ".beer-login-btn",
+        "button:has-text('登 录')",
+        "button:has-text('登录')",
+    ],
+    'publish.submit': [
+        ".el-button.publishBtn",
+        ".publishBtn",
+        "button:has-text('发布')",
+    ],
+}
+
+# 每次探测的默认超时(毫秒)
+PROBE_TIMEOUT = 5000
+
+# 探测次数达到这么多且从未命中的选择器视为失效
+BROKEN_MIN_PROBES = 3
+
+# 只有命中计数变化时，最多间隔多久写一次记录(秒)；命中的选择器变化时立即写入
+SAVE_INTERVAL = 60
+
+
+class SelectorRegistry:
+    """选择器注册表
+
+    同一个元素的所有候选选择器用 Locator.or_ 合并后一次等待，
+    不再逐个尝试、每个失败都等满超时。记住每个元素上次命中的选择器，
+    并统计各选择器命中率，保存在 ~/.xhs_system/selectors.json。
+    命中的选择器变化时立即写入，计数定时写入，退出时调用 save() 写入剩余的计数。
+    """
+
+    def __init__(self, groups=None, path=None):
+        self.groups = {name: list(candidates) for name, candidates in (groups or SELECTOR_GROUPS).items()}
+        home_dir = os.path.expanduser('~')
+        self.path = path or os.path.join(home_dir, '.xhs_system', 'selectors.json')
+        self.lock = threading.Lock()
+        self.save_lock = threading.Lock()  # 两个线程同时保存时按顺序写入，后写的总是较新的记录
+        self.winners = {}  # 元素名 -> 上次命中的选择器
+        self.counts = {}   # 元素名 -> {选择器: {'hits': n, 'misses': n}}
+        self.dirty = False
+        self.last_saved = time.monotonic()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.winners = data.get('winners', {})
+            self.counts = data.get('counts', {})
+        except Exception as e:
+            logging.debug(f"读取选择器记录失败: {str(e)}")
+
+    def save(self):
+        """原子写入命中记录，没有变化时不写盘"""
+        with self.save_lock:
+            self._save()
+
+    def _save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            # 在锁内序列化，避免其他线程同时修改计数
+            data = json.dumps({'winners': self.winners, 'counts': self.counts}, ensure_ascii=False, indent=2)
+            self.dirty = False
+            self.last_saved = time.monotonic()
+        directory = os.path.dirname(self.path)
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.selectors-', suffix='.json')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logging.debug(f"保存选择器记录失败: {str(e)}")
+            with self.lock:
+                self.dirty = True
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def candidates(self, name):
+        """候选选择器，上次命中的排在最前"""
+        candidates = list(self.groups[name])
+        winner = self.winners.get(name)
+        if winner in candidates:
+            candidates.remove(winner)
+            candidates.insert(0, winner)
+        return candidates
+
+    def combined(self, page, name):
+        """把所有候选合并成一个 Locator，返回 (locator, 候选列表)"""
+        candidates = self.candidates(name)
+        locator = page.locator(candidates[0])
+        for selector in candidates[1:]:
+            locator = locator.or_(page.locator(selector))
+        return locator.first, candidates
+
+    def record(self, name, matched, elapsed):
+        """记录一次探测结果
+
+        Args:
+            matched: 命中的选择器，按优先顺序排列，第一个作为本次使用的选择器；
+                     为空表示全部未命中
+        """
+        winner = matched[0] if matched else None
+        newly_broken = []
+        changed = False
+        with self.lock:
+            self.dirty = True
+            counts = self.counts.setdefault(name, {})
+            for selector in self.groups[name]:
+                entry = counts.setdefault(selector, {'hits': 0, 'misses': 0})
+                entry['hits' if selector in matched else 'misses'] += 1
+                if entry['hits'] == 0 and entry['misses'] == BROKEN_MIN_PROBES:
+                    newly_broken.append(selector)
+            if winner is not None:
+                if self.winners.get(name) != winner:
+                    logging.debug(f"元素 {name} 改用选择器 {winner}")
+                    changed = True
+                self.winners[name] = winner
+        if winner is None:
+            print(f"元素 {name} 的所有选择器都未命中，页面可能已改版")
+        else:
+            logging.debug(f"元素 {name} 命中 {winner}，耗时 {elapsed:.2f}秒")
+        for selector in newly_broken:
+            logging.warning(f"选择器可能已失效: {name} -> {selector}")
+        if changed or newly_broken or time.monotonic() - self.last_saved >= SAVE_INTERVAL:
+            self.save()
+
+    def resolve(self, page, name, timeout=PROBE_TIMEOUT, state='visible'):
+        """同时探测所有候选，返回命中的 Locator
+
+        Raises:
+            StepTimeoutError: 超时仍没有任何候选命中
+        """
+        locator, candidates = self.combined(page, name)
+        start = time.monotonic()
+        try:
+            locator.wait_for(state=state, timeout=timeout)
+        except PlaywrightTimeoutError:
+            self.record(name, [], time.monotonic() - start)
+            raise StepTimeoutError(name, timeout)
+        # 合并的 Locator 已出现，逐个检查各候选是否匹配(不等待)
+        matched = []
+        for selector in candidates:
+            candidate = page.locator(selector).first
+            if candidate.is_visible() if state == 'visible' else candidate.count() > 0:
+                matched.append(selector)
+        self.record(name, matched, time.monotonic() - start)
+        # 等待结束后元素又消失时，按合并的 Locator 返回
+        return page.locator(matched[0]).first if matched else locator
+
+    async def resolve_async(self, page, name, timeout=PROBE_TIMEOUT, state='visible'):
+        """resolve 的 asyncio 版本"""
+        locator, candidates = self.combined(page, name)
+        start = time.monotonic()
+        try:
+            await locator.wait_for(state=state, timeout=timeout)
+        except PlaywrightTimeoutError:
+            self.record(name, [], time.monotonic() - start)
+            raise StepTimeoutError(name, timeout)
+        matched = []
+        for selector in candidates:
+            candidate = page.locator(selector).first
+            if await candidate.is_visible() if state == 'visible' else await candidate.count() > 0:
+                matched.append(selector)
+        self.record(name, matched, time.monotonic() - start)
+        return page.locator(matched[0]).first if matched else locator
+
+    def stats(self):
+        """返回各元素下每个选择器的命中次数和命中率"""
+        result = {}
+        with self.lock:
+            for name, counts in self.counts.items():
+                result[name] = {}
+                for selector, entry in counts.items():
+                    probes = entry['hits'] + entry['misses']
+                    result[name][selector] = {
+                        'hits': entry['hits'],
+                        'misses': entry['misses'],
+                        'hit_rate': entry['hits'] / probes if probes else 0.0,
+                    }
+        return result
+
+    def broken(self, name):
+        """探测多次从未命中的选择器"""
+        counts = self.counts.get(name, {})
+        return [selector for selector, entry in counts.items()
+                if entry['hits'] == 0 and entry['misses'] >= BROKEN_MIN_PROBES]
+
+    def summary(self):
+        """返回命中率摘要文本"""
+        lines = []
+        for name, selectors in self.stats().items():
+            parts = [f"{selector} {entry['hit_rate']:.0%}" for selector, entry in selectors.items()]
+            lines.append(f"{name}: " + ", ".join(parts))
+        return "\n".join(lines)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_selector_registry():
+    """所有账号共享的选择器注册表"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = SelectorRegistry()
+        return _registry
@@ -0,0 +1,150 @@
+import logging
+import time
+from urllib.parse import urlsplit
+
+from src.core.site import SESSION_CHECK_PATH, creator_url
+
+# 用于校验登录状态的轻量接口，未登录时返回 401/403 或跳转到登录页
+SESSION_CHECK_URL = creator_url(SESSION_CHECK_PATH)
+
+# 创作者中心的登录态 cookie
+SESSION_COOKIE_NAMES = (
+    'galaxy_creator_session_id',
+    'customer-sso-sid',
+    'access-token-creator.xiaohongshu.com',
+    'web_session',
+)
+
+# 校验结果
+VALID = 'valid'
+INVALID = 'invalid'
+UNKNOWN = 'unknown'
+
+
+class SessionValidator:
+    """快速校验账号登录状态
+
+    先在本地检查登录态 cookie 是否存在且未过期，
+    再通过上下文的 request 接口发一个轻量的带登录态请求，
+    不需要加载登录页。结果按账号缓存 ttl 秒。
+    """
+
+    def __init__(self, ttl=300, check_url=SESSION_CHECK_URL, timeout=5000):
+        self.ttl = ttl
+        self.check_url = check_url
+        self.timeout = timeout
+        self._cache = {}  # 账号 -> (结果, 校验时间)
+
+    def check_local(self, cookies, now=None):
+        """根据 cookie 过期时间在本地判断登录态
+
+        Returns:
+            INVALID: 没有登录态 cookie 或已全部过期
+            UNKNOWN: 本地无法确定，需要请求服务端
+        """
+        now = now or time.time()
+        host = urlsplit(self.check_url).hostname or ''
+        session_cookies = [cookie for cookie in cookies
+                           if cookie.get('name') in SESSION_COOKIE_NAMES
+                           and cookie.get('domain')
+                           and host.endswith(cookie['domain'].lstrip('.'))]
+        if not session_cookies:
+            return INVALID
+        # expires 为 -1 表示会话 cookie
+        alive = [cookie for cookie in session_cookies
+                 if cookie.get('expires', -1) in (-1, None) or cookie['expires'] > now]
+        return UNKNOWN if alive else INVALID
+
+    def check_remote(self, context):
+        """通过上下文的 request 接口校验登录态，共享上下文的 cookie"""
+        try:
+            response = context.request.get(
+                self.check_url, timeout=self.timeout, max_redirects=0)
+        except Exception as e:
+            logging.debug(f"校验登录状态请求失败: {str(e)}")
+            return UNKNOWN
+        result = self._check_status(response.status)
+        if result is not None:
+            return result
+        try:
+            data = response.json()
+        except Exception:
+            return UNKNOWN
+        return self._check_data(data)
+
+    async def check_remote_async(self, context):
+        """check_remote 的 asyncio 版本，用于异步引擎的上下文"""
+        try:
+            response = await context.request.get(
+                self.check_url, timeout=self.timeout, max_redirects=0)
+        except Exception as e:
+            logging.debug(f"校验登录状态请求失败: {str(e)}")
+            return UNKNOWN
+        result = self._check_status(response.status)
+        if result is not None:
+            return result
+        try:
+            data = await response.json()
+        except Exception:
+            return UNKNOWN
+        return self._check_data(data)
+
+    def _check_status(self, status):
+        """根据状态码判断，需要继续解析响应内容时返回 None"""
+        if status in (401, 403) or 300 <= status < 400:
+            return INVALID
+        if status != 200:
+            return UNKNOWN
+        return None
+
+    def _check_data(self, data):
+        if data.get('success') is False or data.get('code') not in (None, 0):
+            return INVALID
+        return VALID
+
+    def _cached(self, account, force):
+        cached = self._cache.get(account)
+        if not force and cached and time.monotonic() - cached[1] < self.ttl:
+            return cached[0]
+        return None
+
+    def _remember(self, account, result, start):
+        logging.debug(f"账号 {account} 登录状态 {result}，校验耗时 {time.monotonic() - start:.2f}秒")
+        if result != UNKNOWN:
+            self._cache[account] = (result, time.monotonic())
+        return result
+
+    def check(self, context, account, force=False):
+        """校验账号登录态，优先使用缓存的结果"""
+        cached = self._cached(account, force)
+        if cached is not None:
+            return cached
+
+        start = time.monotonic()
+        result = self.check_local(context.cookies())
+        if result != INVALID:
+            result = self.check_remote(context)
+        return self._remember(account, result, start)
+
+    async def check_async(self, context, account, force=False):
+        """check 的 asyncio 版本"""
+        cached = self._cached(account, force)
+        if cached is not None:
+            return cached
+
+        start = time.monotonic()
+        result = self.check_local(await context.cookies())
+        if result != INVALID:
+            result = await self.check_remote_async(context)
+        return self._remember(account, result, start)
+
+    def mark(self, account, result):
+        """登录完成后直接写入缓存"""
+        self._cache[account] = (result, time.monotonic())
+
+    def invalidate(self, account=None):
+        """清除缓存"""
+        if account is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(account, None)
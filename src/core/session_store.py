@@ -0,0 +1,130 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+
+# 会话文件格式版本
+SESSION_VERSION = 1
+
+
+def get_account_dir(account):
+    """账号数据目录 ~/.xhs_system/accounts/<账号>"""
+    safe_name = re.sub(r'[^0-9A-Za-z_+\-]', '_', str(account))
+    path = os.path.join(os.path.expanduser('~'), '.xhs_system', 'accounts', safe_name)
+    if not os.path.exists(path):
+        os.makedirs(path)
+    return path
+
+
+def _digest(state):
+    return hashlib.sha256(
+        json.dumps(state, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+class SessionStore:
+    """账号会话存储
+
+    保存 Playwright storage state(cookies 和 localStorage)到
+    ~/.xhs_system/accounts/<账号>/session.json，带版本号，
+    原子写入，内容没有变化时不写盘。
+    """
+
+    def __init__(self, account):
+        self.account = str(account)
+        self.account_dir = get_account_dir(self.account)
+        self.path = os.path.join(self.account_dir, 'session.json')
+        self._last_digest = None
+
+    def load(self):
+        """读取 storage state，不存在时尝试迁移旧文件，返回 dict 或 None"""
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == SESSION_VERSION:
+                    state = data['storage_state']
+                    self._last_digest = _digest(state)
+                    return state
+                logging.debug(f"会话文件版本不支持: {data.get('version')}")
+            except Exception as e:
+                logging.debug(f"读取会话文件失败: {str(e)}")
+        return self._migrate()
+
+    def save(self, state):
+        """保存 storage state，内容没有变化时返回 False"""
+        digest = _digest(state)
+        if digest == self._last_digest:
+            return False
+        data = {
+            'version': SESSION_VERSION,
+            'account': self.account,
+            'updated_at': time.time(),
+            'storage_state': state,
+        }
+        # 先写临时文件再替换，避免写到一半时崩溃导致会话文件损坏
+        fd, tmp_path = tempfile.mkstemp(dir=self.account_dir, prefix='.session-', suffix='.json')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._last_digest = digest
+        return True
+
+    def save_context(self, context):
+        """从浏览器上下文读取并保存 storage state"""
+        try:
+            return self.save(context.storage_state())
+        except Exception as e:
+            logging.debug(f"保存账号 {self.account} 会话失败: {str(e)}")
+            return False
+
+    def clear(self):
+        """删除会话文件"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self._last_digest = None
+
+    def _migrate(self):
+        """迁移旧版本的 storage_state.json 和 cookies 文件"""
+        home_dir = os.path.expanduser('~')
+        legacy_path = os.path.join(home_dir, '.xhs_system', 'xiaohongshu_cookies.json')
+        candidates = [
+            os.path.join(self.account_dir, 'storage_state.json'),
+            os.path.join(self.account_dir, 'xiaohongshu_cookies.json'),
+            legacy_path,
+        ]
+        for path in candidates:
+            if not os.path.exists(path):
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except Exception as e:
+                logging.debug(f"读取旧会话文件失败 {path}: {str(e)}")
+                continue
+            if isinstance(data, list):
+                # 旧的 cookies 文件，补全必要字段
+                for cookie in data:
+                    cookie.setdefault('domain', '.xiaohongshu.com')
+                    cookie.setdefault('path', '/')
+                data = {'cookies': data, 'origins': []}
+            try:
+                self.save(data)
+                if path == legacy_path:
+                    # 单账号版本的 cookies 只迁移给第一个登录的账号
+                    os.replace(path, path + '.migrated')
+                logging.debug(f"已迁移旧会话文件: {path}")
+            except Exception as e:
+                # 目录只读或磁盘已满时仍使用读到的状态，下次加载时再迁移
+                logging.debug(f"迁移旧会话文件失败 {path}: {str(e)}")
+            return data
+        return None
@@ -0,0 +1,13 @@
+import os
+
+# 创作者中心地址，设置环境变量 XHS_CREATOR_BASE_URL 可以指向本地的替身站点(test/mock_creator_site.py)
+CREATOR_BASE_URL = os.environ.get('XHS_CREATOR_BASE_URL', 'https://creator.xiaohongshu.com').rstrip('/')
+
+LOGIN_PATH = "/login"
+PUBLISH_PATH = "/publish/publish?source=official"
+SESSION_CHECK_PATH = "/api/galaxy/creator/home/personal_info"
+
+
+def creator_url(path, base_url=None):
+    """拼接创作者中心的页面地址"""
+    return (base_url or CREATOR_BASE_URL).rstrip('/') + path
@@ -0,0 +1,112 @@
+import logging
+import os
+import re
+import time
+from contextlib import contextmanager
+
+
+class TraceRecorder:
+    """按需录制 Playwright trace
+
+    开启后每个登录/发布任务都录制截图、DOM 快照和网络请求，
+    只保留失败或耗时超过阈值的任务，保存在 ~/.xhs_system/traces，
+    超过数量或大小上限时删除最旧的文件。用 `playwright show-trace <文件>` 查看。
+    """
+
+    def __init__(self, enabled=False, threshold_seconds=60, max_traces=20,
+                 max_bytes=500 * 1024 * 1024, trace_dir=None):
+        self.enabled = enabled
+        self.threshold_seconds = threshold_seconds
+        self.max_traces = max_traces
+        self.max_bytes = max_bytes
+        home_dir = os.path.expanduser('~')
+        self.trace_dir = trace_dir or os.path.join(home_dir, '.xhs_system', 'traces')
+        self.last_trace = None  # 最近一次任务保存的 trace 文件
+        self.paused_seconds = 0.0  # 当前任务中等待用户的时间，不计入耗时
+        self.saved = 0
+        self.discarded = 0
+
+    @contextmanager
+    def record(self, context, name):
+        """录制一个任务，任务失败或超过阈值时保存"""
+        self.last_trace = None
+        self.paused_seconds = 0.0
+        if not self.enabled or context is None:
+            yield
+            return
+        try:
+            context.tracing.start(screenshots=True, snapshots=True)
+        except Exception as e:
+            # 同一个上下文已在录制(如批量发布中的嵌套调用)
+            logging.debug(f"开始录制 trace 失败: {str(e)}")
+            yield
+            return
+        start = time.monotonic()
+        failed = False
+        try:
+            yield
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._stop(context, name, time.monotonic() - start - self.paused_seconds, failed)
+
+    @contextmanager
+    def pause(self):
+        """等待用户操作(如输入验证码)的时间不计入任务耗时"""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.paused_seconds += time.monotonic() - start
+
+    def _stop(self, context, name, elapsed, failed):
+        try:
+            if not failed and elapsed < self.threshold_seconds:
+                context.tracing.stop()
+                self.discarded += 1
+                return
+            if not os.path.exists(self.trace_dir):
+                os.makedirs(self.trace_dir)
+            safe_name = re.sub(r'[^0-9A-Za-z_\-]', '_', name)
+            status = 'failed' if failed else 'slow'
+            path = os.path.join(
+                self.trace_dir,
+                f"{time.strftime('%Y%m%d-%H%M%S')}-{int(time.time() * 1000) % 1000:03d}"
+                f"_{safe_name}_{status}_{elapsed:.0f}s.zip")
+            context.tracing.stop(path=path)
+            self.last_trace = path
+            self.saved += 1
+            print(f"已保存 trace: {path}")
+            logging.info(f"任务 {name} {'失败' if failed else '较慢'}({elapsed:.1f}秒)，已保存 trace: {path}")
+            self._prune()
+        except Exception as e:
+            logging.debug(f"保存 trace 失败: {str(e)}")
+
+    def _prune(self):
+        """超过数量或大小上限时删除最旧的 trace"""
+        files = []
+        for name in os.listdir(self.trace_dir):
+            path = os.path.join(self.trace_dir, name)
+            if name.endswith('.zip') and os.path.isfile(path):
+                stat = os.stat(path)
+                files.append((stat.st_mtime, stat.st_size, path))
+        files.sort(reverse=True)
+        total = 0
+        for index, (_, size, path) in enumerate(files):
+            total += size
+            # 至少保留刚保存的一个
+            if index > 0 and (index >= self.max_traces or total > self.max_bytes):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def stats(self):
+        """返回录制统计"""
+        return {
+            'enabled': self.enabled,
+            'saved': self.saved,
+            'discarded': self.discarded,
+            'last_trace': self.last_trace,
+        }
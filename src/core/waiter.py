@@ -0,0 +1,224 @@
+import logging
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+# 默认单步超时(毫秒)
+DEFAULT_TIMEOUT = 15000
+
+# 各步骤超时(毫秒)，可在创建 PageWaiter 时覆盖
+DEFAULT_STEP_TIMEOUTS = {
+    'session_redirect': 5000,  # 已登录时从登录页跳走
+    'login_form': 15000,      # 登录表单出现
+    'send_code_ready': 5000,  # 发送验证码按钮可点击
+    'login_redirect': 60000,  # 登录后跳转离开登录页
+    'publish_entry': 15000,   # 发布页标签出现
+    'upload_form': 15000,     # 上传控件挂载
+    'upload': 120000,         # 图片上传请求全部完成
+    'editor_title': 30000,    # 标题输入框可用
+    'editor_body': 30000,     # 正文编辑器挂载
+    'publish_click': 30000,   # 发布按钮可点击
+    'publish_redirect': 30000,  # 点击发布后跳转到发布成功页
+}
+
+
+class StepTimeoutError(Exception):
+    """某个等待步骤超时"""
+
+    def __init__(self, step, timeout):
+        super().__init__(f"等待步骤 {step} 超时({timeout / 1000:.0f}秒)")
+        self.step = step
+        self.timeout = timeout
+
+
+class UploadTracker:
+    """跟踪页面上的上传请求，等待它们全部结束
+
+    用法:
+        with UploadTracker(page) as tracker:
+            file_chooser.set_files(images)
+            tracker.wait_idle(timeout)
+    """
+
+    def __init__(self, page, methods=('POST', 'PUT'), resource_types=('xhr', 'fetch')):
+        self.page = page
+        self.methods = methods
+        self.resource_types = resource_types
+        self.pending = set()
+        self.started = 0
+        self.finished = 0
+        self.failed = 0
+
+    def __enter__(self):
+        self.page.on('request', self._on_request)
+        self.page.on('requestfinished', self._on_finished)
+        self.page.on('requestfailed', self._on_failed)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.page.remove_listener('request', self._on_request)
+        self.page.remove_listener('requestfinished', self._on_finished)
+        self.page.remove_listener('requestfailed', self._on_failed)
+        return False
+
+    def _on_request(self, request):
+        if request.method in self.methods and request.resource_type in self.resource_types:
+            self.pending.add(request)
+            self.started += 1
+
+    def _on_finished(self, request):
+        if request in self.pending:
+            self.pending.discard(request)
+            self.finished += 1
+
+    def _on_failed(self, request):
+        if request in self.pending:
+            self.pending.discard(request)
+            self.failed += 1
+
+    def wait_idle(self, timeout, quiet_ms=500, grace_ms=2000):
+        """等待上传请求全部结束
+
+        Args:
+            timeout: 最长等待时间(毫秒)
+            quiet_ms: 没有进行中的请求并持续这么久才算上传结束
+            grace_ms: 如果一直没有上传请求发出，最多等待这么久
+        """
+        start = time.monotonic()
+        idle_since = None
+        while True:
+            elapsed = (time.monotonic() - start) * 1000
+            if self.pending:
+                idle_since = None
+            else:
+                if idle_since is None:
+                    idle_since = elapsed
+                if self.started and elapsed - idle_since >= quiet_ms:
+                    return
+                if not self.started and elapsed >= grace_ms:
+                    return
+            if elapsed >= timeout:
+                raise StepTimeoutError('upload', timeout)
+            # wait_for_timeout 会继续派发网络事件
+            self.page.wait_for_timeout(50)
+
+
+class PageWaiter:
+    """基于页面真实状态的显式等待，并记录每一步耗时"""
+
+    def __init__(self, timeouts=None):
+        self.timeouts = dict(DEFAULT_STEP_TIMEOUTS)
+        if timeouts:
+            self.timeouts.update(timeouts)
+        self.timings = []  # [{'step', 'start', 'seconds', 'ok'}]，start 为相对流程开始的秒数
+        self.started_at = time.monotonic()
+
+    def reset(self):
+        """清空耗时记录，每个流程开始时调用"""
+        self.timings = []
+        self.started_at = time.monotonic()
+
+    def timeout_for(self, step):
+        return self.timeouts.get(step, DEFAULT_TIMEOUT)
+
+    @contextmanager
+    def step(self, name):
+        """记录一个步骤的耗时"""
+        start = time.monotonic()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            elapsed = time.monotonic() - start
+            self.timings.append({
+                'step': name,
+                'start': start - self.started_at,
+                'seconds': elapsed,
+                'ok': ok,
+            })
+            logging.debug(f"步骤 {name} 耗时 {elapsed:.2f}秒{'' if ok else ' (失败)'}")
+
+    def _wait(self, step, func):
+        timeout = self.timeout_for(step)
+        with self.step(step):
+            try:
+                return func(timeout)
+            except PlaywrightTimeoutError:
+                raise StepTimeoutError(step, timeout)
+
+    def wait_visible(self, page, step, selector):
+        """等待元素可见"""
+        return self._wait(step, lambda timeout: page.wait_for_selector(
+            selector, state='visible', timeout=timeout))
+
+    def wait_attached(self, page, step, selector):
+        """等待元素挂载到DOM(用于隐藏的 file input 等)"""
+        return self._wait(step, lambda timeout: page.wait_for_selector(
+            selector, state='attached', timeout=timeout))
+
+    def wait_url(self, page, step, predicate):
+        """等待页面URL满足条件"""
+        return self._wait(step, lambda timeout: page.wait_for_url(
+            predicate, timeout=timeout))
+
+    def wait_uploads(self, page, step, action):
+        """执行 action 触发上传，并等待所有上传请求完成"""
+        timeout = self.timeout_for(step)
+        with self.step(step):
+            with UploadTracker(page) as tracker:
+                action()
+                tracker.wait_idle(timeout)
+        return tracker
+
+    def summary(self):
+        """返回耗时摘要文本"""
+        return ", ".join(f"{span['step']}={span['seconds']:.2f}s" for span in self.timings)
+
+
+def percentile(values, percent):
+    """最近秩法计算百分位数，values 已排序且不为空"""
+    rank = math.ceil(percent / 100 * len(values))
+    return values[max(0, min(len(values), rank) - 1)]
+
+
+class TimingStats:
+    """各步骤最近若干次耗时的滚动统计，用于发现页面改版导致的变慢"""
+
+    def __init__(self, window=50):
+        self.window = window
+        self.samples = {}  # 步骤名 -> deque[耗时秒数]
+        self.lock = threading.Lock()
+
+    def add_spans(self, spans):
+        """加入一次流程的所有步骤耗时，失败的步骤不计入"""
+        with self.lock:
+            for span in spans:
+                if not span.get('ok', True):
+                    continue
+                samples = self.samples.setdefault(span['step'], deque(maxlen=self.window))
+                samples.append(span['seconds'])
+
+    def summary(self):
+        """返回 {步骤名: {'count', 'p50', 'p95', 'last'}}"""
+        with self.lock:
+            result = {}
+            for step, samples in self.samples.items():
+                values = sorted(samples)
+                result[step] = {
+                    'count': len(values),
+                    'p50': percentile(values, 50),
+                    'p95': percentile(values, 95),
+                    'last': samples[-1],
+                }
+            return result
+
+    def text(self):
+        """返回按 p95 从慢到快排列的摘要文本"""
+        rows = sorted(self.summary().items(), key=lambda item: item[1]['p95'], reverse=True)
+        return "\n".join(f"{step}: p50 {stats['p50']:.2f}s / p95 {stats['p95']:.2f}s ({stats['count']}次)"
+                         for step, stats in rows)
@@ -1,16 +1,179 @@
 # 小红书的自动发稿
 from playwright.sync_api import sync_playwright
-import time
-import json
 import os
 import sys
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from PyQt6.QtWidgets import QInputDialog, QLineEdit
 from PyQt6.QtCore import QObject, pyqtSignal, QMetaObject, Qt, QThread, pyqtSlot
 from PyQt6.QtWidgets import QApplication
+
+from src.core.asset_cache import StaticAssetCache
+from src.core.batch import BatchReport, iter_drafts
+from src.core.browser_server import resolve_endpoint
+from src.core.context_pool import BrowserContextPool
+from src.core.network import build_profile
+from src.core.processor.upload_image import UploadImageOptimizer
+from src.core.publish_page import WarmPublishPage
+from src.core.selector_registry import get_selector_registry
+from src.core.session import INVALID, UNKNOWN, VALID, SessionValidator
+from src.core.site import LOGIN_PATH, PUBLISH_PATH, SESSION_CHECK_PATH, creator_url
+from src.core.tracing import TraceRecorder
+from src.core.waiter import PageWaiter, StepTimeoutError
 log_path = os.path.expanduser('~/Desktop/xhsai_error.log')
 logging.basicConfig(filename=log_path, level=logging.DEBUG)
 
+# 注入的 stealth 脚本
+STEALTH_JS = """
+(function(){
+    const originalQuery = window.navigator.permissions.query;
+    window.navigator.permissions.query = (parameters) => (
+        parameters.name === 'notifications' ?
+            Promise.resolve({ state: Notification.permission }) :
+            originalQuery(parameters)
+    );
+
+    const getParameter = WebGLRenderingContext.prototype.getParameter;
+    WebGLRenderingContext.prototype.getParameter = function(parameter) {
+        if (parameter === 37445) {
+            return 'Intel Open Source Technology Center';
+        }
+        if (parameter === 37446) {
+            return 'Mesa DRI Intel(R) HD Graphics (SKL GT2)';
+        }
+        return getParameter.apply(this, arguments);
+    };
+
+    const originalGetBoundingClientRect = Element.prototype.getBoundingClientRect;
+    Element.prototype.getBoundingClientRect = function() {
+        const rect = originalGetBoundingClientRect.apply(this, arguments);
+        rect.width = Math.round(rect.width);
+        rect.height = Math.round(rect.height);
+        return rect;
+    };
+
+    Object.defineProperty(navigator, 'webdriver', {
+        get: () => undefined
+    });
+
+    Object.defineProperty(navigator, 'plugins', {
+        get: () => [1, 2, 3, 4, 5]
+    });
+
+    Object.defineProperty(navigator, 'languages', {
+        get: () => ['zh-CN', 'zh']
+    });
+
+    window.chrome = {
+        runtime: {}
+    };
+})();
+"""
+
+
+def get_launch_args(headless=False):
+    """获取 Chromium 启动参数(打包后使用内置的浏览器)"""
+    # 获取可执行文件所在目录
+    launch_args = {
+        'headless': headless,
+        'args': [
+            '--no-sandbox',
+            '--disable-dev-shm-usage',
+            '--disable-gpu',
+            '--disable-extensions',
+            '--disable-infobars',
+            '--start-maximized',
+            '--ignore-certificate-errors',
+            '--ignore-ssl-errors'
+        ]
+    }
+    if headless:
+        # 无界面模式下没有窗口可以最大化
+        launch_args['args'].remove('--start-maximized')
+
+    chromium_path = None
+
+    if getattr(sys, 'frozen', False):
+        # 如果是打包后的可执行文件
+        executable_dir = os.path.dirname(sys.executable)
+        logging.debug(f"executable_dir: {executable_dir}")
+        if sys.platform == 'darwin':  # macOS系统
+            if 'XhsAi' in executable_dir:
+                # 如果在 DMG 中运行
+                browser_path = os.path.join(
+                    executable_dir, "ms-playwright")
+            else:
+                # 如果已经安装到应用程序文件夹
+                browser_path = os.path.join(
+                    executable_dir, "Contents", "MacOS", "ms-playwright")
+            logging.debug(f"浏览器路径: {browser_path}")
+            chromium_path = os.path.join(
+                browser_path, "chromium-1161/chrome-mac/Chromium.app/Contents/MacOS/Chromium")
+        else:
+            # Windows系统
+            executable_dir = sys._MEIPASS
+            print(f"临时解压目录: {executable_dir}")
+            browser_path = os.path.join(executable_dir, "ms-playwright")
+            print(f"浏览器路径: {browser_path}")
+            chromium_path = os.path.join(
+                browser_path, "chrome-win", "chrome.exe")
+            logging.debug(f"Chromium 路径: {chromium_path}")
+    logging.debug(f"Chromium 路径: {chromium_path}")
+    if chromium_path:
+        # 确保浏览器文件存在且有执行权限
+        if os.path.exists(chromium_path):
+            os.chmod(chromium_path, 0o755)
+            launch_args['executable_path'] = chromium_path
+        else:
+            raise Exception(f"浏览器文件不存在: {chromium_path}")
+
+    return launch_args
+
+
+def launch_browser(playwright, headless=False, endpoint=None):
+    """启动 Chromium，配置了 endpoint 时优先连接已经启动的浏览器
+
+    Args:
+        headless: 是否无界面启动
+        endpoint: 为空时直接启动；auto 时连接 browser_server 启动的浏览器；
+                  也可以是 ws:// 或 http:// 地址，连接失败时改为启动新浏览器
+    """
+    endpoint = resolve_endpoint(endpoint)
+    if endpoint:
+        try:
+            if endpoint.startswith('ws'):
+                browser = playwright.chromium.connect(endpoint)
+            else:
+                browser = playwright.chromium.connect_over_cdp(endpoint)
+            print(f"已连接到浏览器: {endpoint}")
+            logging.debug(f"已连接到浏览器: {endpoint}")
+            return browser
+        except Exception as e:
+            logging.debug(f"连接浏览器 {endpoint} 失败，改为启动新浏览器: {str(e)}")
+    return playwright.chromium.launch(**get_launch_args(headless))
+
+
+def create_context_pool(browser, max_contexts=1, network_profile='light', network_rules=None,
+                        asset_cache=None):
+    """创建多账号上下文池，所有上下文共享同一个 Chromium
+
+    Args:
+        network_profile: 请求拦截配置名称 off/light/aggressive
+        network_rules: 覆盖拦截配置中的字段，如 throttle
+        asset_cache: 共享的 StaticAssetCache，为空时不缓存静态资源
+    """
+    return BrowserContextPool(
+        browser,
+        max_contexts=max_contexts,
+        context_options={'permissions': ['geolocation']},  # 自动允许位置信息访问
+        init_scripts=[STEALTH_JS],
+        network_profile=build_profile(network_profile, network_rules),
+        asset_cache=asset_cache,
+    )
+
+
 class VerificationCodeHandler(QObject):
     code_received = pyqtSignal(str)
     
@@ -42,259 +205,159 @@ class VerificationCodeHandler(QObject):
             self.code = ""
 
 class XiaohongshuPoster:
-    def __init__(self):
+    def __init__(self, account="default", pool=None, headless=False, endpoint=None,
+                 image_optimizer=None, base_url=None, tracer=None):
+        """
+        Args:
+            account: 账号标识(手机号)，每个账号使用独立的浏览器上下文
+            pool: 共享的 BrowserContextPool，为空时自行启动浏览器
+            headless: 自行启动浏览器时是否无界面
+            endpoint: 自行启动浏览器时优先连接的浏览器地址，见 launch_browser
+            image_optimizer: 上传前处理图片的 UploadImageOptimizer，可在多个账号间共享
+            base_url: 创作者中心地址，为空时使用 CREATOR_BASE_URL
+            tracer: 录制 Playwright trace 的 TraceRecorder，为空时不录制
+        """
+        self.account = str(account)
+        self.pool = pool
+        self.headless = headless
+        self.endpoint = endpoint
+        self.owns_browser = pool is None
         self.playwright = None
         self.browser = None
         self.context = None
         self.page = None
+        self.publish_page = None
+        self.crashed = False
         self.verification_handler = VerificationCodeHandler()
+        self.waiter = PageWaiter()
+        self.login_url = creator_url(LOGIN_PATH, base_url)
+        self.publish_url = creator_url(PUBLISH_PATH, base_url)
+        self.session_validator = SessionValidator(check_url=creator_url(SESSION_CHECK_PATH, base_url))
+        self.selectors = get_selector_registry()
+        self.image_optimizer = image_optimizer or UploadImageOptimizer()
+        self.tracer = tracer or TraceRecorder()
         self.initialize()
 
     def initialize(self):
         """初始化浏览器"""
-        if self.playwright is not None:
+        if self.context is not None:
             return
             
         try:
-            print("开始初始化Playwright...")
-            self.playwright = sync_playwright().start()
-
-            # 获取可执行文件所在目录
-            launch_args = {
-                'headless': False,
-                'args': [
-                    '--no-sandbox',
-                    '--disable-dev-shm-usage',
-                    '--disable-gpu',
-                    '--disable-extensions',
-                    '--disable-infobars',
-                    '--start-maximized',
-                    '--ignore-certificate-errors',
-                    '--ignore-ssl-errors'
-                ]
-            }
-
-            chromium_path = None
-
-            if getattr(sys, 'frozen', False):
-                # 如果是打包后的可执行文件
-                executable_dir = os.path.dirname(sys.executable)
-                logging.debug(f"executable_dir: {executable_dir}")
-                if sys.platform == 'darwin':  # macOS系统
-                    if 'XhsAi' in executable_dir:
-                        # 如果在 DMG 中运行
-                        browser_path = os.path.join(
-                            executable_dir, "ms-playwright")
-                    else:
-                        # 如果已经安装到应用程序文件夹
-                        browser_path = os.path.join(
-                            executable_dir, "Contents", "MacOS", "ms-playwright")
-                    logging.debug(f"浏览器路径: {browser_path}")
-                    chromium_path = os.path.join(
-                        browser_path, "chromium-1161/chrome-mac/Chromium.app/Contents/MacOS/Chromium")
-                else:
-                    # Windows系统
-                    executable_dir = sys._MEIPASS
-                    print(f"临时解压目录: {executable_dir}")
-                    browser_path = os.path.join(executable_dir, "ms-playwright")
-                    print(f"浏览器路径: {browser_path}")
-                    chromium_path = os.path.join(
-                        browser_path, "chrome-win", "chrome.exe")
-                    logging.debug(f"Chromium 路径: {chromium_path}")
-            logging.debug(f"Chromium 路径: {chromium_path}")
-            if chromium_path:
-                # 确保浏览器文件存在且有执行权限
-                if os.path.exists(chromium_path):
-                    os.chmod(chromium_path, 0o755)
-                    launch_args['executable_path'] = chromium_path
-                else:
-                    raise Exception(f"浏览器文件不存在: {chromium_path}")
-
-            # 获取默认的 Chromium 可执行文件路径
-            self.browser = self.playwright.chromium.launch(**launch_args)
-            # 创建新的上下文时设置权限
-            self.context = self.browser.new_context(
-                permissions=['geolocation']  # 自动允许位置信息访问
-            )
-            self.page = self.context.new_page()
-            
-            # 注入stealth.min.js
-            stealth_js = """
-            (function(){
-                const originalQuery = window.navigator.permissions.query;
-                window.navigator.permissions.query = (parameters) => (
-                    parameters.name === 'notifications' ?
-                        Promise.resolve({ state: Notification.permission }) :
-                        originalQuery(parameters)
-                );
-                
-                const getParameter = WebGLRenderingContext.prototype.getParameter;
-                WebGLRenderingContext.prototype.getParameter = function(parameter) {
-                    if (parameter === 37445) {
-                        return 'Intel Open Source Technology Center';
-                    }
-                    if (parameter === 37446) {
-                        return 'Mesa DRI Intel(R) HD Graphics (SKL GT2)';
-                    }
-                    return getParameter.apply(this, arguments);
-                };
-                
-                const originalGetBoundingClientRect = Element.prototype.getBoundingClientRect;
-                Element.prototype.getBoundingClientRect = function() {
-                    const rect = originalGetBoundingClientRect.apply(this, arguments);
-                    rect.width = Math.round(rect.width);
-                    rect.height = Math.round(rect.height);
-                    return rect;
-                };
-                
-                Object.defineProperty(navigator, 'webdriver', {
-                    get: () => undefined
-                });
-                
-                Object.defineProperty(navigator, 'plugins', {
-                    get: () => [1, 2, 3, 4, 5]
-                });
-                
-                Object.defineProperty(navigator, 'languages', {
-                    get: () => ['zh-CN', 'zh']
-                });
-                
-                window.chrome = {
-                    runtime: {}
-                };
-            })();
-            """
-            self.page.add_init_script(stealth_js)
-            
-            print("浏览器启动成功！")
-            logging.debug("浏览器启动成功！")
-            
-            # 获取用户主目录
-            home_dir = os.path.expanduser('~')
-            app_dir = os.path.join(home_dir, '.xhs_system')
-            if not os.path.exists(app_dir):
-                os.makedirs(app_dir)
-
-            # 设置token和cookies文件路径
-            self.token_file = os.path.join(app_dir, "xiaohongshu_token.json")
-            self.cookies_file = os.path.join(app_dir, "xiaohongshu_cookies.json")
-            self.token = self._load_token()
-            self._load_cookies()
+            if self.pool is None:
+                print("开始初始化Playwright...")
+                self.playwright = sync_playwright().start()
+                self.browser = launch_browser(self.playwright, self.headless, self.endpoint)
+                self.pool = create_context_pool(self.browser, asset_cache=StaticAssetCache())
+                print("浏览器启动成功！")
+                logging.debug("浏览器启动成功！")
+            else:
+                self.browser = self.pool.browser
+
+            self._attach_context()
+            # 上下文已从账号的会话存储创建，无需再加载cookies
+            self.pool.release(self.account)
 
         except Exception as e:
             print(f"初始化过程中出现错误: {str(e)}")
             logging.debug(f"初始化过程中出现错误: {str(e)}")
-            self.close()  # 确保资源被正确释放
+            self.close(force=True)  # 确保资源被正确释放
             raise
 
-    def _load_token(self):
-        """从文件加载token"""
-        if os.path.exists(self.token_file):
-            try:
-                with open(self.token_file, 'r') as f:
-                    token_data = json.load(f)
-                    # 检查token是否过期
-                    if token_data.get('expire_time', 0) > time.time():
-                        return token_data.get('token')
-            except:
-                pass
-        return None
-
-    def _save_token(self, token):
-        """保存token到文件"""
-        token_data = {
-            'token': token,
-            # token有效期设为30天
-            'expire_time': time.time() + 30 * 24 * 3600
-        }
-        with open(self.token_file, 'w') as f:
-            json.dump(token_data, f)
-
-    def _load_cookies(self):
-        """从文件加载cookies"""
-        if os.path.exists(self.cookies_file):
-            try:
-                with open(self.cookies_file, 'r') as f:
-                    cookies = json.load(f)
-                    # 确保cookies包含必要的字段
-                    for cookie in cookies:
-                        if 'domain' not in cookie:
-                            cookie['domain'] = '.xiaohongshu.com'
-                        if 'path' not in cookie:
-                            cookie['path'] = '/'
-                    self.context.add_cookies(cookies)
-            except Exception as e:
-                logging.debug(f"加载cookies失败: {str(e)}")
-
-    def _save_cookies(self):
-        """保存cookies到文件"""
+    def _attach_context(self):
+        """从上下文池取得本账号的上下文，并打开页面"""
+        self.context = self.pool.acquire(self.account)
+        self.page = self.context.new_page()
+        self.page.on('crash', self._on_page_crash)
+        self.crashed = False
+        # 发布页使用独立的标签页，self.page 只用于登录和会话检查
+        self.publish_page = WarmPublishPage(self.context, self.waiter, self.publish_url,
+                                            on_new_page=lambda page: page.on('crash', self._on_page_crash))
+
+    def _on_page_crash(self, page):
+        logging.debug(f"账号 {self.account} 的页面已崩溃")
+        self.crashed = True
+
+    @contextmanager
+    def _account_context(self):
+        """操作期间把账号标记为使用中，避免上下文被淘汰"""
+        self.ensure_browser()  # 确保浏览器已初始化
+        self.pool.acquire(self.account)
         try:
-            cookies = self.context.cookies()
-            with open(self.cookies_file, 'w') as f:
-                json.dump(cookies, f)
-        except Exception as e:
-            logging.debug(f"保存cookies失败: {str(e)}")
+            yield
+        finally:
+            self.pool.release(self.account)
 
     def login(self, phone, country_code="+86"):
         """登录小红书"""
-        self.ensure_browser()  # 确保浏览器已初始化
-        # 如果token有效则直接返回
-        if self.token:
-            return
+        with self._account_context(), self.tracer.record(self.context, 'login'):
+            self._login(phone, country_code)
 
-        # 尝试加载cookies进行登录
-        self.page.goto("https://creator.xiaohongshu.com/login", wait_until="networkidle")
-        # 先清除所有cookies
-        self.context.clear_cookies()
-        
-        # 重新加载cookies
-        self._load_cookies()
-        # 刷新页面并等待加载完成
-        self.page.reload(wait_until="networkidle")
-
-        # 检查是否已经登录
-        current_url = self.page.url
-        if "login" not in current_url:
-            print("使用cookies登录成功")
-            self.token = self._load_token()
-            self._save_cookies()
+    def _login(self, phone, country_code="+86"):
+        self.waiter.reset()
+        # 先在本地检查cookie，再用一个轻量请求校验登录态，不加载登录页
+        with self.waiter.step('session_check'):
+            session = self.session_validator.check(self.context, self.account)
+            if session == UNKNOWN:
+                session = self._check_session_by_page()
+                self.session_validator.mark(self.account, session)
+        if session == VALID:
+            print("使用已保存的登录状态")
+            self.pool.save_state(self.account)
             return
-        else:
-            # 清理无效的cookies
-            self.context.clear_cookies()
-            
+        # 清理无效的cookies
+        self.context.clear_cookies()
+
         # 如果cookies登录失败，则进行手动登录
-        self.page.goto("https://creator.xiaohongshu.com/login")
-        time.sleep(1)
+        with self.waiter.step('goto_login'):
+            self.page.goto(self.login_url)
+        with self.waiter.step('login_form'):
+            phone_input = self.selectors.resolve(
+                self.page, 'login.phone_input', self.waiter.timeout_for('login_form'))
 
         # 输入手机号
-        self.page.fill("//input[@placeholder='手机号']", phone)
+        with self.waiter.step('fill_phone'):
+            phone_input.fill(phone)
 
-        time.sleep(2)
-        # 点击发送验证码按钮
+        # 同时探测发送验证码按钮的所有候选选择器
         try:
-            self.page.click(".css-uyobdj")
-        except:
-            try:
-                self.page.click(".css-1vfl29")
-            except:
-                try:
-                    self.page.click("//button[text()='发送验证码']")
-                except:
-                    print("无法找到发送验证码按钮")
+            with self.waiter.step('send_code'):
+                self.selectors.resolve(
+                    self.page, 'login.send_code', self.waiter.timeout_for('send_code_ready')).click()
+        except StepTimeoutError as e:
+            logging.debug(str(e))
+            print("无法找到发送验证码按钮")
 
-        # 使用信号机制获取验证码
-        verification_code = self.verification_handler.get_verification_code()
-        if verification_code:
-            self.page.fill("//input[@placeholder='验证码']", verification_code)
+        # 使用信号机制获取验证码，等待用户输入的时间不计入 trace 耗时
+        with self.waiter.step('verification_code'), self.tracer.pause():
+            verification_code = self.verification_handler.get_verification_code()
 
-        # 点击登录按钮
-        self.page.click(".beer-login-btn")
+        # 输入验证码并点击登录按钮
+        with self.waiter.step('submit_login'):
+            if verification_code:
+                self.selectors.resolve(self.page, 'login.code_input').fill(verification_code)
+            self.selectors.resolve(self.page, 'login.submit').click()
 
-        # 等待登录成功
-        time.sleep(3)
-        # 保存cookies
-        self._save_cookies()
+        # 等待登录成功，页面跳转离开登录页
+        try:
+            self.waiter.wait_url(self.page, 'login_redirect', lambda url: "login" not in url)
+        except StepTimeoutError as e:
+            logging.debug(str(e))
+        logging.debug(f"登录耗时: {self.waiter.summary()}")
+        logging.debug(f"选择器命中率:\n{self.selectors.summary()}")
+        # 保存会话，没有变化时不写盘
+        self.pool.save_state(self.account)
+        self.session_validator.mark(
+            self.account, VALID if "login" not in self.page.url else INVALID)
+
+    def _check_session_by_page(self):
+        """接口无法确定登录态时，打开登录页看是否被跳转"""
+        self.page.goto(self.login_url, wait_until="domcontentloaded")
+        try:
+            self.waiter.wait_url(self.page, 'session_redirect', lambda url: "login" not in url)
+            return VALID
+        except StepTimeoutError:
+            return INVALID
 
     def post_article(self, title, content, images=None):
         """发布文章
@@ -303,37 +366,127 @@ class XiaohongshuPoster:
             content: 文章内容
             images: 图片路径列表
         """
-        self.ensure_browser()  # 确保浏览器已初始化
-        print("点击发布按钮")
-        # 点击发布按钮
-        self.page.click(".btn.el-tooltip__trigger.el-tooltip__trigger")
-
-        # 切换到上传图文
-        time.sleep(1)
-        tabs = self.page.query_selector_all(".creator-tab")
-        if len(tabs) > 1:
-            tabs[1].click()
-        time.sleep(1)
-
-        # 上传图片
+        self.waiter.reset()
+        # 上传前缩小并重新编码图片，处理结果有缓存
+        with self.waiter.step('prepare_images'):
+            images = self.image_optimizer.prepare(images)
+        with self._account_context(), self.tracer.record(self.context, 'post_article'):
+            self._post_article(title, content, images)
+
+    def _post_article(self, title, content, images=None, publish=False):
+        # 取得预热好的发布页，已切换到上传图文
+        with self.waiter.step('publish_page'):
+            page = self.publish_page.acquire()
+
+        # 上传图片，等待上传请求全部完成
         if images:
-            with self.page.expect_file_chooser() as fc_info:
-                self.page.click(".upload-input")
-            file_chooser = fc_info.value
-            file_chooser.set_files(images)
-            time.sleep(1)
+            def upload():
+                with page.expect_file_chooser() as fc_info:
+                    page.click(".upload-input")
+                file_chooser = fc_info.value
+                file_chooser.set_files(images)
+            self.waiter.wait_uploads(page, 'upload', upload)
+
+        # 等待编辑器可用
+        self.waiter.wait_visible(page, 'editor_title', ".d-text")
+        self.waiter.wait_attached(page, 'editor_body', ".ql-editor")
+
+        # 输入标题和内容
+        with self.waiter.step('fill_title'):
+            page.fill(".d-text", title)
+        with self.waiter.step('fill_content'):
+            page.fill(".ql-editor", content)
+
+        # 预览时由用户检查后手动发布；批量发布时直接发布，等待跳转到发布成功页
+        if publish:
+            with self.waiter.step('publish_click'):
+                self.selectors.resolve(
+                    page, 'publish.submit', self.waiter.timeout_for('publish_click')).click()
+            self.waiter.wait_url(page, 'publish_redirect', lambda url: "published=true" in url)
+
+        # 当前页面交给用户检查或已发布，下次发文重新准备发布页
+        self.publish_page.release()
+        logging.debug(f"发布耗时: {self.waiter.summary()}")
 
-        time.sleep(3)
-        # 输入标题
-        self.page.fill(".d-text", title)
+    def post_batch(self, drafts, publish=False, prepare=None, on_progress=None):
+        """批量发布
 
-        # 输入内容
-        print(content)
-        self.page.fill(".ql-editor", content)
+        在同一个发布页中依次发布，上传当前一篇时在后台准备下一篇的图片。
 
-        # 发布
-        time.sleep(1)
-        # self.page.click(".el-button.publishBtn")
+        Args:
+            drafts: JSONL 文件路径，或 {"title", "content", "images"} 的可迭代对象
+            publish: 是否点击发布，为 False 时只填写内容，此时只能有一篇草稿，
+                因为下一篇会在同一个发布页中覆盖前一篇
+            prepare: 图片准备函数，在后台线程中执行，默认使用 image_optimizer
+            on_progress: 每篇完成后回调，参数为该篇的统计
+        Returns:
+            BatchReport 的摘要字典
+        """
+        report = BatchReport()
+        drafts = iter_drafts(drafts)
+        prepare = prepare or self.image_optimizer.prepare
+
+        def prepare_draft(draft):
+            start = time.monotonic()
+            if 'error' in draft:
+                raise ValueError(draft['error'])
+            if 'image_error' in draft:
+                raise ValueError(f"草稿图片未下载: {draft['image_error']}")
+            return prepare(draft.get('images')), time.monotonic() - start
+
+        draft = next(drafts, None)
+        next_draft = next(drafts, None) if draft is not None else None
+        if not publish and next_draft is not None:
+            raise ValueError("只填写不发布时一次只能处理一篇草稿，否则后一篇会覆盖前一篇")
+
+        with self._account_context(), ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(prepare_draft, draft) if draft is not None else None
+            index = 0
+            while draft is not None:
+                # 先提交下一篇的图片准备，与当前一篇的上传并行
+                next_future = executor.submit(prepare_draft, next_draft) if next_draft is not None else None
+                title = draft.get('title', '')
+                images, prepare_seconds, error = [], 0.0, None
+                start = time.monotonic()
+                self.waiter.reset()
+                try:
+                    images, prepare_seconds = future.result()
+                    start = time.monotonic()
+                    with self.tracer.record(self.context, f'batch_{index + 1}'):
+                        self._post_article(title, draft.get('content', ''), images, publish=publish)
+                except Exception as e:
+                    error = str(e)
+                    print(f"第 {index + 1} 篇发布失败: {error}")
+                    self.publish_page.release()
+                    # 页面崩溃时重新创建上下文，继续发布后面的草稿
+                    if not self.is_healthy():
+                        self.recover()
+                entry = report.add(index, title, len(images), prepare_seconds,
+                                   time.monotonic() - start, error, list(self.waiter.timings),
+                                   published=publish)
+                if on_progress:
+                    on_progress(entry)
+                draft, future = next_draft, next_future
+                next_draft = next(drafts, None) if draft is not None else None
+                index += 1
+        report.finish()
+        print(f"批量发布完成: {report.text()}")
+        return report.summary()
+
+    def network_stats(self):
+        """返回本账号当前会话的请求拦截统计"""
+        router = self.pool.routers.get(self.account) if self.pool else None
+        return router.stats() if router else {}
+
+    def prefetch_publish_page(self):
+        """预先打开下一个发布页，返回发布页状态"""
+        if self.publish_page is None:
+            return {}
+        try:
+            self.publish_page.prefetch_next()
+        except Exception as e:
+            logging.debug(f"预热发布页失败: {str(e)}")
+        return self.publish_page.stats()
 
     def close(self, force=False):
         """关闭浏览器
@@ -342,20 +495,57 @@ class XiaohongshuPoster:
         """
         try:
             if force:
-                if self.context:
-                    self.context.close()
-                if self.browser:
-                    self.browser.close()
-                if self.playwright:
-                    self.playwright.stop()
+                if self.publish_page:
+                    self.publish_page.close()
+                if self.owns_browser:
+                    if self.pool:
+                        self.pool.close()
+                    if self.browser:
+                        self.browser.close()
+                    if self.playwright:
+                        self.playwright.stop()
+                    self.pool = None
+                elif self.pool:
+                    # 共享浏览器时只关闭本账号的上下文
+                    self.pool.evict(self.account)
                 self.playwright = None
                 self.browser = None
                 self.context = None
                 self.page = None
+                self.publish_page = None
         except Exception as e:
             logging.debug(f"关闭浏览器时出错: {str(e)}")
 
+    def is_healthy(self):
+        """廉价的存活探测：浏览器仍然连接，页面没有崩溃并且可以执行脚本"""
+        if self.context is None:
+            return True
+        if self.browser is None or not self.browser.is_connected():
+            return False
+        if not self.pool.is_alive(self.account):
+            return True  # 上下文被淘汰，下次使用时重新创建
+        # self.page 只用于登录，发布页替换标签页时不会关闭它；
+        # 发布页崩溃通过 on_new_page 注册的监听记录在 self.crashed
+        if self.crashed or self.page is None or self.page.is_closed():
+            return False
+        try:
+            return self.page.evaluate("() => 1") == 1
+        except Exception as e:
+            logging.debug(f"账号 {self.account} 页面探测失败: {str(e)}")
+            return False
+
+    def recover(self):
+        """丢弃失效的上下文，从保存的会话重新创建"""
+        if self.pool.is_alive(self.account):
+            # 页面崩溃时上下文通常仍可读取，淘汰前会保存最新状态
+            self.pool.evict(self.account)
+        self._attach_context()
+        self.pool.release(self.account)
+
     def ensure_browser(self):
-        """确保浏览器已初始化"""
-        if not self.playwright:
+        """确保浏览器已初始化，账号上下文被淘汰后重新创建"""
+        if self.context is None:
             self.initialize()
+        elif not self.pool.is_alive(self.account):
+            self._attach_context()
+            self.pool.release(self.account)
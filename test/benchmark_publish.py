@@ -0,0 +1,81 @@
+# 在本地替身站点上测量登录和批量发布的耗时，不需要网络和真实账号
+#
+# 用法: python test/benchmark_publish.py --posts 10 --latency 50 --upload-latency 200
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from rich import print as rprint
+
+# 将项目根目录添加到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from PIL import Image
+
+from mock_creator_site import MockCreatorSite
+from src.core.session_store import SessionStore
+from src.core.write_xiaohongshu import XiaohongshuPoster
+
+ACCOUNT = "benchmark"
+
+
+class FixedVerificationCode:
+    """替代弹窗，直接返回固定的验证码"""
+
+    def get_verification_code(self):
+        return "123456"
+
+
+def make_images(directory, count, size=(3000, 4000)):
+    """生成测试用的大图"""
+    images = []
+    for i in range(count):
+        path = os.path.join(directory, f"image_{i}.png")
+        Image.new('RGB', size, (i * 40 % 256, 120, 200)).save(path)
+        images.append(path)
+    return images
+
+
+def main():
+    parser = argparse.ArgumentParser(description="发布流程基准测试")
+    parser.add_argument('--posts', type=int, default=5, help="发布篇数")
+    parser.add_argument('--images', type=int, default=3, help="每篇图片数")
+    parser.add_argument('--latency', type=int, default=0, help="每个请求的延迟(毫秒)")
+    parser.add_argument('--upload-latency', type=int, default=0, help="每张图片上传的延迟(毫秒)")
+    parser.add_argument('--headed', action='store_true', help="显示浏览器窗口")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='xhs_benchmark_')
+    images = make_images(work_dir, args.images)
+    drafts = [{'title': f"测试标题{i}", 'content': f"测试内容{i}", 'images': images}
+              for i in range(args.posts)]
+
+    with MockCreatorSite(args.latency, args.upload_latency) as site:
+        rprint(f"替身站点: {site.base_url}")
+        # 清除上次的会话，每次都完整走一遍登录流程
+        SessionStore(ACCOUNT).clear()
+        start = time.monotonic()
+        poster = XiaohongshuPoster(account=ACCOUNT, headless=not args.headed,
+                                   base_url=site.base_url)
+        poster.verification_handler = FixedVerificationCode()
+        rprint(f"启动浏览器: {time.monotonic() - start:.2f}秒")
+        try:
+            start = time.monotonic()
+            poster.login("13800000000")
+            rprint(f"登录: {time.monotonic() - start:.2f}秒 ({poster.waiter.summary()})")
+
+            report = poster.post_batch(drafts, publish=True)
+            for post in report['posts']:
+                rprint(f"  第 {post['index'] + 1} 篇: 准备图片 {post['prepare_seconds']:.2f}秒，"
+                       f"发布 {post['post_seconds']:.2f}秒 {post['error'] or ''}")
+            rprint(f"发布 {report['succeeded']}/{report['count']} 篇，用时 {report['total_seconds']:.2f}秒，"
+                   f"平均每篇 {report['avg_post_seconds']:.2f}秒，{report['posts_per_minute']:.1f} 篇/分钟")
+            rprint(f"上传 {site.uploads} 张图片，共 {site.upload_bytes / 1024:.0f}KB，"
+                   f"站点收到 {site.requests} 个请求，发布 {len(site.published)} 篇")
+        finally:
+            poster.close(force=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# 在本地替身服务上测量内容生成的吞吐量和尾延迟，不需要网络
+#
+# 用法: python test/benchmark_workflow.py --requests 100 --concurrency 1,4,8,16 --latency 500 --error-rate 0.05
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from rich import print as rprint
+
+# 将项目根目录添加到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mock_workflow_server import MockWorkflowServer
+from src.core.processor.workflow import CircuitBreaker, ContentCache, WorkflowClient
+from src.core.waiter import percentile
+
+
+def run_level(server, concurrency, requests, stream, cache_dir):
+    """以指定并发数生成 requests 篇，每篇主题不同，不命中缓存"""
+    client = WorkflowClient(url=server.url, cache=ContentCache(cache_dir=cache_dir), backoff=0.2,
+                            breaker=CircuitBreaker(failure_threshold=requests + 1),
+                            max_connections=concurrency)
+    generate = client.generate_stream if stream else client.generate
+
+    def one(i):
+        start = time.monotonic()
+        try:
+            generate(f"并发{concurrency}主题{i}", "标题", "作者")
+            return time.monotonic() - start, None
+        except Exception as e:
+            return time.monotonic() - start, str(e)
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(one, range(requests)))
+    total_seconds = time.monotonic() - start
+    latencies = sorted(seconds for seconds, error in results if error is None)
+    return {
+        'concurrency': concurrency,
+        'succeeded': len(latencies),
+        'failed': len(results) - len(latencies),
+        'retried': client.stats()['retried'],
+        'total_seconds': total_seconds,
+        'per_second': len(latencies) / total_seconds if total_seconds else 0.0,
+        'p50': percentile(latencies, 50) if latencies else 0.0,
+        'p95': percentile(latencies, 95) if latencies else 0.0,
+        'p99': percentile(latencies, 99) if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="内容生成基准测试")
+    parser.add_argument('--requests', type=int, default=40, help="每个并发级别的生成篇数")
+    parser.add_argument('--concurrency', default="1,4,8,16", help="逗号分隔的并发级别")
+    parser.add_argument('--latency', type=int, default=300, help="服务端生成延迟(毫秒)")
+    parser.add_argument('--chunk-delay', type=int, default=0, help="流式输出每个事件的间隔(毫秒)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="服务端返回 503 的比例")
+    parser.add_argument('--images', type=int, default=3, help="每个结果的图片数")
+    parser.add_argument('--paragraphs', type=int, default=5, help="正文段落数")
+    parser.add_argument('--stream', action='store_true', help="使用流式接口")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(',') if level.strip()]
+    with MockWorkflowServer(args.latency, args.chunk_delay, args.error_rate, args.images,
+                            args.paragraphs, seed=0) as server:
+        rprint(f"替身服务: {server.url}")
+        rprint(f"{'并发':>4} {'成功':>5} {'失败':>4} {'重试':>4} {'篇/秒':>7} {'p50':>7} {'p95':>7} {'p99':>7}")
+        for concurrency in levels:
+            with tempfile.TemporaryDirectory(prefix='xhs_workflow_benchmark_') as cache_dir:
+                report = run_level(server, concurrency, args.requests, args.stream, cache_dir)
+            rprint(f"{report['concurrency']:>4} {report['succeeded']:>5} {report['failed']:>4} "
+                   f"{report['retried']:>4} {report['per_second']:>7.2f} {report['p50']:>6.2f}s "
+                   f"{report['p95']:>6.2f}s {report['p99']:>6.2f}s")
+        rprint(f"服务端收到 {server.calls} 个请求，其中 {server.errors} 个返回 503")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+# 本地的创作者中心替身站点，页面只保留 XiaohongshuPoster 用到的元素，
+# 可以设置人为延迟，离线、可重复地测试登录和发布流程的耗时
+import json
+import threading
+import time
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+SESSION_COOKIE = 'web_session'
+
+LOGIN_HTML = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>登录</title></head>
+<body>
+  <input placeholder="手机号" type="text">
+  <button class="css-uyobdj" onclick="fetch('/api/sms/send', {method: 'POST'})">发送验证码</button>
+  <input placeholder="验证码" type="text">
+  <button class="beer-login-btn" onclick="login()">登 录</button>
+  <script>
+    async function login() {
+      await fetch('/api/login', {method: 'POST'});
+      location.href = '/new/home';
+    }
+  </script>
+</body></html>
+"""
+
+HOME_HTML = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>首页</title></head>
+<body>
+  <a class="btn el-tooltip__trigger el-tooltip__trigger" href="/publish/publish?source=official">发布笔记</a>
+</body></html>
+"""
+
+PUBLISH_HTML = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>发布笔记</title></head>
+<body>
+  <div class="creator-tab">上传视频</div>
+  <div class="creator-tab" onclick="showUpload()">上传图文</div>
+  <div id="upload"></div>
+  <div id="editor" style="display: none">
+    <input class="d-text" placeholder="填写标题">
+    <div class="ql-editor" contenteditable="true"></div>
+    <button class="el-button publishBtn" onclick="publish()">发布</button>
+  </div>
+  <script>
+    function showUpload() {
+      document.getElementById('upload').innerHTML =
+        '<input class="upload-input" type="file" multiple accept="image/*">';
+      document.querySelector('.upload-input').addEventListener('change', upload);
+    }
+    async function upload(event) {
+      await Promise.all(Array.from(event.target.files).map(file =>
+        fetch('/api/media/upload', {method: 'POST', body: file})));
+      document.getElementById('editor').style.display = 'block';
+    }
+    async function publish() {
+      await fetch('/api/publish', {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({
+          title: document.querySelector('.d-text').value,
+          content: document.querySelector('.ql-editor').innerText,
+        }),
+      });
+      location.href = '/publish/success?published=true';
+    }
+  </script>
+</body></html>
+"""
+
+SUCCESS_HTML = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>发布成功</title></head>
+<body><div class="success">发布成功</div></body></html>
+"""
+
+
+class MockCreatorSite:
+    """创作者中心替身站点
+
+    Args:
+        latency_ms: 每个请求的额外延迟
+        upload_latency_ms: 每张图片上传的额外延迟
+        port: 监听端口，0 表示随机端口
+    """
+
+    def __init__(self, latency_ms=0, upload_latency_ms=0, host='127.0.0.1', port=0):
+        self.latency_ms = latency_ms
+        self.upload_latency_ms = upload_latency_ms
+        self.requests = 0
+        self.uploads = 0
+        self.upload_bytes = 0
+        self.published = []  # [{'title', 'content'}]
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def _handler_class(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _logged_in(self):
+                cookie = SimpleCookie(self.headers.get('Cookie', ''))
+                return SESSION_COOKIE in cookie
+
+            def _send(self, status, body=b'', content_type='text/html; charset=utf-8', headers=None):
+                if isinstance(body, str):
+                    body = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_json(self, data, status=200, headers=None):
+                self._send(status, json.dumps(data, ensure_ascii=False),
+                           'application/json; charset=utf-8', headers)
+
+            def _redirect(self, location):
+                self._send(302, headers={'Location': location})
+
+            def _delay(self, ms):
+                if ms:
+                    time.sleep(ms / 1000)
+
+            def _read_body(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                return self.rfile.read(length) if length else b''
+
+            def do_GET(self):
+                with site.lock:
+                    site.requests += 1
+                self._delay(site.latency_ms)
+                path = urlsplit(self.path).path
+                if path == '/login':
+                    if self._logged_in():
+                        self._redirect('/new/home')
+                    else:
+                        self._send(200, LOGIN_HTML)
+                elif path == '/new/home':
+                    self._send(200, HOME_HTML)
+                elif path == '/publish/publish':
+                    if self._logged_in():
+                        self._send(200, PUBLISH_HTML)
+                    else:
+                        self._redirect('/login')
+                elif path == '/publish/success':
+                    self._send(200, SUCCESS_HTML)
+                elif path == '/api/galaxy/creator/home/personal_info':
+                    if self._logged_in():
+                        self._send_json({'success': True, 'code': 0, 'data': {'name': 'mock'}})
+                    else:
+                        self._send_json({'success': False, 'code': -100}, status=401)
+                else:
+                    self._send(404, 'not found')
+
+            def do_POST(self):
+                with site.lock:
+                    site.requests += 1
+                body = self._read_body()
+                self._delay(site.latency_ms)
+                path = urlsplit(self.path).path
+                if path == '/api/sms/send':
+                    self._send_json({'success': True})
+                elif path == '/api/login':
+                    self._send_json({'success': True}, headers={
+                        'Set-Cookie': f'{SESSION_COOKIE}=mock; Path=/; Max-Age=86400'})
+                elif path == '/api/media/upload':
+                    self._delay(site.upload_latency_ms)
+                    with site.lock:
+                        site.uploads += 1
+                        site.upload_bytes += len(body)
+                    self._send_json({'success': True, 'size': len(body)})
+                elif path == '/api/publish':
+                    with site.lock:
+                        site.published.append(json.loads(body or b'{}'))
+                    self._send_json({'success': True})
+                else:
+                    self._send(404, 'not found')
+
+        return Handler
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="启动本地的创作者中心替身站点")
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--latency', type=int, default=0, help="每个请求的延迟(毫秒)")
+    parser.add_argument('--upload-latency', type=int, default=0, help="每张图片上传的延迟(毫秒)")
+    args = parser.parse_args()
+    site = MockCreatorSite(args.latency, args.upload_latency, port=args.port).start()
+    print(f"替身站点已启动: {site.base_url}")
+    print(f"设置 XHS_CREATOR_BASE_URL={site.base_url} 后启动应用即可使用")
+    try:
+        site.thread.join()
+    except KeyboardInterrupt:
+        site.stop()
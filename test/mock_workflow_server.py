@@ -0,0 +1,212 @@
+# 本地的内容生成工作流替身服务，返回与 /workflow/run 相同结构的结果，
+# 支持流式(SSE)输出，可以设置延迟、错误率和返回内容大小，离线测试生成流程的耗时
+import io
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from PIL import Image
+
+
+def build_result(input_text, header_title, author, base_url, images=3, paragraphs=5):
+    """按输入生成固定的结果，结构与真实工作流一致"""
+    topic = input_text or "主题"
+    title = f"{topic}的{images}个小秘密"
+    content = "\n".join(
+        [f"{header_title or ''} 作者: {author or ''}"] +
+        [f"{i + 1}. 关于{topic}，这是第{i + 1}段正文。" for i in range(paragraphs)] +
+        [f"#{topic} #生活分享"])
+    return {
+        'title': title,
+        'content': content,
+        'cover_image': f"{base_url}/images/cover.jpg",
+        'content_images': [f"{base_url}/images/{i}.jpg" for i in range(images - 1)],
+    }
+
+
+def build_response(result):
+    """把结果包装成工作流接口的响应: data 是 JSON 字符串，output 里再嵌一层 JSON"""
+    return {
+        'code': 0,
+        'data': json.dumps({
+            'output': json.dumps({'title': result['title']}, ensure_ascii=False),
+            'content': result['content'],
+            'image': result['cover_image'],
+            'image_content': result['content_images'],
+        }, ensure_ascii=False),
+    }
+
+
+class _Server(ThreadingHTTPServer):
+    # 基准测试时并发连接较多，加大监听队列
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def chunks(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)] or ['']
+
+
+class MockWorkflowServer:
+    """内容生成工作流替身服务
+
+    Args:
+        latency_ms: 返回结果前的延迟(流式时为第一个事件前的延迟)
+        chunk_delay_ms: 流式输出时每个事件之间的延迟
+        stall_ms: 流式输出时发送响应头之后、第一个事件之前的延迟
+        error_rate: 返回 503 的比例
+        images: 每个结果的图片数(封面图 + 内容图)
+        paragraphs: 正文段落数，用来调整返回内容的大小
+        port: 监听端口，0 表示随机端口
+        seed: 随机数种子，固定后出错的请求可以复现
+    """
+
+    def __init__(self, latency_ms=0, chunk_delay_ms=0, error_rate=0.0, images=3, paragraphs=5,
+                 host='127.0.0.1', port=0, seed=None, stall_ms=0):
+        self.latency_ms = latency_ms
+        self.chunk_delay_ms = chunk_delay_ms
+        self.stall_ms = stall_ms
+        self.error_rate = error_rate
+        self.images = images
+        self.paragraphs = paragraphs
+        self.random = random.Random(seed)
+        self.calls = 0
+        self.errors = 0
+        self.stream_calls = 0
+        self.image_requests = 0
+        self.lock = threading.Lock()
+        self.server = _Server((host, port), self._handler_class())
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def url(self):
+        return f"{self.base_url}/workflow/run"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body, content_type):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_json(self, data, status=200):
+                self._send(status, json.dumps(data, ensure_ascii=False).encode('utf-8'),
+                           'application/json; charset=utf-8')
+
+            def _delay(self, ms):
+                if ms:
+                    time.sleep(ms / 1000)
+
+            def _event(self, event, data):
+                self.wfile.write(
+                    f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode('utf-8'))
+                self.wfile.flush()
+                self._delay(server.chunk_delay_ms)
+
+            def do_GET(self):
+                path = urlsplit(self.path).path
+                if path.startswith('/images/'):
+                    with server.lock:
+                        server.image_requests += 1
+                    buffer = io.BytesIO()
+                    Image.new('RGB', (300, 400), (200, 120, 80)).save(buffer, 'JPEG')
+                    self._send(200, buffer.getvalue(), 'image/jpeg')
+                else:
+                    self._send_json({'code': 404}, status=404)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length) or b'{}')
+                if urlsplit(self.path).path != '/workflow/run':
+                    self._send_json({'code': 404}, status=404)
+                    return
+                parameters = body.get('parameters', {})
+                result = build_result(parameters.get('BOT_USER_INPUT'), parameters.get('HEADER_TITLE'),
+                                      parameters.get('AUTHOR'), server.base_url,
+                                      server.images, server.paragraphs)
+                stream = 'text/event-stream' in self.headers.get('Accept', '')
+                with server.lock:
+                    server.calls += 1
+                    if stream:
+                        server.stream_calls += 1
+                    failed = server.random.random() < server.error_rate
+                    if failed:
+                        server.errors += 1
+                self._delay(server.latency_ms)
+                if failed:
+                    self._send_json({'code': 503, 'msg': 'workflow busy'}, status=503)
+                    return
+                if not stream:
+                    self._send_json(build_response(result))
+                    return
+
+                # 不带 Content-Length，响应结束时关闭连接
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+                self.send_header('Cache-Control', 'no-cache')
+                self.end_headers()
+                self.wfile.flush()
+                self._delay(server.stall_ms)
+                for text in chunks(result['title'], 2):
+                    self._event('delta', {'field': 'title', 'text': text})
+                self._event('image', {'field': 'cover_image', 'url': result['cover_image']})
+                for text in chunks(result['content'], 10):
+                    self._event('delta', {'field': 'content', 'text': text})
+                for url in result['content_images']:
+                    self._event('image', {'field': 'content_images', 'url': url})
+                self._event('done', build_response(result))
+
+        return Handler
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="启动本地的内容生成工作流替身服务")
+    parser.add_argument('--port', type=int, default=8901)
+    parser.add_argument('--latency', type=int, default=0, help="返回结果前的延迟(毫秒)")
+    parser.add_argument('--chunk-delay', type=int, default=50, help="流式输出每个事件的间隔(毫秒)")
+    parser.add_argument('--stall', type=int, default=0, help="流式输出发送响应头后、第一个事件前的延迟(毫秒)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="返回 503 的比例")
+    parser.add_argument('--images', type=int, default=3, help="每个结果的图片数")
+    parser.add_argument('--paragraphs', type=int, default=5, help="正文段落数")
+    args = parser.parse_args()
+    server = MockWorkflowServer(args.latency, args.chunk_delay, args.error_rate, args.images,
+                                args.paragraphs, port=args.port, stall_ms=args.stall).start()
+    print(f"工作流替身服务已启动: {server.url}")
+    print(f"设置 XHS_WORKFLOW_URL={server.url}(或配置中的 workflow.url)后启动应用即可使用")
+    try:
+        server.thread.join()
+    except KeyboardInterrupt:
+        server.stop()
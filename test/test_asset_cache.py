@@ -0,0 +1,90 @@
+import sys
+import os
+
+# 将项目根目录添加到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.core import asset_cache
+from src.core.asset_cache import StaticAssetCache
+
+
+class FakeRequest:
+    method = 'GET'
+    resource_type = 'script'
+
+    def __init__(self, url):
+        self.url = url
+
+
+class FakeResponse:
+    status = 200
+
+    def __init__(self, headers=None):
+        self.headers = headers or {'content-type': 'application/javascript'}
+
+    def body(self):
+        return b'console.log(1)'
+
+
+class FakeRoute:
+    def __init__(self, url, fail=False, headers=None):
+        self.request = FakeRequest(url)
+        self.fail = fail
+        self.headers = headers
+        self.actions = []
+
+    def fetch(self):
+        self.actions.append('fetch')
+        if self.fail:
+            raise Exception("net::ERR_CONNECTION_RESET")
+        return FakeResponse(self.headers)
+
+    def fulfill(self, **kwargs):
+        self.actions.append('fulfill')
+
+    def continue_(self):
+        self.actions.append('continue')
+
+    def abort(self, *args):
+        self.actions.append('abort')
+
+
+URL = 'https://fe-static.xhscdn.com/formula-static/index.3f9a1c2b.js'
+
+
+def test_failed_fetch_falls_back_to_network(tmp_path):
+    cache = StaticAssetCache(cache_dir=str(tmp_path))
+    route = FakeRoute(URL, fail=True)
+    cache.handle(route)
+    assert route.actions == ['fetch', 'continue']
+    assert cache.stats()['entries'] == 0
+
+
+def test_stored_assets_survive_without_close(tmp_path, monkeypatch):
+    monkeypatch.setattr(asset_cache, 'SAVE_INTERVAL', 0)
+    cache = StaticAssetCache(cache_dir=str(tmp_path))
+    cache.handle(FakeRoute(URL))
+    # 没有调用 save_index，模拟进程异常退出
+    route = FakeRoute(URL)
+    StaticAssetCache(cache_dir=str(tmp_path)).handle(route)
+    assert route.actions == ['fulfill']
+
+
+def test_max_age_assets_expire(tmp_path):
+    url = 'https://fe-static.xhscdn.com/formula-static/index.js'
+    headers = {'content-type': 'application/javascript', 'cache-control': 'max-age=604800'}
+    cache = StaticAssetCache(cache_dir=str(tmp_path))
+    cache.handle(FakeRoute(url, headers=headers))
+    route = FakeRoute(url, headers=headers)
+    cache.handle(route)
+    assert route.actions == ['fulfill']
+
+    # 过期后重新请求
+    cache.index[url]['expires_at'] = 0
+    route = FakeRoute(url, headers=headers)
+    cache.handle(route)
+    assert route.actions == ['fetch', 'fulfill']
+
+    # 没有 max-age 的非哈希资源不缓存
+    other = 'https://fe-static.xhscdn.com/formula-static/main.css'
+    cache.handle(FakeRoute(other))
+    assert other not in cache.index
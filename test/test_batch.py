@@ -0,0 +1,63 @@
+import sys
+import os
+
+import pytest
+
+# 将项目根目录添加到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mock_workflow_server import MockWorkflowServer
+from src.core.batch import BatchReport, iter_drafts
+from src.core.processor.batch_content import BatchContentGenerator
+from src.core.write_xiaohongshu import XiaohongshuPoster
+
+
+def test_malformed_drafts_become_errors(tmp_path):
+    path = tmp_path / "drafts.jsonl"
+    path.write_text('{"title": "第一篇"}\n[1, 2]\n不是JSON\n"字符串"\n\n{"title": "第二篇"}\n', encoding='utf-8')
+    drafts = list(iter_drafts(str(path)))
+    assert [draft.get('title') for draft in drafts] == ["第一篇", None, None, None, "第二篇"]
+    assert all('error' in draft for draft in drafts[1:4])
+
+    assert 'error' in list(iter_drafts([{'title': "标题"}, None]))[1]
+
+
+class FakeWorkflowClient:
+    def __init__(self, base_url):
+        self.base_url = base_url
+
+    def generate(self, topic, header_title, author):
+        return {'title': f"{topic}标题", 'content': "正文",
+                'cover_image': f"{self.base_url}/images/cover.jpg",
+                'content_images': [f"{self.base_url}/missing/{topic}.jpg"]}
+
+    def stats(self):
+        return {}
+
+
+def test_image_failure_keeps_generated_draft(tmp_path):
+    output_path = str(tmp_path / "drafts.jsonl")
+    with MockWorkflowServer() as server:
+        generator = BatchContentGenerator(FakeWorkflowClient(server.base_url), concurrency=2,
+                                          output_path=output_path)
+        summary = generator.run(["主题一", "主题二"], "标题", "作者")
+    assert summary['succeeded'] == 2 and not summary['failed']
+    assert len(summary['image_failed']) == 2
+    drafts = list(iter_drafts(output_path))
+    assert {draft['title'] for draft in drafts} == {"主题一标题", "主题二标题"}
+    assert all(draft['image_error'] and draft['images'] == [] for draft in drafts)
+
+
+def test_filled_drafts_not_counted_as_published():
+    report = BatchReport()
+    report.add(0, "第一篇", 3, 0.1, 1.0, published=True)
+    report.add(1, "第二篇", 3, 0.1, 1.0, published=False)
+    report.add(2, "第三篇", 0, 0.0, 0.0, error="格式错误")
+    summary = report.summary()
+    assert (summary['succeeded'], summary['filled'], summary['failed']) == (1, 1, 1)
+
+
+def test_fill_only_batch_refuses_several_drafts():
+    poster = XiaohongshuPoster.__new__(XiaohongshuPoster)
+    drafts = [{'title': "第一篇"}, {'title': "第二篇"}]
+    with pytest.raises(ValueError):
+        poster.post_batch(drafts, prepare=lambda images: [])
@@ -0,0 +1,35 @@
+import sys
+import os
+
+# 将项目根目录添加到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.core.browser import BrowserThread
+from src.core.job_queue import FAILED
+
+
+class DisconnectedBrowser:
+    def is_connected(self):
+        return False
+
+    def close(self):
+        pass
+
+
+def test_failed_restart_fails_job_and_keeps_thread_usable():
+    thread = BrowserThread()
+    thread.browser = DisconnectedBrowser()
+
+    def launch_fails():
+        raise Exception("浏览器启动失败")
+    thread.ensure_browser = launch_fails
+
+    errors = []
+    thread.login_error.connect(errors.append)
+    job = thread.submit('login', phone="13800000000")
+    assert thread.action_queue.get(timeout=1) is job
+    thread.execute(job)
+
+    assert job.state == FAILED
+    assert errors and "浏览器启动失败" in errors[0]
+    # 失败的任务已结束，同一账号可以再次提交
+    assert thread.submit('login', phone="13800000000") is not job
@@ -0,0 +1,79 @@
+import sys
+import os
+import threading
+import time
+
+# 将项目根目录添加到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.core.job_queue import (CANCELLED, DONE, EXPIRED, RUNNING, Job,
+                                JobQueue)
+
+
+def test_priority_order():
+    queue = JobQueue()
+    preview = queue.put(Job('preview'))
+    login = queue.put(Job('login'))
+    other = queue.put(Job('preview', key=None))
+    assert queue.get(timeout=0) is login
+    assert queue.get(timeout=0) is preview
+    assert queue.get(timeout=0) is other
+    assert queue.get(timeout=0) is None
+
+
+def test_duplicate_key_returns_existing_job():
+    queue = JobQueue()
+    first = queue.put(Job('preview', key='preview'))
+    second = queue.put(Job('preview', key='preview'))
+    assert second is first
+    assert len(queue) == 1
+
+    # 执行结束后可以再次加入
+    job = queue.get(timeout=0)
+    assert job.state == RUNNING
+    queue.finish(job)
+    assert job.state == DONE
+    assert queue.put(Job('preview', key='preview')) is not first
+
+
+def test_cancel_and_expire():
+    states = []
+    queue = JobQueue(on_state_changed=lambda job: states.append((job.type, job.state)))
+    cancelled = queue.put(Job('preview'))
+    expired = queue.put(Job('login', timeout=0.01))
+    assert queue.cancel(cancelled.id)
+    time.sleep(0.02)
+    assert queue.get(timeout=0) is None
+    assert cancelled.state == CANCELLED
+    assert expired.state == EXPIRED
+    assert ('login', EXPIRED) in states
+
+
+def test_get_wakes_up_without_polling():
+    queue = JobQueue()
+    result = []
+    worker = threading.Thread(target=lambda: result.append(queue.get()))
+    worker.start()
+    time.sleep(0.05)
+    start = time.monotonic()
+    queue.put(Job('login'))
+    worker.join(1)
+    assert result and result[0].type == 'login'
+    assert time.monotonic() - start < 0.05
+
+
+def test_close_releases_waiters():
+    queue = JobQueue()
+    result = []
+    worker = threading.Thread(target=lambda: result.append(queue.get()))
+    worker.start()
+    queue.close()
+    worker.join(1)
+    assert result == [None]
+
+
+if __name__ == "__main__":
+    test_priority_order()
+    test_duplicate_key_returns_existing_job()
+    test_cancel_and_expire()
+    test_get_wakes_up_without_polling()
+    test_close_releases_waiters()
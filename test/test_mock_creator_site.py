@@ -0,0 +1,75 @@
+import json
+import time
+import urllib.error
+import urllib.request
+
+from mock_creator_site import MockCreatorSite
+
+# XiaohongshuPoster 依赖的选择器
+LOGIN_SELECTORS = ["placeholder=\"手机号\"", "placeholder=\"验证码\"", "css-uyobdj", "beer-login-btn"]
+PUBLISH_SELECTORS = ["creator-tab", "upload-input", "d-text", "ql-editor", "publishBtn"]
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def open_url(url, data=None, cookie=None):
+    request = urllib.request.Request(url, data=data, method='POST' if data is not None else 'GET')
+    if cookie:
+        request.add_header('Cookie', cookie)
+    opener = urllib.request.build_opener(NoRedirect)
+    try:
+        response = opener.open(request, timeout=5)
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read().decode('utf-8')
+    return response.status, response.headers, response.read().decode('utf-8')
+
+
+def test_pages_have_poster_selectors():
+    with MockCreatorSite() as site:
+        status, _, body = open_url(site.base_url + "/login")
+        assert status == 200
+        assert all(selector in body for selector in LOGIN_SELECTORS)
+
+        # 未登录时发布页跳转到登录页
+        status, headers, _ = open_url(site.base_url + "/publish/publish?source=official")
+        assert status == 302 and headers['Location'] == '/login'
+
+        status, _, body = open_url(site.base_url + "/publish/publish?source=official",
+                                   cookie="web_session=mock")
+        assert status == 200
+        assert all(selector in body for selector in PUBLISH_SELECTORS)
+
+
+def test_login_sets_session_cookie():
+    with MockCreatorSite() as site:
+        check_url = site.base_url + "/api/galaxy/creator/home/personal_info"
+        assert open_url(check_url)[0] == 401
+
+        status, headers, _ = open_url(site.base_url + "/api/login", data=b'')
+        assert status == 200
+        cookie = headers['Set-Cookie'].split(';')[0]
+
+        status, _, body = open_url(check_url, cookie=cookie)
+        assert status == 200 and json.loads(body)['success'] is True
+        # 已登录时登录页直接跳走
+        assert open_url(site.base_url + "/login", cookie=cookie)[0] == 302
+
+
+def test_latency_and_uploads():
+    with MockCreatorSite(latency_ms=50, upload_latency_ms=100) as site:
+        start = time.monotonic()
+        open_url(site.base_url + "/login")
+        assert time.monotonic() - start >= 0.05
+
+        start = time.monotonic()
+        status, _, _ = open_url(site.base_url + "/api/media/upload", data=b'x' * 1024)
+        assert status == 200
+        assert time.monotonic() - start >= 0.15
+        assert site.uploads == 1 and site.upload_bytes == 1024
+
+        open_url(site.base_url + "/api/publish", data=json.dumps({'title': 't', 'content': 'c'}).encode())
+        assert site.published == [{'title': 't', 'content': 'c'}]
+        assert site.requests == 3
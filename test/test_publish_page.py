@@ -0,0 +1,114 @@
+import sys
+import os
+
+# 将项目根目录添加到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.core.publish_page import WarmPublishPage
+from src.core.write_xiaohongshu import XiaohongshuPoster
+
+
+class FakePage:
+    def __init__(self):
+        self.closed = False
+        self.handlers = {}
+        self.context = None
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    def goto(self, url, **kwargs):
+        pass
+
+    def query_selector_all(self, selector):
+        return []
+
+    def evaluate(self, script):
+        if self.closed:
+            raise Exception("Target page, context or browser has been closed")
+        return True if 'upload-input' in script else 1
+
+    def is_closed(self):
+        return self.closed
+
+    def bring_to_front(self):
+        self.context.front = self
+
+    def close(self):
+        self.closed = True
+
+
+class FakeContext:
+    def __init__(self):
+        self.pages = []
+        self.front = None  # 当前在前台的页面
+
+    def new_page(self):
+        # 与 Chromium 有界面时一样，新标签页切到前台
+        page = FakePage()
+        page.context = self
+        self.pages.append(page)
+        self.front = page
+        return page
+
+
+class FakeWaiter:
+    def wait_visible(self, page, step, selector):
+        pass
+
+    def wait_attached(self, page, step, selector):
+        pass
+
+
+class FakeBrowser:
+    def is_connected(self):
+        return True
+
+
+class FakePool:
+    def is_alive(self, account):
+        return True
+
+
+def make_poster():
+    poster = XiaohongshuPoster.__new__(XiaohongshuPoster)
+    poster.account = "test"
+    poster.browser = FakeBrowser()
+    poster.pool = FakePool()
+    poster.context = FakeContext()
+    poster.page = poster.context.new_page()
+    poster.crashed = False
+    poster.publish_page = WarmPublishPage(poster.context, FakeWaiter(), url="http://localhost/publish",
+                                          on_new_page=lambda page: page.on('crash', poster._on_page_crash))
+    return poster
+
+
+def test_swapping_prefetched_page_keeps_poster_healthy():
+    poster = make_poster()
+    warm = poster.publish_page
+    for _ in range(3):
+        # 预览: 取得发布页填好内容交给用户，同时预热下一个
+        first = warm.acquire()
+        warm.release()
+        warm.prefetch_next()
+        second = warm.acquire()
+        assert second is not first and first.is_closed()
+        warm.release()
+        assert not poster.page.is_closed()
+        assert poster.is_healthy()
+
+
+def test_publish_page_crash_marks_poster_unhealthy():
+    poster = make_poster()
+    page = poster.publish_page.acquire()
+    page.handlers['crash'](page)
+    assert not poster.is_healthy()
+
+
+def test_prefetch_keeps_reviewed_page_in_front():
+    poster = make_poster()
+    warm = poster.publish_page
+    reviewed = warm.acquire()
+    warm.release()
+    warm.prefetch_next()
+    assert warm.next_page is not None
+    assert poster.context.front is reviewed
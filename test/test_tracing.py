@@ -0,0 +1,33 @@
+import sys
+import os
+import time
+
+# 将项目根目录添加到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.core.tracing import TraceRecorder
+
+
+class FakeTracing:
+    def start(self, **kwargs):
+        pass
+
+    def stop(self, path=None):
+        if path:
+            with open(path, 'wb') as f:
+                f.write(b'trace')
+
+
+class FakeContext:
+    tracing = FakeTracing()
+
+
+def test_user_wait_not_counted_as_slow(tmp_path):
+    tracer = TraceRecorder(enabled=True, threshold_seconds=0.2, trace_dir=str(tmp_path))
+    with tracer.record(FakeContext(), 'login'):
+        with tracer.pause():
+            time.sleep(0.3)
+    assert tracer.stats()['saved'] == 0
+
+    with tracer.record(FakeContext(), 'login'):
+        time.sleep(0.3)
+    assert tracer.stats()['saved'] == 1
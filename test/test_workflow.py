@@ -0,0 +1,118 @@
+import sys
+import os
+import threading
+import time
+
+import pytest
+
+# 将项目根目录添加到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mock_workflow_server import MockWorkflowServer
+from src.core.processor.workflow import (CircuitBreaker, CircuitOpenError, ContentCache,
+                                         WorkflowClient, iter_sse_events)
+
+
+def make_client(server, tmp_path):
+    return WorkflowClient(url=server.url, cache=ContentCache(cache_dir=str(tmp_path)))
+
+
+def test_generate_parses_workflow_response(tmp_path):
+    with MockWorkflowServer() as server:
+        result = make_client(server, tmp_path).generate("中医的好处", "标题", "作者")
+    assert result['title'] == "中医的好处的3个小秘密"
+    assert "作者: 作者" in result['content']
+    assert result['cover_image'].endswith('/images/cover.jpg')
+    assert len(result['content_images']) == 2
+    assert result['input_text'] == "中医的好处"
+
+
+def test_cache_skips_repeat_calls(tmp_path):
+    with MockWorkflowServer() as server:
+        client = make_client(server, tmp_path)
+        first = client.generate("中医的好处", "标题", "作者")
+        # 只差空白的输入命中同一条缓存
+        again = client.generate("  中医的好处 ", "标题", "作者")
+        assert server.calls == 1
+        assert again['cached'] and again['title'] == first['title']
+
+        # 新的客户端从磁盘缓存读取
+        assert make_client(server, tmp_path).generate("中医的好处", "标题", "作者")['cached']
+        assert server.calls == 1
+
+        client.generate("中医的好处", "标题", "作者", force_refresh=True)
+        assert server.calls == 2
+
+
+def test_stream_emits_deltas_before_result(tmp_path):
+    deltas = {'title': '', 'content': ''}
+    images = []
+    with MockWorkflowServer(chunk_delay_ms=1) as server:
+        result = make_client(server, tmp_path).generate_stream(
+            "中医的好处", "标题", "作者",
+            on_delta=lambda field, text: deltas.__setitem__(field, deltas[field] + text),
+            on_image=lambda field, url: images.append(url))
+        assert server.stream_calls == 1
+    assert deltas['title'] == result['title']
+    assert deltas['content'] == result['content']
+    assert images == [result['cover_image']] + result['content_images']
+
+
+def test_stream_read_timeout_after_headers_not_retried(tmp_path):
+    # 响应头已经返回，服务端还在生成，重试只会重复生成
+    with MockWorkflowServer(stall_ms=1000) as server:
+        client = WorkflowClient(url=server.url, cache=ContentCache(cache_dir=str(tmp_path)), timeout=(1, 0.2),
+                                retries=2, backoff=0.01, breaker=CircuitBreaker(failure_threshold=100))
+        with pytest.raises(Exception):
+            client.generate_stream("中医的好处", "标题", "作者")
+        assert server.stream_calls == 1
+    assert client.stats()['retried'] == 0
+
+
+def test_iter_sse_events():
+    lines = [': 注释', 'event: delta', 'data: {"a": 1}', '', 'data: 第一行', 'data: 第二行', '']
+    assert list(iter_sse_events(lines)) == [('delta', '{"a": 1}'), ('message', '第一行\n第二行')]
+
+
+def test_identical_calls_share_one_request(tmp_path):
+    with MockWorkflowServer(latency_ms=300) as server:
+        client = make_client(server, tmp_path)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(
+            client.generate("中医的好处", "标题", "作者", force_refresh=True))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert server.calls == 1
+    assert len(results) == 5 and len({result['title'] for result in results}) == 1
+    assert sum(1 for result in results if result.get('shared')) == 4
+    assert client.stats()['saved_by_coalescing'] == 4
+
+
+def test_breaker_fails_fast_when_endpoint_down(tmp_path):
+    # 先占用再释放一个端口，连接会被拒绝
+    server = MockWorkflowServer()
+    url = server.url
+    server.server.server_close()
+    client = WorkflowClient(url=url, cache=ContentCache(cache_dir=str(tmp_path)), retries=2, backoff=0.01,
+                            breaker=CircuitBreaker(failure_threshold=3, reset_timeout=60))
+    with pytest.raises(Exception):
+        client.generate("中医的好处", "标题", "作者")
+    assert client.stats()['retried'] == 2
+    assert client.stats()['breaker']['state'] == 'open'
+
+    start = time.monotonic()
+    with pytest.raises(CircuitOpenError):
+        client.generate("中医的好处", "标题", "作者")
+    assert time.monotonic() - start < 0.1
+
+
+def test_retries_server_errors(tmp_path):
+    with MockWorkflowServer(error_rate=0.5, seed=1) as server:
+        client = WorkflowClient(url=server.url, cache=ContentCache(cache_dir=str(tmp_path)), retries=10,
+                                backoff=0.01, breaker=CircuitBreaker(failure_threshold=100))
+        for i in range(5):
+            client.generate(f"主题{i}", "标题", "作者")
+        assert server.errors > 0
+        assert client.stats()['retried'] == server.errors
+        assert client.stats()['latency']['count'] == 5